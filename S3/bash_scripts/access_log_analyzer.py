@@ -0,0 +1,298 @@
+#✔ Access Log Analysis: Reads the server access logs that enable_logging() / modules/monitoring write under logs/.
+#✔ Concurrent Fetches: Many small log objects are downloaded on a thread pool while earlier ones are parsed.
+#✔ Parallel Parsing: Log lines are parsed in a process pool, in multi-MB chunks, straight from bytes.
+#✔ Aggregates: Hot keys, requester IPs, operation mix, error rates and latency percentiles (overall and per operation).
+#✔ Incremental: A checkpoint stores the last log object read and the running totals, so each run only reads new logs.
+#✔ No Lost Logs: Log objects that could not be downloaded are kept in the checkpoint and fetched again on the next run.
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import itertools
+import logging
+import argparse
+from collections import Counter
+from urllib.parse import unquote
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from bucket_region import RegionRoutingClient
+from list_s3_contents import iter_objects
+from rate_control import shared_controller
+from instrumentation import LATENCY_BUCKETS, latency_bucket, percentiles, profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_STATE_DIR = os.environ.get("S3_ACCESS_LOG_STATE_DIR", os.path.expanduser("~/.s3_access_logs"))
+CHUNK_BYTES = 8 * 1024 * 1024   # Log data handed to a parser process at a time
+BATCH_OBJECTS = 5000            # Log objects between checkpoints
+TRACKED_ENTRIES = 100000        # Hot keys / IPs kept in the checkpoint (the long tail is dropped)
+
+# Fields: owner bucket [time] remote_ip requester request_id operation key "request_uri" status error_code
+#         bytes_sent object_size total_time turn_around_time ...
+# ([^ ]+ rather than \S+ keeps the regex engine on its fast path, ~1.5x faster)
+LOG_LINE = re.compile(
+    rb'[^ ]+ [^ ]+ \[([^\]]+)\] ([^ ]+) [^ ]+ [^ ]+ ([^ ]+) ([^ ]+) "[^"]*" ([^ ]+) ([^ ]+) ([^ ]+) [^ ]+ ([^ ]+)'
+)
+
+# Precomputed buckets for the first minute, which covers nearly every request
+LATENCY_LOOKUP = [latency_bucket(ms) for ms in range(60 * 1000)]
+
+def empty_stats():
+    return {
+        "objects": 0, "lines": 0, "unparsed": 0, "bytes_sent": 0,
+        "operations": Counter(), "statuses": Counter(), "error_codes": Counter(),
+        "keys": Counter(), "ips": Counter(), "hours": Counter(),
+        "latency": {},  # operation -> histogram
+    }
+
+# ================= Parsing (runs in worker processes) =================
+def parse_chunk(data):
+    """Parses a block of access log lines and returns partial aggregates with plain-str keys."""
+    operations, statuses, error_codes = Counter(), Counter(), Counter()
+    keys, ips, hours = Counter(), Counter(), Counter()
+    latency = {}
+    lines = unparsed = bytes_sent = 0
+
+    match = LOG_LINE.match
+    for line in data.splitlines():
+        if not line:
+            continue
+        lines += 1
+        fields = match(line)
+        if fields is None:
+            unparsed += 1
+            continue
+        when, ip, operation, key, status, error_code, sent, total_time = fields.groups()
+        operations[operation] += 1
+        statuses[status] += 1
+        ips[ip] += 1
+        hours[when[:14]] += 1  # dd/Mon/yyyy:HH
+        if key != b"-":
+            keys[key] += 1
+        if error_code != b"-":
+            error_codes[error_code] += 1
+        if sent != b"-":
+            bytes_sent += int(sent)
+        if total_time != b"-":
+            histogram = latency.get(operation)
+            if histogram is None:
+                histogram = latency[operation] = [0] * LATENCY_BUCKETS
+            milliseconds = int(total_time)
+            histogram[LATENCY_LOOKUP[milliseconds] if milliseconds < 60000 else latency_bucket(milliseconds)] += 1
+
+    decode = lambda counter: {k.decode("utf-8", "replace"): v for k, v in counter.items()}
+    return {
+        "lines": lines, "unparsed": unparsed, "bytes_sent": bytes_sent,
+        "operations": decode(operations), "statuses": decode(statuses), "error_codes": decode(error_codes),
+        "keys": decode(keys), "ips": decode(ips), "hours": decode(hours),
+        "latency": {op.decode(): histogram for op, histogram in latency.items()},
+    }
+
+def merge_stats(stats, partial):
+    """Adds a partial result (from parse_chunk or a saved checkpoint) into `stats`."""
+    for name in ("objects", "lines", "unparsed", "bytes_sent"):
+        stats[name] += partial.get(name, 0)
+    for name in ("operations", "statuses", "error_codes", "keys", "ips", "hours"):
+        stats[name].update(partial[name])
+    for operation, histogram in partial["latency"].items():
+        merged = stats["latency"].setdefault(operation, [0] * LATENCY_BUCKETS)
+        for i, count in enumerate(histogram):
+            if count:
+                merged[i] += count
+
+# ================= Checkpoint =================
+def state_path_for(bucket_name, prefix, state_dir=DEFAULT_STATE_DIR):
+    digest = hashlib.sha1(f"{bucket_name}\0{prefix}".encode()).hexdigest()[:16]
+    return os.path.join(state_dir, f"{bucket_name}-{digest}.json.gz")
+
+def load_state(path):
+    """Returns (start_after, stats, failed keys) from a checkpoint, or (None, empty stats, []) if there is none."""
+    stats = empty_stats()
+    try:
+        with gzip.open(path, "rt") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None, stats, []
+    merge_stats(stats, state["stats"])
+    return state["start_after"], stats, state.get("failed", [])
+
+def save_state(path, start_after, stats, failed=()):
+    """Writes the checkpoint atomically, keeping only the most frequent keys and IPs.
+
+    `failed` lists log objects before `start_after` that could not be read; the next run fetches them again.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    saved = dict(stats)
+    for name in ("keys", "ips"):
+        saved[name] = dict(stats[name].most_common(TRACKED_ENTRIES))
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", compresslevel=1) as f:
+        json.dump({"start_after": start_after, "stats": saved, "failed": sorted(failed)}, f)
+    os.replace(tmp_path, path)
+
+# ================= Analysis =================
+def fetch_log(s3, bucket_name, key):
+    """Downloads one log object, returning None if it cannot be read now (and b"" if it no longer exists)."""
+    try:
+        return shared_controller().call(bucket_name, key, "read",
+                                        lambda: s3.get_object(Bucket=bucket_name, Key=key)["Body"].read())
+    except ClientError as e:
+        if e.response["Error"].get("Code") in ("NoSuchKey", "404"):
+            return b""  # Deleted (e.g. expired) since it was listed; there is nothing left to read
+        logging.error(f"❌ Failed to read log object '{key}': {e}")
+    except BotoCoreError as e:
+        logging.error(f"❌ Failed to read log object '{key}': {e}")
+    return None
+
+def iter_chunks(bodies, chunk_bytes=CHUNK_BYTES):
+    """Concatenates log object bodies into chunks of roughly `chunk_bytes` (objects hold whole lines)."""
+    pending, size = [], 0
+    for body in bodies:
+        if body is None:
+            continue
+        if body and not body.endswith(b"\n"):
+            body += b"\n"
+        pending.append(body)
+        size += len(body)
+        if size >= chunk_bytes:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+def analyze_logs(log_bucket, prefix="logs/", workers=32, processes=None, state_path=None, reset=False,
+                 batch_objects=BATCH_OBJECTS, s3=None):
+    """Reads every log object after the checkpoint and returns the cumulative stats."""
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers)
+    state_path = state_path or state_path_for(log_bucket, prefix)
+    start_after, stats, failed = (None, empty_stats(), []) if reset else load_state(state_path)
+    if start_after:
+        logging.info(f"⏯ Continuing after '{start_after}' ({stats['lines']:,} lines already analyzed).")
+    if failed:
+        logging.info(f"🔁 Retrying {len(failed)} log objects that could not be read last time.")
+
+    start = time.perf_counter()
+    previous_lines = stats["lines"]
+    failed = set(failed)
+    # Earlier failures come first; they sort before start_after, so they never move the checkpoint back
+    keys = itertools.chain(sorted(failed), (obj["Key"] for obj in iter_objects(log_bucket, prefix=prefix,
+                                                                                start_after=start_after)))
+    with ThreadPoolExecutor(max_workers=workers) as fetchers, ProcessPoolExecutor(max_workers=processes) as parsers:
+        while True:
+            batch = list(itertools.islice(keys, batch_objects))
+            if not batch:
+                break
+            # executor.map fetches the whole batch concurrently; chunks are parsed as soon as they fill
+            bodies = fetchers.map(lambda key: fetch_log(s3, log_bucket, key), batch)
+            unread = set()  # Keys whose body came back None; iter_chunks skips them
+            readable = (unread.add(key) if body is None else body for key, body in zip(batch, bodies))
+            parsing = [parsers.submit(parse_chunk, chunk) for chunk in iter_chunks(readable)]
+            for future in parsing:
+                merge_stats(stats, future.result())
+            stats["objects"] += len(batch) - len(unread)
+            failed = (failed - set(batch)) | unread
+
+            # Everything up to the batch's last key is counted or listed as failed, so the checkpoint can move past it
+            start_after = max(start_after or "", batch[-1])
+            save_state(state_path, start_after, stats, failed)
+            elapsed = time.perf_counter() - start
+            logging.info(
+                f"📥 {stats['objects']:,} log objects, {stats['lines']:,} lines "
+                f"({(stats['lines'] - previous_lines) / elapsed:,.0f} lines/s)..."
+            )
+
+    if failed:
+        logging.warning(f"⚠ {len(failed)} log objects could not be read; the next run fetches them again.")
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def build_report(stats, top=20):
+    """Summarizes stats into a JSON-serializable report."""
+    lines = max(stats["lines"] - stats["unparsed"], 1)
+    errors = sum(count for status, count in stats["statuses"].items() if status[:1] in ("4", "5"))
+    overall = [0] * LATENCY_BUCKETS
+    for histogram in stats["latency"].values():
+        overall = [a + b for a, b in zip(overall, histogram)]
+
+    return {
+        "log_objects": stats["objects"],
+        "requests": stats["lines"] - stats["unparsed"],
+        "unparsed_lines": stats["unparsed"],
+        "bytes_sent": stats["bytes_sent"],
+        "error_rate": errors / lines,
+        "server_error_rate": sum(c for s, c in stats["statuses"].items() if s[:1] == "5") / lines,
+        "statuses": dict(stats["statuses"].most_common()),
+        "error_codes": dict(stats["error_codes"].most_common(top)),
+        "operations": dict(stats["operations"].most_common()),
+        "hot_keys": [(unquote(key), count) for key, count in stats["keys"].most_common(top)],
+        "top_ips": stats["ips"].most_common(top),
+        "requests_per_hour": dict(sorted(stats["hours"].items())),
+        "latency_ms": dict(zip(("p50", "p90", "p99"), percentiles(overall))),
+        "latency_ms_by_operation": {
+            operation: dict(zip(("p50", "p90", "p99"), percentiles(histogram)))
+            for operation, histogram in sorted(stats["latency"].items(), key=lambda item: -sum(item[1]))
+        },
+    }
+
+def print_report(report):
+    """Prints the report as tables."""
+    requests = max(report["requests"], 1)
+    print(f"\n📊 {report['requests']:,} requests from {report['log_objects']:,} log objects "
+          f"({report['bytes_sent'] / 1024 ** 3:.2f} GB sent, {report['unparsed_lines']:,} unparsed lines)")
+    print(f"❗ Error rate {report['error_rate']:.2%} (5xx {report['server_error_rate']:.2%})")
+    latency = report["latency_ms"]
+    print(f"⏱ Total time p50 {latency['p50']} ms | p90 {latency['p90']} ms | p99 {latency['p99']} ms")
+
+    print("\n🔧 Operations:")
+    for operation, count in list(report["operations"].items())[:20]:
+        by_op = report["latency_ms_by_operation"].get(operation, {})
+        print(f"  {operation:<40} {count:>12,} {count / requests:>7.2%}   p50 {by_op.get('p50')} / p99 {by_op.get('p99')} ms")
+    if report["error_codes"]:
+        print("\n❌ Error codes:")
+        for code, count in report["error_codes"].items():
+            print(f"  {code:<40} {count:>12,}")
+    print("\n🔥 Hot keys:")
+    for key, count in report["hot_keys"]:
+        print(f"  {count:>12,}  {key}")
+    print("\n🌐 Top requester IPs:")
+    for ip, count in report["top_ips"]:
+        print(f"  {count:>12,}  {ip}")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze S3 server access logs incrementally.")
+    parser.add_argument("log_bucket", help="Bucket the access logs are delivered to (e.g. <bucket>-logs)")
+    parser.add_argument("--prefix", default="logs/", help="Log prefix (TargetPrefix of the logging configuration)")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent log object downloads")
+    parser.add_argument("--processes", type=int, help="Parser processes (default: one per CPU)")
+    parser.add_argument("--state", help="Checkpoint file (default: under ~/.s3_access_logs)")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and re-read every log object")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to analyze access logs."""
+    args = parse_args(argv)
+    try:
+        stats = analyze_logs(args.log_bucket, args.prefix, args.workers, args.processes, args.state, args.reset)
+    except ClientError as e:
+        logging.error(f"❌ Failed to list logs in 's3://{args.log_bucket}/{args.prefix}': {e}")
+        sys.exit(1)
+
+    report = build_report(stats, args.top)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"💾 Wrote report to '{args.json}'.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
@@ -0,0 +1,528 @@
+#✔ Local S3 Stand-In: Runs the scripts against an in-process moto server (or any S3-compatible endpoint such as MinIO).
+#✔ Fault Injection: Adds request latency and SlowDown throttling (random or per-prefix rate caps) in front of the stand-in.
+#✔ Real Code Paths: Benchmarks list_objects, upload_path, provision_buckets, the bucket_setting functions and purge_bucket.
+#✔ Comparable Results: Records throughput, p50/p99 call latency, CPU time and peak RSS per scenario to JSON, and diffs two runs.
+#✔ Compression Cost: The compress scenario uploads log-like text with each codec and reports CPU seconds against bytes saved.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+import subprocess
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+OBJECT_SCENARIOS = ["list", "upload", "empty", "compress"]
+BUCKET_SCENARIOS = ["create", "settings"]
+SCENARIOS = ["list", "upload", "create", "settings", "empty", "compress"]
+CODECS = ["none", "gzip", "zstd"]
+DEFAULT_OBJECT_COUNTS = [1000, 100000, 1000000]
+DEFAULT_BUCKET_COUNTS = [10, 100, 1000]
+DEFAULT_COMPRESS_COUNTS = [8, 64]
+REGION = "us-east-1"
+
+SLOW_DOWN_BODY = (
+    b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>SlowDown</Code>'
+    b"<Message>Please reduce your request rate.</Message></Error>"
+)
+
+# ================= Local S3 Stand-In =================
+class FaultInjector:
+    """WSGI middleware that delays requests and answers some of them with 503 SlowDown.
+
+    `throttle_rate` caps requests per second per bucket/first-key-segment prefix,
+    the way S3 limits a prefix; `throttle_probability` throttles at random on top.
+    Calls into moto are serialized (its store is not safe for a listing running
+    alongside deletes); injected latency still overlaps.
+    """
+
+    def __init__(self, app, latency_ms=0.0, jitter_ms=0.0, throttle_probability=0.0, throttle_rate=None):
+        self.app = app
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.throttle_probability = throttle_probability
+        self.throttle_rate = throttle_rate
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.app_lock = threading.Lock()
+        self.throttled = 0
+
+    def _over_rate(self, path):
+        segments = path.lstrip("/").split("/", 2)
+        partition = "/".join(segments[:2]) if len(segments) > 2 else segments[0]
+        second = int(time.monotonic())
+        with self.lock:
+            window_second, count = self.windows.get(partition, (second, 0))
+            if window_second != second:
+                count = 0
+            self.windows[partition] = (second, count + 1)
+            return count >= self.throttle_rate
+
+    def __call__(self, environ, start_response):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        throttled = (self.throttle_probability and random.random() < self.throttle_probability) or \
+            (self.throttle_rate and self._over_rate(environ.get("PATH_INFO", "")))
+        if throttled:
+            with self.lock:
+                self.throttled += 1
+            start_response("503 Slow Down", [("Content-Type", "application/xml"), ("Content-Length", str(len(SLOW_DOWN_BODY)))])
+            return [SLOW_DOWN_BODY]
+        with self.app_lock:
+            return list(self.app(environ, start_response))
+
+class LocalS3:
+    """In-process moto S3 server behind a FaultInjector, plus direct (uncounted) seeding through moto's backend."""
+
+    def __init__(self, **faults):
+        self.faults = faults
+        self.server = None
+        self.injector = None
+
+    def __enter__(self):
+        from werkzeug.serving import make_server
+        from moto.server import DomainDispatcherApplication, create_backend_app
+
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self.injector = FaultInjector(DomainDispatcherApplication(create_backend_app), **self.faults)
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        self.server = make_server("127.0.0.1", port, self.injector, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.endpoint_url = f"http://127.0.0.1:{port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+
+    @property
+    def backend(self):
+        from moto.core import DEFAULT_ACCOUNT_ID
+        from moto.s3.models import s3_backends
+        return s3_backends[DEFAULT_ACCOUNT_ID]["global"]
+
+    def create_bucket(self, bucket_name):
+        self.backend.create_bucket(bucket_name, REGION)
+
+    def seed_objects(self, bucket_name, count, object_size):
+        """Writes `count` objects straight into moto's store, spread over 10 top-level prefixes."""
+        self.create_bucket(bucket_name)
+        body = b"x" * object_size
+        for i in range(count):
+            self.backend.put_object(bucket_name, f"p{i % 10}/{i:08d}.dat", body)
+
+    def drop_bucket(self, bucket_name):
+        self.backend.buckets.pop(bucket_name, None)
+
+class RemoteS3:
+    """An already-running S3-compatible endpoint (e.g. MinIO); seeding goes through the API. No fault injection."""
+
+    def __init__(self, endpoint_url, workers=64):
+        self.endpoint_url = endpoint_url
+        self.workers = workers
+        self.injector = None
+
+    def __enter__(self):
+        import boto3
+        self.client = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=REGION)
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def create_bucket(self, bucket_name):
+        try:
+            self.client.create_bucket(Bucket=bucket_name)
+        except self.client.exceptions.BucketAlreadyOwnedByYou:
+            pass
+
+    def seed_objects(self, bucket_name, count, object_size):
+        self.create_bucket(bucket_name)
+        body = b"x" * object_size
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(lambda i: self.client.put_object(Bucket=bucket_name, Key=f"p{i % 10}/{i:08d}.dat", Body=body),
+                              range(count)))
+
+    def drop_bucket(self, bucket_name):
+        from empty_bucket import purge_bucket
+        purge_bucket(bucket_name, s3=self.client)
+        self.client.delete_bucket(Bucket=bucket_name)
+
+# ================= Measurement =================
+class CallRecorder:
+    """Times every S3 API call (retries included) through botocore's before-call/after-call events."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def install(self):
+        # Handlers registered on the shared session are copied into every client created from it
+        from s3_client import _session
+        events = _session(None).events
+        events.register("before-call.s3", self._before)
+        events.register("after-call.s3", self._after)
+        events.register("after-call-error.s3", self._after_error)
+
+    def _before(self, context, **kwargs):
+        context["benchmark_start"] = time.perf_counter()
+
+    def _after(self, context, http_response=None, **kwargs):
+        start = context.get("benchmark_start")
+        if start is not None:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - start)
+                self.errors += http_response is not None and http_response.status_code >= 400
+
+    def _after_error(self, context, **kwargs):
+        with self.lock:
+            self.errors += 1
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def peak_rss_mb():
+    """Returns this process's peak RSS in MB."""
+    try:
+        # VmHWM belongs to this process image; ru_maxrss would include the parent's RSS at fork time
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+
+# ================= Scenarios =================
+def run_list(ctx):
+    from list_s3_contents import list_objects
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        list_objects(ctx["bucket"], workers=ctx["workers"] if ctx["parallel_list"] else None)
+    return ctx["count"]
+
+def run_upload(ctx):
+    from upload_files import upload_path
+    summary = upload_path(ctx["local_dir"], ctx["bucket"], workers=ctx["workers"], skip_unchanged=False, dedupe=False)
+    return summary["files"]
+
+def run_create(ctx):
+    from create_s3_bucket import provision_buckets
+    specs = [{"name": name, "region": REGION, "settings": {}} for name in ctx["buckets"]]
+    results = provision_buckets(specs, ctx["workers"])
+    return sum(1 for r in results if r["status"] == "created")
+
+def run_settings(ctx):
+    sys.path.insert(0, os.path.join(SCRIPTS_DIR, "bucket_setting"))
+    import Properties_setting
+    import Permissions_setting
+    import Managment_setting
+
+    steps = [
+        Properties_setting.enable_versioning,
+        Properties_setting.enable_encryption,
+        Permissions_setting.block_public_access,
+        Managment_setting.apply_lifecycle_policy,
+    ]
+    with ThreadPoolExecutor(max_workers=ctx["workers"]) as executor:
+        list(executor.map(lambda name: [step(name) for step in steps], ctx["buckets"]))
+    return len(ctx["buckets"]) * len(steps)
+
+def run_empty(ctx):
+    from empty_bucket import purge_bucket
+    return purge_bucket(ctx["bucket"], workers=ctx["workers"])["deleted"]
+
+def run_compress(ctx):
+    from compression import StreamCompressor
+    from upload_files import upload_path
+    compressor = None
+    if ctx["codec"] != "none":
+        compressor = StreamCompressor(ctx["codec"], ctx["compression_level"], ctx["compression_threads"])
+    summary = upload_path(ctx["local_dir"], ctx["bucket"], workers=ctx["workers"], skip_unchanged=False, dedupe=False,
+                          compressor=compressor)
+    stats = summary.get("compression") or {"bytes_in": summary["bytes"], "bytes_out": summary["bytes"], "cpu_seconds": 0.0}
+    return summary["files"], {
+        "codec": ctx["codec"], "bytes_in": stats["bytes_in"], "bytes_out": stats["bytes_out"],
+        "compression_cpu_seconds": stats["cpu_seconds"], "cpu_seconds_per_gb_saved": stats.get("cpu_seconds_per_gb_saved"),
+    }
+
+SCENARIO_RUNNERS = {"list": run_list, "upload": run_upload, "create": run_create, "settings": run_settings,
+                    "empty": run_empty, "compress": run_compress}
+
+def scenario_process(scenario, ctx, results):
+    """Runs one scenario in a fresh process so its peak RSS is its own."""
+    os.environ.update(ctx["env"])
+    logging.getLogger().setLevel(logging.WARNING)  # Per-object log lines would dominate the timings
+    recorder = CallRecorder()
+    recorder.install()
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    items, extra = SCENARIO_RUNNERS[scenario](ctx), {}
+    if isinstance(items, tuple):
+        items, extra = items
+    seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+
+    latencies = sorted(recorder.latencies)
+    p50, p99 = percentile(latencies, 0.50), percentile(latencies, 0.99)
+    results.put({
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_s": round(items / max(seconds, 1e-9), 1),
+        "api_calls": len(latencies),
+        "api_errors": recorder.errors,
+        "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+        "cpu_seconds": round(cpu_seconds, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **extra,
+    })
+
+def write_log_files(local_dir, count, file_size):
+    """Writes `count` files of roughly `file_size` bytes of application-log-like text."""
+    levels, components = ["INFO"] * 8 + ["WARN", "ERROR"], ["api", "auth", "billing", "search", "worker"]
+    statuses, resources = [200] * 12 + [201, 204, 304, 400, 404, 429, 500, 503], ["users", "orders", "items", "carts"]
+    os.makedirs(local_dir, exist_ok=True)
+    for i in range(count):
+        rng = random.Random(i)
+        lines, written, ts = [], 0, 1_700_000_000 + i * 86_400
+        while written < file_size:
+            ts += rng.random()
+            stamp = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+            line = (f"{stamp}Z {rng.choice(levels)} [{rng.choice(components)}] request_id={rng.getrandbits(64):016x} "
+                    f"method=GET path=/api/v1/{rng.choice(resources)}/{rng.randrange(100000)} "
+                    f"status={rng.choice(statuses)} latency_ms={rng.expovariate(0.05):.1f}\n")
+            lines.append(line)
+            written += len(line)
+        with open(os.path.join(local_dir, f"app-{i:05d}.log"), "w") as f:
+            f.writelines(lines)
+    return local_dir
+
+def prepare(stand_in, scenario, size, object_size, tmp_root, compress=None):
+    """Builds the untimed fixture for a scenario and returns (context, cleanup)."""
+    bucket = f"bench-{scenario}-{size}"
+    ctx = {"count": size, "bucket": bucket, **(compress or {})}
+    cleanup = [lambda: stand_in.drop_bucket(bucket)]
+
+    if scenario in ("list", "empty"):
+        stand_in.seed_objects(bucket, size, object_size)
+    elif scenario == "compress":
+        stand_in.create_bucket(bucket)
+        ctx["local_dir"] = write_log_files(os.path.join(tmp_root, bucket), size, ctx["compress_file_size"])
+        cleanup.append(lambda: shutil.rmtree(ctx["local_dir"], ignore_errors=True))
+    elif scenario == "upload":
+        stand_in.create_bucket(bucket)
+        local_dir = os.path.join(tmp_root, bucket)
+        body = b"x" * object_size
+        for i in range(size):
+            directory = os.path.join(local_dir, f"p{i % 10}")
+            if i < 10:
+                os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"{i:08d}.dat"), "wb") as f:
+                f.write(body)
+        ctx["local_dir"] = local_dir
+        cleanup.append(lambda: shutil.rmtree(local_dir, ignore_errors=True))
+    else:
+        ctx["buckets"] = [f"bench-{scenario}-{size}-{i}" for i in range(size)]
+        if scenario == "settings":
+            for name in ctx["buckets"]:
+                stand_in.create_bucket(name)
+        cleanup = [lambda: [stand_in.drop_bucket(name) for name in ctx["buckets"]]]
+    return ctx, cleanup
+
+def run_benchmarks(scenarios, object_counts, bucket_counts, workers=16, object_size=1024, parallel_list=False,
+                   endpoint_url=None, compress=None, **faults):
+    """Runs every scenario at every size and returns the result records.
+
+    `compress` configures the compress scenario: codecs, counts, file_size,
+    level and threads. Each codec runs as its own record over the same files.
+    """
+    compress = {"codecs": CODECS, "counts": DEFAULT_COMPRESS_COUNTS, "file_size": 2 * 1024 * 1024,
+                "level": None, "threads": None, **(compress or {})}
+    stand_in = RemoteS3(endpoint_url) if endpoint_url else LocalS3(**faults)
+    records = []
+    spawn = multiprocessing.get_context("spawn")
+
+    with stand_in, tempfile.TemporaryDirectory(prefix="s3-bench-") as tmp_root:
+        env = {
+            "AWS_ENDPOINT_URL": stand_in.endpoint_url,
+            "AWS_ACCESS_KEY_ID": os.environ.get("AWS_ACCESS_KEY_ID", "benchmark"),
+            "AWS_SECRET_ACCESS_KEY": os.environ.get("AWS_SECRET_ACCESS_KEY", "benchmark"),
+            "AWS_REGION": REGION,
+            # Keep the benchmark's buckets out of the user's caches
+            "S3_BUCKET_REGION_CACHE": os.path.join(tmp_root, "regions.json"),
+        }
+        for scenario in scenarios:
+            if scenario in BUCKET_SCENARIOS:
+                sizes = bucket_counts
+            else:
+                sizes = compress["counts"] if scenario == "compress" else object_counts
+            for size in sizes:
+                logging.info(f"⏳ {scenario} × {size:,}: preparing...")
+                ctx, cleanup = prepare(stand_in, scenario, size, object_size, tmp_root, {
+                    "compress_file_size": compress["file_size"], "compression_level": compress["level"],
+                    "compression_threads": compress["threads"],
+                })
+                ctx.update(env=env, workers=workers, parallel_list=parallel_list)
+                try:
+                    for codec in (compress["codecs"] if scenario == "compress" else [None]):
+                        ctx["codec"] = codec
+                        records.append(run_scenario(stand_in, spawn, scenario, size, ctx))
+                finally:
+                    for step in cleanup:
+                        step()
+    return records
+
+def run_scenario(stand_in, spawn, scenario, size, ctx):
+    """Runs one prepared scenario in a child process and returns its record."""
+    throttled_before = stand_in.injector.throttled if stand_in.injector else 0
+    results = spawn.Queue()
+    process = spawn.Process(target=scenario_process, args=(scenario, ctx, results))
+    process.start()
+    record = {"scenario": scenario, "size": size}
+    try:
+        record.update(results.get())
+    finally:
+        process.join()
+    if stand_in.injector:
+        record["throttled"] = stand_in.injector.throttled - throttled_before
+
+    label = f"{scenario}[{ctx['codec']}]" if ctx.get("codec") else scenario
+    logging.info(
+        f"📊 {label} × {size:,}: {record['items_per_s']:,.0f} items/s | p50 {record['p50_ms']} ms | "
+        f"p99 {record['p99_ms']} ms | CPU {record['cpu_seconds']} s | peak RSS {record['peak_rss_mb']} MB"
+    )
+    if "bytes_out" in record:
+        saved = record["bytes_in"] - record["bytes_out"]
+        per_gb = record["cpu_seconds_per_gb_saved"]
+        logging.info(
+            f"🗜 {label} × {size:,}: {record['bytes_in'] / 1024 ** 2:,.1f} MB → {record['bytes_out'] / 1024 ** 2:,.1f} MB "
+            f"({saved / 1024 ** 2:,.1f} MB saved) | compression CPU {record['compression_cpu_seconds']} s"
+            + (f" | {per_gb} CPU s per GB saved" if per_gb is not None else "")
+        )
+    return record
+
+# ================= Reports =================
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline_path, current_path, tolerance=0.10):
+    """Prints per-scenario changes between two result files; returns the regressions beyond `tolerance`."""
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["size"], r.get("codec")): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n{'scenario':<15} {'size':>9} {'items/s':>18} {'p99 ms':>18} {'CPU s':>18} {'peak RSS MB':>18}")
+    for record in current:
+        old = baseline.get((record["scenario"], record["size"], record.get("codec")))
+        if old is None:
+            continue
+
+        def change(metric, higher_is_better):
+            if not old.get(metric) or record.get(metric) is None:
+                return "n/a", False
+            delta = (record[metric] - old[metric]) / old[metric]
+            worse = -delta > tolerance if higher_is_better else delta > tolerance
+            return f"{record[metric]:,.1f} ({delta:+.0%}){' ⚠' if worse else ''}", worse
+
+        cells = [change("items_per_s", True), change("p99_ms", False), change("cpu_seconds", False),
+                 change("peak_rss_mb", False)]
+        label = f"{record['scenario']}[{record['codec']}]" if record.get("codec") else record["scenario"]
+        print(f"{label:<15} {record['size']:>9,} " + " ".join(f"{text:>18}" for text, _ in cells))
+        if any(worse for _, worse in cells):
+            regressions.append(record)
+    return regressions
+
+def parse_sizes(value):
+    return [int(float(size.lower().replace("k", "e3").replace("m", "e6"))) for size in value.split(",")]
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the S3 scripts against a local S3 stand-in.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_OBJECT_COUNTS, help="Object counts, e.g. 1k,100k,1m")
+    parser.add_argument("--bucket-counts", type=parse_sizes, default=DEFAULT_BUCKET_COUNTS, help="Bucket counts for create/settings")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--object-size", type=int, default=1024, help="Bytes per object")
+    parser.add_argument("--parallel-list", action="store_true", help="Benchmark the sharded parallel listing")
+    parser.add_argument("--codecs", default=",".join(CODECS), help=f"Comma-separated subset of {','.join(CODECS)} for compress")
+    parser.add_argument("--compress-counts", type=parse_sizes, default=DEFAULT_COMPRESS_COUNTS, help="File counts for compress")
+    parser.add_argument("--compress-file-size-mb", type=float, default=2.0, help="Megabytes of log text per compress file")
+    parser.add_argument("--compression-level", type=int, help="Codec level for compress (default: the codec's default)")
+    parser.add_argument("--compression-threads", type=int, help="Compression threads for compress (default: CPU count)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency (0..jitter)")
+    parser.add_argument("--throttle-probability", type=float, default=0.0, help="Fraction of requests answered with SlowDown")
+    parser.add_argument("--throttle-rate", type=float, help="Requests/s per prefix above which requests get SlowDown")
+    parser.add_argument("--endpoint-url", help="Use a running S3-compatible server (e.g. MinIO) instead of moto")
+    parser.add_argument("--output", help="Result file (default: benchmark-<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare the new results against an earlier result file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative change reported as a regression")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to run the benchmarks."""
+    args = parse_args(argv)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        logging.error(f"❌ Unknown scenarios: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    codecs = [c for c in args.codecs.split(",") if c]
+    unknown = set(codecs) - set(CODECS)
+    if unknown:
+        logging.error(f"❌ Unknown codecs: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    compress = dict(codecs=codecs, counts=args.compress_counts, file_size=int(args.compress_file_size_mb * 1024 * 1024),
+                    level=args.compression_level, threads=args.compression_threads)
+
+    faults = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                  throttle_probability=args.throttle_probability, throttle_rate=args.throttle_rate)
+    records = run_benchmarks(scenarios, args.sizes, args.bucket_counts, args.workers, args.object_size,
+                             args.parallel_list, args.endpoint_url, compress, **faults)
+
+    commit = git_commit()
+    output = args.output or f"benchmark-{commit or 'local'}.json"
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "config": {"workers": args.workers, "object_size": args.object_size, "parallel_list": args.parallel_list,
+                       "endpoint_url": args.endpoint_url, "compress": compress, **faults},
+            "results": records,
+        }, f, indent=2)
+    logging.info(f"💾 Wrote {len(records)} results to '{output}'.")
+
+    if args.compare and compare(args.compare, output, args.tolerance):
+        logging.error(f"❌ Regressions beyond {args.tolerance:.0%} against '{args.compare}'.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#✔ Region Resolution: Finds each bucket's region with head_bucket (falling back to get_bucket_location).
+#✔ Persistent Cache: Remembers bucket regions on disk with a TTL, so later runs skip the lookup entirely.
+#✔ Automatic Routing: Sends every bucket operation straight to a client in the bucket's region (no 301 round-trips).
+
+import os
+import json
+import time
+import logging
+import threading
+from botocore.exceptions import ClientError
+
+from s3_client import REGION, get_s3_client
+
+DEFAULT_REGION_CACHE = os.environ.get("S3_BUCKET_REGION_CACHE", os.path.expanduser("~/.s3_bucket_regions.json"))
+REGION_CACHE_TTL = float(os.environ.get("S3_BUCKET_REGION_TTL", str(7 * 24 * 3600)))
+
+# Error codes that mean a request reached the wrong region
+REDIRECT_CODES = {"PermanentRedirect", "301", "AuthorizationHeaderMalformed", "IllegalLocationConstraintException"}
+
+# Operations that are not bucket-scoped, or that must not be routed by bucket
+UNROUTED_OPERATIONS = {"create_bucket", "list_buckets", "get_bucket_location"}
+
+# Managed-transfer methods that take the bucket positionally
+BUCKET_ARG_POSITIONS = {"upload_file": 1, "upload_fileobj": 1, "download_file": 0, "download_fileobj": 0, "copy": 1}
+
+class BucketRegionCache:
+    """Bucket → region map backed by a JSON file, with per-entry TTL."""
+
+    def __init__(self, path=DEFAULT_REGION_CACHE, ttl=REGION_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.bucket_locks = {}
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"⚠ Could not persist bucket region cache: {e}")
+
+    def get(self, bucket_name):
+        entry = self.entries.get(bucket_name)
+        if entry and time.time() - entry["resolved_at"] < self.ttl:
+            return entry["region"]
+        return None
+
+    def set(self, bucket_name, region):
+        with self.lock:
+            self.entries[bucket_name] = {"region": region, "resolved_at": time.time()}
+            self._save()
+
+    def invalidate(self, bucket_name):
+        with self.lock:
+            if self.entries.pop(bucket_name, None):
+                self._save()
+
+    def bucket_lock(self, bucket_name):
+        """Returns a lock per bucket, so concurrent callers resolve a bucket only once."""
+        with self.lock:
+            return self.bucket_locks.setdefault(bucket_name, threading.Lock())
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def region_cache():
+    """Returns the process-wide bucket region cache, loading it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BucketRegionCache()
+        return _cache
+
+def lookup_bucket_region(bucket_name, profile_name=None):
+    """Asks S3 for a bucket's region: the x-amz-bucket-region header, or get_bucket_location."""
+    s3 = get_s3_client(REGION, profile_name)
+    try:
+        response = s3.head_bucket(Bucket=bucket_name)
+        headers = response["ResponseMetadata"]["HTTPHeaders"]
+    except ClientError as e:
+        # Redirects and 403s still say where the bucket lives
+        headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        if "x-amz-bucket-region" not in headers and e.response["Error"].get("Code") in ("404", "NoSuchBucket"):
+            return None
+
+    if "x-amz-bucket-region" in headers:
+        return headers["x-amz-bucket-region"]
+
+    try:
+        location = s3.get_bucket_location(Bucket=bucket_name).get("LocationConstraint")
+    except ClientError:
+        return None
+    # Legacy location constraints: None means us-east-1 and "EU" means eu-west-1
+    return {None: "us-east-1", "": "us-east-1", "EU": "eu-west-1"}.get(location, location)
+
+def resolve_bucket_region(bucket_name, profile_name=None):
+    """Returns a bucket's region from the cache, looking it up (once) on a miss."""
+    cache = region_cache()
+    region = cache.get(bucket_name)
+    if region:
+        return region
+
+    with cache.bucket_lock(bucket_name):
+        region = cache.get(bucket_name)
+        if region:
+            return region
+        region = lookup_bucket_region(bucket_name, profile_name)
+        if region is None:
+            return REGION  # Unknown or missing bucket: let the call itself report the error
+        cache.set(bucket_name, region)
+        return region
+
+def client_for_bucket(bucket_name, profile_name=None, **client_kwargs):
+    """Returns the shared client for the region a bucket lives in."""
+    return get_s3_client(resolve_bucket_region(bucket_name, profile_name), profile_name, **client_kwargs)
+
+# ================= Routing Client =================
+class _RoutedPaginator:
+    """Paginator that picks the bucket's regional client when paginate() is called."""
+
+    def __init__(self, router, operation_name):
+        self.router = router
+        self.operation_name = operation_name
+
+    def paginate(self, **kwargs):
+        client = self.router.client_for(kwargs.get("Bucket"))
+        return client.get_paginator(self.operation_name).paginate(**kwargs)
+
+class RegionRoutingClient:
+    """Drop-in S3 client that routes each bucket operation to a client in the bucket's region.
+
+    If a call still lands in the wrong region (a stale cache entry), the entry is
+    invalidated, the region re-resolved, and the call retried once.
+    """
+
+    def __init__(self, profile_name=None, **client_kwargs):
+        self.profile_name = profile_name
+        self.client_kwargs = client_kwargs
+
+    def client_for(self, bucket_name=None):
+        """Returns the regional client for a bucket, or the default client for bucket-less calls."""
+        if not bucket_name:
+            return get_s3_client(REGION, self.profile_name, **self.client_kwargs)
+        return client_for_bucket(bucket_name, self.profile_name, **self.client_kwargs)
+
+    def get_paginator(self, operation_name):
+        return _RoutedPaginator(self, operation_name)
+
+    def __getattr__(self, name):
+        default_client = self.client_for(None)
+        if name in UNROUTED_OPERATIONS or not callable(getattr(default_client, name)):
+            return getattr(default_client, name)
+
+        def routed(*args, **kwargs):
+            bucket_name = kwargs.get("Bucket")
+            if bucket_name is None and name in BUCKET_ARG_POSITIONS and len(args) > BUCKET_ARG_POSITIONS[name]:
+                bucket_name = args[BUCKET_ARG_POSITIONS[name]]
+            try:
+                return getattr(self.client_for(bucket_name), name)(*args, **kwargs)
+            except ClientError as e:
+                if not bucket_name or e.response["Error"].get("Code") not in REDIRECT_CODES:
+                    raise
+                logging.info(f"🔀 Bucket '{bucket_name}' moved region; refreshing the cached region.")
+                region_cache().invalidate(bucket_name)
+                return getattr(self.client_for(bucket_name), name)(*args, **kwargs)
+
+        return routed
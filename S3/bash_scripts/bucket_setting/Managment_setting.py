@@ -1,16 +1,18 @@
-import boto3
-import logging
+import os
 import sys
+import logging
 from botocore.exceptions import ClientError
 
+# Shared client factory lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# AWS Region
-REGION = "eu-west-2"
-
-# Initialize AWS S3 client
-s3 = boto3.client("s3", region_name=REGION)
+# Shared AWS S3 client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def bucket_exists(bucket_name):
     """Check if an S3 bucket exists."""
@@ -33,39 +35,36 @@ def enable_versioning(bucket_name):
         logging.error(f"❌ Failed to enable versioning: {e}")
 
 # ================= Lifecycle Configuration =================
+# Transition to cheaper storage after 30/90 days and expire after 1 year
+LIFECYCLE_RULES = [
+    {
+        "ID": "TransitionToGlacier",
+        "Filter": {"Prefix": ""},  # Applies to all objects
+        "Status": "Enabled",
+        "Transitions": [
+            {"Days": 30, "StorageClass": "STANDARD_IA"},
+            {"Days": 90, "StorageClass": "GLACIER"}
+        ],
+        "Expiration": {"Days": 365},  # Deletes objects after 1 year
+        "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 7}  # Stops abandoned parts from accruing charges
+    }
+]
+
 def apply_lifecycle_policy(bucket_name):
     """Apply a lifecycle policy to optimize storage costs."""
-    lifecycle_policy = {
-        "Rules": [
-            {
-                "ID": "TransitionToGlacier",
-                "Filter": {"Prefix": ""},  # Applies to all objects
-                "Status": "Enabled",
-                "Transitions": [
-                    {"Days": 30, "StorageClass": "STANDARD_IA"},
-                    {"Days": 90, "StorageClass": "GLACIER"}
-                ],
-                "Expiration": {"Days": 365}  # Deletes objects after 1 year
-            }
-        ]
-    }
-    
     try:
         s3.put_bucket_lifecycle_configuration(
             Bucket=bucket_name,
-            LifecycleConfiguration={"Rules": lifecycle_policy["Rules"]}
+            LifecycleConfiguration={"Rules": LIFECYCLE_RULES}
         )
         logging.info(f"🔄 Applied Lifecycle Policy to bucket '{bucket_name}'.")
     except ClientError as e:
         logging.error(f"❌ Failed to apply lifecycle policy: {e}")
 
 # ================= Replication Rules =================
-def apply_replication_rules(bucket_name, destination_bucket):
-    """Apply replication rules to replicate data to another bucket."""
-    enable_versioning(bucket_name)
-    enable_versioning(destination_bucket)
-    
-    replication_config = {
+def replication_configuration(destination_bucket):
+    """Returns a replication configuration that copies every new object to `destination_bucket`."""
+    return {
         "Role": "arn:aws:iam::YOUR_ACCOUNT_ID:role/s3-replication-role",  # Replace with your IAM Role
         "Rules": [
             {
@@ -81,6 +80,13 @@ def apply_replication_rules(bucket_name, destination_bucket):
             }
         ]
     }
+
+def apply_replication_rules(bucket_name, destination_bucket):
+    """Apply replication rules to replicate data to another bucket."""
+    enable_versioning(bucket_name)
+    enable_versioning(destination_bucket)
+    
+    replication_config = replication_configuration(destination_bucket)
     
     try:
         s3.put_bucket_replication_configuration(
@@ -92,12 +98,16 @@ def apply_replication_rules(bucket_name, destination_bucket):
         logging.error(f"❌ Failed to apply replication rule: {e}")
 
 # ================= Inventory Configuration =================
-def apply_inventory_configuration(bucket_name):
-    """Apply inventory configuration to track stored objects."""
-    inventory_config = {
+def inventory_configuration(bucket_name):
+    """Returns the daily CSV inventory configuration, delivered to the bucket itself.
+
+    The optional fields are the ones inventory_reader.py needs to stand in for a live listing.
+    """
+    return {
         "Id": "InventoryConfig",
         "IsEnabled": True,
         "IncludedObjectVersions": "All",
+        "OptionalFields": ["Size", "LastModifiedDate", "ETag", "StorageClass"],
         "Schedule": {"Frequency": "Daily"},
         "Destination": {
             "S3BucketDestination": {
@@ -106,6 +116,10 @@ def apply_inventory_configuration(bucket_name):
             }
         }
     }
+
+def apply_inventory_configuration(bucket_name):
+    """Apply inventory configuration to track stored objects."""
+    inventory_config = inventory_configuration(bucket_name)
     
     try:
         s3.put_bucket_inventory_configuration(
@@ -141,4 +155,5 @@ def main():
     logging.info("✅ S3 Management Configuration completed.")
 
 if __name__ == "__main__":
-    main()
+    with profiled():
+        main()
@@ -4,19 +4,21 @@
 #✅ Generates Analytics Reports – Exports CSV data to the destination bucket for analysis.
 #✅ Helps Identify Storage Optimization Opportunities – Suggests which objects can be moved to cheaper storage classes (like Glacier, Intelligent-Tiering, etc.).
 
-import boto3
-import logging
+import os
 import sys
+import logging
 from botocore.exceptions import ClientError
 
+# Shared client factory lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# AWS Region
-REGION = "eu-west-2"
-
-# Initialize AWS S3 client
-s3 = boto3.client("s3", region_name=REGION)
+# Shared AWS S3 client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def bucket_exists(bucket_name):
     """Check if an S3 bucket exists."""
@@ -27,8 +29,8 @@ def bucket_exists(bucket_name):
         logging.error(f"❌ Bucket '{bucket_name}' does not exist or access denied.")
         return False
 
-def enable_storage_class_analysis(bucket_name, destination_bucket, config_id="AnalysisConfig", prefix=None):
-    """Enable Storage Class Analysis on the given S3 bucket with a valid destination bucket."""
+def analytics_configuration(destination_bucket, config_id="AnalysisConfig", prefix=None):
+    """Returns a Storage Class Analysis configuration exporting CSV data to `destination_bucket`."""
     analysis_config = {
         "Id": config_id,
         "StorageClassAnalysis": {
@@ -46,7 +48,13 @@ def enable_storage_class_analysis(bucket_name, destination_bucket, config_id="An
     }
     
     if prefix:
-        analysis_config["Prefix"] = prefix
+        analysis_config["Filter"] = {"Prefix": prefix}
+
+    return analysis_config
+
+def enable_storage_class_analysis(bucket_name, destination_bucket, config_id="AnalysisConfig", prefix=None):
+    """Enable Storage Class Analysis on the given S3 bucket with a valid destination bucket."""
+    analysis_config = analytics_configuration(destination_bucket, config_id, prefix)
     
     try:
         s3.put_bucket_analytics_configuration(
@@ -79,4 +87,5 @@ def main():
     logging.info("✅ Storage Class Analysis configuration completed.")
 
 if __name__ == "__main__":
-    main()
+    with profiled():
+        main()
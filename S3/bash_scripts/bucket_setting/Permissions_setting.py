@@ -4,20 +4,22 @@
 #ACL (Access Control List) → Sets bucket ACL to private.
 #CORS (Cross-Origin Resource Sharing) → Configures access from other domains.
 
-import boto3
+import os
 import sys
 import logging
 import json
 from botocore.exceptions import ClientError
 
+# Shared client factory lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# AWS Region
-REGION = "eu-west-2"
-
-# Initialize AWS Client
-s3 = boto3.client("s3", region_name=REGION)
+# Shared AWS Client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def bucket_exists(bucket_name):
     """Check if an S3 bucket exists."""
@@ -32,25 +34,37 @@ def bucket_exists(bucket_name):
             logging.error(f"❌ AWS Error: {e}")
         return False
 
+# Block every form of public access
+PUBLIC_ACCESS_BLOCK_CONFIGURATION = {
+    "BlockPublicAcls": True,
+    "IgnorePublicAcls": True,
+    "BlockPublicPolicy": True,
+    "RestrictPublicBuckets": True
+}
+
+# Allow GET requests from any origin
+CORS_CONFIGURATION = {
+    "CORSRules": [{
+        "AllowedHeaders": ["*"],
+        "AllowedMethods": ["GET"],
+        "AllowedOrigins": ["*"]
+    }]
+}
+
 def block_public_access(bucket_name):
     """Blocks all public access to the bucket."""
     try:
         s3.put_public_access_block(
             Bucket=bucket_name,
-            PublicAccessBlockConfiguration={
-                "BlockPublicAcls": True,
-                "IgnorePublicAcls": True,
-                "BlockPublicPolicy": True,
-                "RestrictPublicBuckets": True
-            }
+            PublicAccessBlockConfiguration=PUBLIC_ACCESS_BLOCK_CONFIGURATION
         )
         logging.info(f"🚫 Blocked public access for bucket '{bucket_name}'.")
     except ClientError as e:
         logging.error(f"❌ Failed to block public access: {e}")
 
-def set_bucket_policy(bucket_name):
-    """Applies a sample security-focused bucket policy."""
-    policy = {
+def secure_transport_policy(bucket_name):
+    """Returns a bucket policy that denies any request not made over HTTPS."""
+    return {
         "Version": "2012-10-17",
         "Statement": [{
             "Effect": "Deny",
@@ -65,6 +79,10 @@ def set_bucket_policy(bucket_name):
             }
         }]
     }
+
+def set_bucket_policy(bucket_name):
+    """Applies a sample security-focused bucket policy."""
+    policy = secure_transport_policy(bucket_name)
     try:
         s3.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
         logging.info(f"🔒 Applied bucket policy to '{bucket_name}'.")
@@ -94,15 +112,8 @@ def set_acl(bucket_name):
 
 def configure_cors(bucket_name):
     """Configures CORS for cross-origin access."""
-    cors_configuration = {
-        "CORSRules": [{
-            "AllowedHeaders": ["*"],
-            "AllowedMethods": ["GET"],
-            "AllowedOrigins": ["*"]
-        }]
-    }
     try:
-        s3.put_bucket_cors(Bucket=bucket_name, CORSConfiguration=cors_configuration)
+        s3.put_bucket_cors(Bucket=bucket_name, CORSConfiguration=CORS_CONFIGURATION)
         logging.info(f"🌍 Configured CORS for bucket '{bucket_name}'.")
     except ClientError as e:
         logging.error(f"❌ Failed to configure CORS: {e}")
@@ -132,4 +143,5 @@ def main():
     logging.info("✅ Selected bucket permission settings have been applied.")
 
 if __name__ == "__main__":
-    main()
+    with profiled():
+        main()
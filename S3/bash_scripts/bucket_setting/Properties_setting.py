@@ -1,17 +1,19 @@
-import boto3
+import os
 import sys
 import logging
 import json
 from botocore.exceptions import ClientError
 
+# Shared client factory lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# AWS Region
-REGION = "eu-west-2"
-
-# Initialize AWS Client
-s3 = boto3.client("s3", region_name=REGION)
+# Shared AWS Client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def bucket_exists(bucket_name):
     """Check if an S3 bucket exists."""
@@ -38,19 +40,21 @@ def enable_versioning(bucket_name):
         logging.error(f"❌ Failed to enable versioning: {e}")
 
 
+# Default AES-256 server-side encryption
+ENCRYPTION_CONFIGURATION = {
+    "Rules": [{
+        "ApplyServerSideEncryptionByDefault": {
+            "SSEAlgorithm": "AES256"
+        }
+    }]
+}
+
 def enable_encryption(bucket_name):
     """Enables AES-256 server-side encryption on the bucket."""
-    encryption_config = {
-        "Rules": [{
-            "ApplyServerSideEncryptionByDefault": {
-                "SSEAlgorithm": "AES256"
-            }
-        }]
-    }
     try:
         s3.put_bucket_encryption(
             Bucket=bucket_name,
-            ServerSideEncryptionConfiguration=encryption_config
+            ServerSideEncryptionConfiguration=ENCRYPTION_CONFIGURATION
         )
         logging.info(f"🔒 Enabled AES-256 encryption on bucket '{bucket_name}'.")
     except ClientError as e:
@@ -125,4 +129,5 @@ def main():
     logging.info("✅ Selected bucket settings have been applied.")
 
 if __name__ == "__main__":
-    main()
+    with profiled():
+        main()
@@ -0,0 +1,187 @@
+#🔍 What This Script Does
+#✅ Fleet-Wide Audit – Reads versioning, encryption, public access, ownership, CORS, lifecycle, replication, inventory and analytics for every bucket.
+#✅ Parallel Fan-Out – Runs the get_* calls across buckets and settings on a bounded thread pool.
+#✅ Adaptive Throttling – Calls go through the shared rate controller, which backs off on throttling and ramps back up.
+#✅ Cached Snapshots – Writes results to Parquet/Arrow IPC (or compressed JSONL) so reports and diffs never call the API again.
+
+import os
+import sys
+import json
+import gzip
+import time
+import logging
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from reconcile_settings import SETTINGS, create_client
+
+# The bucket list comes from the listing script one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from list_s3_contents import list_s3_buckets
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Settings whose configurations are listed rather than fetched by Id
+AUDIT_GETTERS = {
+    "inventory": lambda s3, b: s3.list_bucket_inventory_configurations(Bucket=b).get("InventoryConfigurationList", []),
+    "analytics": lambda s3, b: s3.list_bucket_analytics_configurations(Bucket=b).get("AnalyticsConfigurationList", []),
+}
+
+DEFAULT_AUDIT_SETTINGS = [
+    "versioning", "encryption", "public_access_block", "ownership", "cors",
+    "lifecycle", "replication", "inventory", "analytics",
+]
+
+# ================= Audit =================
+def fetch_setting(s3, controller, bucket_name, setting):
+    """Fetches one setting for one bucket and returns a snapshot record."""
+    record = {"bucket": bucket_name, "setting": setting, "status": "ok", "value": None, "error": None}
+    if setting in AUDIT_GETTERS:
+        getter = lambda: AUDIT_GETTERS[setting](s3, bucket_name)
+    else:
+        getter = lambda: SETTINGS[setting]["get"](s3, bucket_name, None)
+
+    try:
+        # Bucket-level configuration calls share the bucket's root read budget
+        record["value"] = controller.call(bucket_name, "", "read", getter)
+        if record["value"] in (None, []):
+            record["status"] = "not-configured"
+    except ClientError as e:
+        record["status"] = "error"
+        record["error"] = e.response["Error"].get("Code", str(e))
+    except BotoCoreError as e:
+        # e.g. EndpointConnectionError or ReadTimeout; only this bucket's record fails, not the whole audit
+        record["status"] = "error"
+        record["error"] = type(e).__name__
+    return record
+
+def audit_buckets(bucket_names, settings=DEFAULT_AUDIT_SETTINGS, workers=32, s3=None):
+    """Fans the get_* calls out across buckets and settings and returns every record."""
+    s3 = s3 or create_client(workers)
+    controller = shared_controller()
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    tasks = [(bucket, setting) for bucket in bucket_names for setting in settings]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        records = list(executor.map(lambda t: fetch_setting(s3, controller, *t), tasks))
+
+    for record in records:
+        record["fetched_at"] = fetched_at
+    logging.info(f"🔎 Audited {len(bucket_names)} buckets × {len(settings)} settings.")
+    controller.log_snapshot()
+    return records
+
+# ================= Snapshots =================
+def write_snapshot(records, path):
+    """Writes audit records to Parquet (.parquet), Arrow IPC (.arrow) or gzipped JSONL (anything else)."""
+    rows = [{**r, "value": json.dumps(r["value"], sort_keys=True, default=str)} for r in records]
+
+    if path.endswith((".parquet", ".arrow")):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            path = os.path.splitext(path)[0] + ".jsonl.gz"
+            logging.warning(f"⚠ pyarrow is not installed; writing compressed JSONL to '{path}' instead.")
+        else:
+            table = pa.Table.from_pylist(rows)
+            if path.endswith(".parquet"):
+                import pyarrow.parquet as pq
+                pq.write_table(table, path, compression="zstd")
+            else:
+                with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            logging.info(f"💾 Wrote {len(rows)} records to '{path}'.")
+            return path
+
+    with gzip.open(path, "wt") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    logging.info(f"💾 Wrote {len(rows)} records to '{path}'.")
+    return path
+
+def load_snapshot(path):
+    """Loads audit records from a snapshot written by write_snapshot()."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        rows = pq.read_table(path).to_pylist()
+    elif path.endswith(".arrow"):
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            rows = pa.ipc.open_file(source).read_all().to_pylist()
+    else:
+        with gzip.open(path, "rt") as f:
+            rows = [json.loads(line) for line in f]
+
+    for row in rows:
+        row["value"] = json.loads(row["value"])
+    return rows
+
+def report(records):
+    """Prints, per setting, how many buckets have it configured, missing, or unreadable."""
+    summary = {}
+    for record in records:
+        counts = summary.setdefault(record["setting"], {"ok": 0, "not-configured": 0, "error": 0})
+        counts[record["status"]] += 1
+
+    print(f"\n{'Setting':<22}{'Configured':>12}{'Missing':>10}{'Errors':>9}")
+    for setting, counts in summary.items():
+        print(f"{setting:<22}{counts['ok']:>12}{counts['not-configured']:>10}{counts['error']:>9}")
+
+def diff_snapshots(old_records, new_records):
+    """Returns (bucket, setting, old, new) for every setting whose value changed between snapshots."""
+    old = {(r["bucket"], r["setting"]): r["value"] for r in old_records}
+    new = {(r["bucket"], r["setting"]): r["value"] for r in new_records}
+    changes = []
+    for key in sorted(old.keys() | new.keys()):
+        if old.get(key) != new.get(key):
+            changes.append((*key, old.get(key), new.get(key)))
+    return changes
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Audit S3 bucket settings across the account.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    audit = commands.add_parser("audit", help="Fetch settings for every bucket and write a snapshot")
+    audit.add_argument("--output", default="s3_audit.parquet", help="Snapshot path (.parquet, .arrow or .jsonl.gz)")
+    audit.add_argument("--workers", type=int, default=32, help="Maximum concurrent get_* calls")
+    audit.add_argument("--settings", nargs="+", default=DEFAULT_AUDIT_SETTINGS, help="Settings to audit")
+
+    summary = commands.add_parser("report", help="Summarize a snapshot")
+    summary.add_argument("snapshot")
+
+    diff = commands.add_parser("diff", help="Show settings that changed between two snapshots")
+    diff.add_argument("old_snapshot")
+    diff.add_argument("new_snapshot")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to audit bucket settings."""
+    args = parse_args(argv)
+
+    if args.command == "audit":
+        unknown = set(args.settings) - set(SETTINGS) - set(AUDIT_GETTERS)
+        if unknown:
+            logging.error(f"❌ Unknown settings: {', '.join(sorted(unknown))}")
+            sys.exit(1)
+        start = time.perf_counter()
+        records = audit_buckets(list_s3_buckets(), args.settings, args.workers)
+        write_snapshot(records, args.output)
+        report(records)
+        logging.info(f"⏱ Audit finished in {time.perf_counter() - start:.2f}s.")
+    elif args.command == "report":
+        report(load_snapshot(args.snapshot))
+    else:
+        changes = diff_snapshots(load_snapshot(args.old_snapshot), load_snapshot(args.new_snapshot))
+        for bucket, setting, old, new in changes:
+            print(f"~ {bucket}.{setting}: {old!r} → {new!r}")
+        logging.info(f"📋 {len(changes)} settings changed.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
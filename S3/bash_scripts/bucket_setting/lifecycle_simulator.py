@@ -0,0 +1,446 @@
+#🔍 What This Script Does
+#✅ Columnar Object Data – Loads object sizes, ages and storage classes (listing, inventory, object index or Storage Class Analysis CSV) into NumPy arrays.
+#✅ Rule-Set Comparison – Evaluates candidate lifecycle rule sets (the current policy, the Terraform module's rules, or your own) side by side.
+#✅ Monthly Projection – Shows the bytes in each storage class, transition requests and the resulting monthly cost.
+#✅ Vectorized – Every rule is applied to whole arrays at once, so 100M objects simulate in seconds.
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+from array import array
+
+import numpy as np
+
+from Managment_setting import LIFECYCLE_RULES
+
+# Object sources live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+KB = 1024
+GB = 1024 ** 3
+
+# Storage classes in lifecycle waterfall order: transitions only ever move objects to a later class
+STORAGE_CLASSES = ["STANDARD", "INTELLIGENT_TIERING", "STANDARD_IA", "ONEZONE_IA", "GLACIER_IR", "GLACIER", "DEEP_ARCHIVE"]
+CLASS_RANK = {storage_class: rank for rank, storage_class in enumerate(STORAGE_CLASSES)}
+
+# Since September 2024, objects under 128 KB are not transitioned unless a rule sets a size filter
+MIN_TRANSITION_SIZE = 128 * KB
+
+# Rule group codes use 2 bits per rule; one int64 word holds 31 rules without touching the sign bit
+RULES_PER_WORD = 31
+
+# us-east-1 list prices (USD); override with --prices to model another region or a negotiated rate
+PRICES = {
+    "STANDARD":            {"gb_month": 0.023,   "transition_per_1000": 0.0,  "min_days": 0,   "min_bytes": 0},
+    "INTELLIGENT_TIERING": {"gb_month": 0.023,   "transition_per_1000": 0.01, "min_days": 0,   "min_bytes": 0},
+    "STANDARD_IA":         {"gb_month": 0.0125,  "transition_per_1000": 0.01, "min_days": 30,  "min_bytes": 128 * KB},
+    "ONEZONE_IA":          {"gb_month": 0.01,    "transition_per_1000": 0.01, "min_days": 30,  "min_bytes": 128 * KB},
+    "GLACIER_IR":          {"gb_month": 0.004,   "transition_per_1000": 0.02, "min_days": 90,  "min_bytes": 128 * KB},
+    "GLACIER":             {"gb_month": 0.0036,  "transition_per_1000": 0.03, "min_days": 90,  "min_bytes": 0},
+    "DEEP_ARCHIVE":        {"gb_month": 0.00099, "transition_per_1000": 0.05, "min_days": 180, "min_bytes": 0},
+}
+
+# Archived objects carry 32 KB of index data billed at the archive rate and 8 KB billed as STANDARD
+ARCHIVE_OVERHEAD = {"GLACIER": (32 * KB, 8 * KB), "DEEP_ARCHIVE": (32 * KB, 8 * KB)}
+
+# Current-version rules of iac/terraform-aws-s3/modules/lifecycle/main.tf, in API form
+TERRAFORM_LIFECYCLE_RULES = [
+    {
+        "ID": "move-to-glacier",
+        "Filter": {"Prefix": "archive/"},
+        "Status": "Enabled",
+        "Transitions": [
+            {"Days": 30, "StorageClass": "STANDARD_IA"},
+            {"Days": 60, "StorageClass": "ONEZONE_IA"},
+            {"Days": 90, "StorageClass": "GLACIER"},
+            {"Days": 180, "StorageClass": "DEEP_ARCHIVE"}
+        ],
+        "Expiration": {"Days": 400}
+    }
+]
+
+BUILTIN_RULE_SETS = {"current": LIFECYCLE_RULES, "terraform": TERRAFORM_LIFECYCLE_RULES, "none": []}
+
+# ================= Rule Sets =================
+def load_rule_set(name_or_path):
+    """Returns (name, rules) for a built-in rule set or a YAML/JSON lifecycle configuration file."""
+    if name_or_path in BUILTIN_RULE_SETS:
+        return name_or_path, BUILTIN_RULE_SETS[name_or_path]
+
+    with open(name_or_path) as f:
+        if name_or_path.endswith((".yaml", ".yml")):
+            import yaml  # Only needed for YAML documents
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+    # Accepts the get-bucket-lifecycle-configuration output ({"Rules": [...]}) or a bare list of rules
+    rules = document["Rules"] if isinstance(document, dict) else document
+    return os.path.splitext(os.path.basename(name_or_path))[0], rules
+
+def _rule_filter(rule):
+    """Returns (prefix, size_greater_than, size_less_than, has_tags) for a lifecycle rule."""
+    rule_filter = rule.get("Filter", {})
+    conditions = rule_filter.get("And", rule_filter)
+    prefix = conditions.get("Prefix", rule.get("Prefix", ""))
+    has_tags = bool(conditions.get("Tag") or conditions.get("Tags"))
+    return prefix, conditions.get("ObjectSizeGreaterThan"), conditions.get("ObjectSizeLessThan"), has_tags
+
+def rule_prefixes(rule_sets):
+    """Returns every non-empty prefix used by the rule sets, so masks can be built while loading."""
+    return sorted({_rule_filter(rule)[0] for _, rules in rule_sets for rule in rules} - {""})
+
+# ================= Loading =================
+def load_objects(objects, prefixes=(), now=None):
+    """Builds a column table from list_objects_v2-style dicts.
+
+    Keys are not kept: only a boolean mask per rule prefix, so 100M objects
+    fit in a few GB of memory.
+    """
+    now = now or time.time()
+    sizes, ages, classes = array("q"), array("f"), array("b")
+    masks = {prefix: bytearray() for prefix in prefixes}
+
+    for obj in objects:
+        sizes.append(obj.get("Size", 0))
+        ages.append((now - obj["LastModified"].timestamp()) / 86400)
+        classes.append(CLASS_RANK.get(obj.get("StorageClass", "STANDARD"), 0))
+        for prefix, mask in masks.items():
+            mask.append(obj["Key"].startswith(prefix))
+
+    return {
+        "size": np.frombuffer(sizes, dtype=np.int64),
+        "age_days": np.frombuffer(ages, dtype=np.float32),
+        "storage_class": np.frombuffer(classes, dtype=np.int8),
+        "count": np.ones(len(sizes), dtype=np.float32),
+        "prefixes": {prefix: np.frombuffer(mask, dtype=np.bool_) for prefix, mask in masks.items()},
+    }
+
+def load_analytics_csv(path, prefixes=()):
+    """Builds a column table from a Storage Class Analysis export, one weighted row per age group.
+
+    Each row stands for ObjectCount objects of the group's average size; only the
+    most recent day in the export is used.
+    """
+    with open(path, newline="") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("ObjectAge") not in (None, "", "ALL")]
+    latest = max((row["Date"] for row in rows), default=None)  # None: an export with no age rows
+    rows = [row for row in rows if row["Date"] == latest and int(row["ObjectCount"] or 0) > 0]
+
+    def age_midpoint(group):
+        low, _, high = group.rstrip("+").partition("-")
+        return (int(low) + int(high)) / 2 if high else int(low)
+
+    counts = np.array([int(row["ObjectCount"]) for row in rows], dtype=np.float32)
+    stored = np.array([float(row["Storage_MB"] or 0) * 1024 ** 2 for row in rows])
+    return {
+        "size": (stored / counts).astype(np.int64),
+        "age_days": np.array([age_midpoint(row["ObjectAge"]) for row in rows], dtype=np.float32),
+        "storage_class": np.array([CLASS_RANK.get(row.get("StorageClass"), 0) for row in rows], dtype=np.int8),
+        "count": counts,
+        "prefixes": {
+            prefix: np.array([row.get("Filter", "").startswith(prefix) for row in rows], dtype=np.bool_)
+            for prefix in prefixes
+        },
+    }
+
+def load_bucket(bucket_name, source, prefixes=()):
+    """Builds a column table from a live listing, the latest inventory report, or the local object index."""
+    if source == "inventory":
+        from inventory_reader import iter_inventory_objects
+        objects = iter_inventory_objects(bucket_name)
+    elif source == "index":
+        from object_index import ObjectIndex
+        objects = ObjectIndex().query(bucket_name)
+    else:
+        from list_s3_contents import iter_objects
+        objects = iter_objects(bucket_name)
+    return load_objects(objects, prefixes)
+
+def save_table(table, path):
+    """Saves a column table to .npz, so later simulations skip the listing entirely."""
+    np.savez(path, **{k: v for k, v in table.items() if k != "prefixes"},
+             **{f"prefix:{prefix}": mask for prefix, mask in table["prefixes"].items()})
+
+def load_table(path):
+    """Loads a column table saved by save_table()."""
+    with np.load(path) as data:
+        table = {k: data[k] for k in data.files if not k.startswith("prefix:")}
+        table["prefixes"] = {k[len("prefix:"):]: data[k] for k in data.files if k.startswith("prefix:")}
+    return table
+
+# ================= Simulation =================
+def _price_arrays(prices):
+    """Returns per-class price vectors indexed by storage-class rank."""
+    def column(field):
+        return np.array([prices[c][field] for c in STORAGE_CLASSES], dtype=np.float64)
+    return {
+        "gb_month": column("gb_month"), "transition": column("transition_per_1000") / 1000,
+        "min_days": column("min_days"), "min_bytes": column("min_bytes"),
+        "overhead": np.array([ARCHIVE_OVERHEAD.get(c, (0, 0))[0] for c in STORAGE_CLASSES], dtype=np.float64),
+        "standard_overhead": np.array([ARCHIVE_OVERHEAD.get(c, (0, 0))[1] for c in STORAGE_CLASSES], dtype=np.float64),
+    }
+
+def _active_rules(rules):
+    """Returns the enabled rules that can be evaluated from object metadata alone."""
+    active = []
+    for rule in rules:
+        if rule.get("Status", "Enabled") != "Enabled":
+            continue
+        if _rule_filter(rule)[3]:
+            logging.warning(f"⚠ Rule '{rule.get('ID')}' filters on tags, which object metadata does not include; skipping it.")
+            continue
+        active.append(rule)
+    return active
+
+def _group_objects(table, rules):
+    """Labels each object with the set of rules (and transitions) that apply to it.
+
+    Returns (group index per object, one ((applies, can_transition), ...) signature per group).
+    """
+    n = len(table["size"])
+    words = max(1, -(-len(rules) // RULES_PER_WORD))  # S3 allows up to 1,000 rules
+    code = np.zeros((words, n), dtype=np.int64)
+    for i, rule in enumerate(rules):
+        word, bit = divmod(i, RULES_PER_WORD)
+        prefix, greater_than, less_than, _ = _rule_filter(rule)
+        mask = table["prefixes"][prefix].copy() if prefix else np.ones(n, dtype=np.bool_)
+        if greater_than is not None:
+            mask &= table["size"] > greater_than
+        if less_than is not None:
+            mask &= table["size"] < less_than
+        transition_mask = mask if greater_than is not None else mask & (table["size"] >= MIN_TRANSITION_SIZE)
+        code[word] |= mask.astype(np.int64) << (2 * bit)
+        code[word] |= transition_mask.astype(np.int64) << (2 * bit + 1)
+
+    if words == 1:
+        codes, groups = np.unique(code[0], return_inverse=True)
+        codes = codes[:, np.newaxis]
+    else:
+        codes, groups = np.unique(code.T, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+
+    def bits(row, i):
+        word, bit = divmod(i, RULES_PER_WORD)
+        return bool(row[word] >> (2 * bit) & 1), bool(row[word] >> (2 * bit + 1) & 1)
+
+    signatures = [tuple(bits(row, i) for i in range(len(rules))) for row in codes]
+    return groups, signatures
+
+def aggregate(table, rules, prices=PRICES):
+    """Collapses objects into cells of (rule group, initial storage class, age in whole days).
+
+    Every object in a cell moves through the lifecycle identically, so the
+    projection only has to evaluate cells: one bincount pass over the objects
+    replaces per-object work for every month simulated.
+    """
+    groups, signatures = _group_objects(table, rules)
+    days = int(table["age_days"].max(initial=0)) + 1
+    classes = len(STORAGE_CLASSES)
+    ages = np.floor(np.maximum(table["age_days"], 0)).astype(np.int64)
+    key = (groups * classes + table["storage_class"]) * days + ages
+    length = len(signatures) * classes * days
+
+    counts = table["count"].astype(np.float64)
+    sizes = table["size"].astype(np.float64)
+    totals = {
+        "count": np.bincount(key, weights=counts, minlength=length),
+        "bytes": np.bincount(key, weights=sizes * counts, minlength=length),
+    }
+    # Bytes billed on top of the real size for classes with a minimum billable object size
+    for min_bytes in {prices[c]["min_bytes"] for c in STORAGE_CLASSES} - {0}:
+        totals[f"pad:{min_bytes}"] = np.bincount(key, weights=np.maximum(min_bytes - sizes, 0) * counts, minlength=length)
+
+    cells = np.flatnonzero(totals["count"])
+    group_class, age = np.divmod(cells, days)
+    cell_group, cell_class = np.divmod(group_class, classes)
+    return {
+        "signatures": signatures, "group": cell_group, "initial_class": cell_class.astype(np.int8),
+        "age_days": age.astype(np.float32), **{name: values[cells] for name, values in totals.items()},
+    }
+
+def evaluate_rules(rules, signature, initial_class, ages):
+    """Returns (storage_class, entered_at, expires_at) for objects of one group at the given ages."""
+    storage_class = np.full(len(ages), initial_class, dtype=np.int8)
+    entered_at = np.zeros(len(ages), dtype=np.float32)
+    expires_at = np.inf
+
+    for rule, (applies, can_transition) in zip(rules, signature):
+        if not applies:
+            continue
+        if can_transition:
+            for transition in sorted(rule.get("Transitions", []), key=lambda t: t.get("Days", 0)):
+                rank = CLASS_RANK[transition["StorageClass"]]
+                moved = (ages >= transition["Days"]) & (storage_class < rank)
+                storage_class[moved] = rank
+                entered_at[moved] = transition["Days"]
+        expiration_days = rule.get("Expiration", {}).get("Days")
+        if expiration_days is not None:
+            expires_at = min(expires_at, expiration_days)
+
+    return storage_class, entered_at, np.full(len(ages), expires_at, dtype=np.float32)
+
+def simulate(table, rules, months=12, prices=PRICES):
+    """Projects a rule set month by month and returns one cost record per month."""
+    rules = _active_rules(rules)
+    price = _price_arrays(prices)
+    cells = aggregate(table, rules, prices)
+    classes = len(STORAGE_CLASSES)
+    if not len(cells["count"]):
+        # An empty bucket or a prefix that matches nothing costs nothing
+        return [{
+            "month": month, "bytes": {}, "transitioned_bytes": {}, "transitions": 0, "expired_objects": 0,
+            "storage_cost": 0.0, "transition_cost": 0.0, "early_delete_cost": 0.0, "total_cost": 0.0,
+        } for month in range(months + 1)]
+
+    # Cells are sorted by (group, initial class), so each pair is one contiguous slice
+    pairs = cells["group"].astype(np.int64) * classes + cells["initial_class"]
+    boundaries = np.flatnonzero(np.diff(pairs)) + 1
+    slices = list(zip(np.r_[0, boundaries], np.r_[boundaries, len(pairs)]))
+
+    counts, sizes = cells["count"], cells["bytes"]
+    billable_padding = np.zeros(len(counts))
+    previous_class = cells["initial_class"]
+    previous_expired = np.zeros(len(counts), dtype=np.bool_)
+    results = []
+
+    for month in range(months + 1):
+        ages = cells["age_days"] + np.float32(30 * month)
+        storage_class = np.empty(len(counts), dtype=np.int8)
+        entered_at = np.empty(len(counts), dtype=np.float32)
+        expires_at = np.empty(len(counts), dtype=np.float32)
+        for start, end in slices:
+            signature = cells["signatures"][cells["group"][start]]
+            storage_class[start:end], entered_at[start:end], expires_at[start:end] = evaluate_rules(
+                rules, signature, cells["initial_class"][start], ages[start:end]
+            )
+        expired = ages >= expires_at
+        live = ~expired
+
+        # Billable size: the class minimum, plus archive index overhead
+        min_bytes = price["min_bytes"][storage_class]
+        billable_padding[:] = 0
+        for value in np.unique(min_bytes[min_bytes > 0]):
+            in_class = min_bytes == value
+            billable_padding[in_class] = cells[f"pad:{int(value)}"][in_class]
+        class_bytes = np.bincount(storage_class[live], weights=sizes[live], minlength=classes)
+        class_objects = np.bincount(storage_class[live], weights=counts[live], minlength=classes)
+        # One expression, so billed is float even when nothing is live (bincount then returns int64 zeros)
+        billed = (class_bytes + np.bincount(storage_class[live], weights=billable_padding[live], minlength=classes)
+                  + class_objects * price["overhead"])
+        billed[CLASS_RANK["STANDARD"]] += (class_objects * price["standard_overhead"]).sum()
+        storage_cost = float((billed / GB * price["gb_month"]).sum())
+
+        # Lifecycle transition requests for objects that changed class since last month
+        moved = live & (storage_class != previous_class)
+        moved_counts = np.bincount(storage_class[moved], weights=counts[moved], minlength=classes)
+        moved_bytes = np.bincount(storage_class[moved], weights=sizes[moved], minlength=classes)
+        transition_cost = float((moved_counts * price["transition"]).sum())
+
+        # Objects expiring before their class's minimum storage duration are billed for the remainder
+        newly_expired = expired & ~previous_expired
+        final_class = storage_class[newly_expired]
+        short = np.maximum(price["min_days"][final_class] - (expires_at - entered_at)[newly_expired], 0)
+        early_delete_cost = float((sizes[newly_expired] / GB * price["gb_month"][final_class] * short / 30).sum())
+
+        results.append({
+            "month": month,
+            "bytes": {c: int(b) for c, b in zip(STORAGE_CLASSES, class_bytes) if b},
+            "transitioned_bytes": {c: int(b) for c, b in zip(STORAGE_CLASSES, moved_bytes) if b},
+            "transitions": int(moved_counts.sum()),
+            "expired_objects": int(counts[newly_expired].sum()),
+            "storage_cost": storage_cost,
+            "transition_cost": transition_cost,
+            "early_delete_cost": early_delete_cost,
+            "total_cost": storage_cost + transition_cost + early_delete_cost,
+        })
+        previous_class, previous_expired = storage_class, expired
+
+    return results
+
+# ================= Reporting =================
+def print_projection(name, results):
+    """Prints a month-by-month projection for one rule set."""
+    print(f"\n📅 Rule set '{name}'")
+    print(f"{'Month':>5}  {'Total $':>12}  {'Storage $':>12}  {'Transit $':>10}  {'Early $':>9}  Bytes by class (GB)")
+    for r in results:
+        by_class = ", ".join(f"{c}={b / GB:,.1f}" for c, b in r["bytes"].items())
+        print(
+            f"{r['month']:>5}  {r['total_cost']:>12,.2f}  {r['storage_cost']:>12,.2f}  "
+            f"{r['transition_cost']:>10,.2f}  {r['early_delete_cost']:>9,.2f}  {by_class}"
+        )
+
+def print_comparison(projections):
+    """Prints the total cost of each rule set over the horizon, cheapest first."""
+    print(f"\n{'Rule set':<24}{'Total $':>14}{'Last month $':>16}")
+    totals = sorted(projections.items(), key=lambda item: sum(r["total_cost"] for r in item[1]))
+    for name, results in totals:
+        print(f"{name:<24}{sum(r['total_cost'] for r in results):>14,.2f}{results[-1]['total_cost']:>16,.2f}")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Simulate storage-class transitions and cost for lifecycle rule sets.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bucket", help="Load object metadata for this bucket")
+    source.add_argument("--analytics-csv", help="Load a Storage Class Analysis CSV export")
+    source.add_argument("--table", help="Load a column table saved with --save-table")
+    parser.add_argument("--source", choices=["listing", "inventory", "index"], default="index",
+                        help="Where --bucket metadata comes from")
+    parser.add_argument("--rules", nargs="+", default=["none", "current", "terraform"],
+                        help="Rule sets: current, terraform, none, or YAML/JSON lifecycle configuration files")
+    parser.add_argument("--months", type=int, default=12, help="Months to project")
+    parser.add_argument("--prices", help="JSON price table overriding the built-in us-east-1 prices")
+    parser.add_argument("--save-table", help="Save the loaded column table (.npz) for later runs")
+    parser.add_argument("--output", help="Write every projection as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to compare lifecycle rule sets."""
+    args = parse_args(argv)
+    rule_sets = [load_rule_set(r) for r in args.rules]
+    prefixes = rule_prefixes(rule_sets)
+
+    start = time.perf_counter()
+    if args.table:
+        table = load_table(args.table)
+        missing = set(prefixes) - set(table["prefixes"])
+        if missing:
+            logging.error(f"❌ The saved table has no mask for prefixes {sorted(missing)}; reload from the bucket.")
+            sys.exit(1)
+    elif args.analytics_csv:
+        table = load_analytics_csv(args.analytics_csv, prefixes)
+    else:
+        table = load_bucket(args.bucket, args.source, prefixes)
+    logging.info(f"📥 Loaded {int(table['count'].sum())} objects in {time.perf_counter() - start:.2f}s.")
+
+    if args.save_table:
+        save_table(table, args.save_table)
+
+    prices = PRICES
+    if args.prices:
+        with open(args.prices) as f:
+            overrides = json.load(f)
+        prices = {c: {**PRICES[c], **overrides.get(c, {})} for c in PRICES}
+
+    projections = {}
+    for name, rules in rule_sets:
+        start = time.perf_counter()
+        projections[name] = simulate(table, rules, args.months, prices)
+        logging.info(f"⏱ Simulated '{name}' in {time.perf_counter() - start:.2f}s.")
+        print_projection(name, projections[name])
+    print_comparison(projections)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(projections, f, indent=2)
+
+if __name__ == "__main__":
+    with profiled():
+        main()
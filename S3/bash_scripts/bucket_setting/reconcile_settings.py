@@ -0,0 +1,332 @@
+#🔍 What This Script Does
+#✅ Declarative Settings – Reads the desired settings per bucket from a YAML/JSON document.
+#✅ Parallel Fetch – Reads the current configuration of every bucket with the matching get_* calls, concurrently.
+#✅ Idempotent Apply – Issues only the put_*/delete_* calls that would change something; a compliant fleet gets zero writes.
+#✅ Dry Run – Prints the diff without changing anything.
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+from Permissions_setting import CORS_CONFIGURATION, PUBLIC_ACCESS_BLOCK_CONFIGURATION, secure_transport_policy
+from Properties_setting import ENCRYPTION_CONFIGURATION
+from Managment_setting import LIFECYCLE_RULES, inventory_configuration
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Shared client factory lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
+def create_client(workers):
+    """Returns a region-routing S3 client whose connection pools fit every concurrent request."""
+    return RegionRoutingClient(max_pool_connections=workers)
+
+def _get_or_none(call, not_found_codes, extract):
+    """Runs a get_* call and returns the extracted value, or None if the setting isn't configured."""
+    try:
+        return extract(call())
+    except ClientError as e:
+        if e.response["Error"].get("Code") in not_found_codes:
+            return None
+        raise
+
+# ================= Desired-State Normalization =================
+def _normalize_encryption(value, bucket_name):
+    """Accepts an algorithm name or a full ServerSideEncryptionConfiguration."""
+    if value is True:
+        value = ENCRYPTION_CONFIGURATION
+    elif isinstance(value, str):
+        value = {"Rules": [{"ApplyServerSideEncryptionByDefault": {"SSEAlgorithm": value}}]}
+    rules = []
+    for rule in value["Rules"]:
+        # S3 reports BucketKeyEnabled even when it was never set
+        rules.append({"BucketKeyEnabled": False, **rule})
+    return {"Rules": rules}
+
+def _normalize_policy(value, bucket_name):
+    """Accepts "secure_transport" or a policy document (dict or JSON string)."""
+    if value == "secure_transport":
+        return secure_transport_policy(bucket_name)
+    return json.loads(value) if isinstance(value, str) else value
+
+def _normalize_cors(value, bucket_name):
+    """Accepts "default" or a list of CORS rules."""
+    return CORS_CONFIGURATION["CORSRules"] if value == "default" else value
+
+def _normalize_lifecycle(value, bucket_name):
+    """Accepts "default" or a list of lifecycle rules."""
+    return LIFECYCLE_RULES if value == "default" else value
+
+def _normalize_inventory(value, bucket_name):
+    """Accepts "default" or a full inventory configuration (with Id)."""
+    return inventory_configuration(bucket_name) if value == "default" else value
+
+def _normalize_tags(value, bucket_name):
+    """Tag values are always strings in S3."""
+    return {k: str(v) for k, v in value.items()}
+
+# ================= Settings Registry =================
+# Each setting knows how to read its current value (get), normalize the desired
+# value into the same shape (normalize), and write (put) or remove (delete) it.
+SETTINGS = {
+    "versioning": {
+        "get": lambda s3, b, d: s3.get_bucket_versioning(Bucket=b).get("Status", "Suspended"),
+        "normalize": lambda v, b: "Enabled" if v in (True, "Enabled") else "Suspended",
+        "put": lambda s3, b, v: s3.put_bucket_versioning(Bucket=b, VersioningConfiguration={"Status": v}),
+    },
+    "encryption": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_encryption(Bucket=b),
+            ("ServerSideEncryptionConfigurationNotFoundError",),
+            lambda r: _normalize_encryption(r["ServerSideEncryptionConfiguration"], b)),
+        "normalize": _normalize_encryption,
+        "put": lambda s3, b, v: s3.put_bucket_encryption(Bucket=b, ServerSideEncryptionConfiguration=v),
+        "delete": lambda s3, b: s3.delete_bucket_encryption(Bucket=b),
+    },
+    "public_access_block": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_public_access_block(Bucket=b),
+            ("NoSuchPublicAccessBlockConfiguration",),
+            lambda r: r["PublicAccessBlockConfiguration"]),
+        "normalize": lambda v, b: PUBLIC_ACCESS_BLOCK_CONFIGURATION if v is True else v,
+        "put": lambda s3, b, v: s3.put_public_access_block(Bucket=b, PublicAccessBlockConfiguration=v),
+        "delete": lambda s3, b: s3.delete_public_access_block(Bucket=b),
+    },
+    "policy": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_policy(Bucket=b),
+            ("NoSuchBucketPolicy",),
+            lambda r: json.loads(r["Policy"])),
+        "normalize": _normalize_policy,
+        "put": lambda s3, b, v: s3.put_bucket_policy(Bucket=b, Policy=json.dumps(v)),
+        "delete": lambda s3, b: s3.delete_bucket_policy(Bucket=b),
+    },
+    "ownership": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_ownership_controls(Bucket=b),
+            ("OwnershipControlsNotFoundError",),
+            lambda r: r["OwnershipControls"]["Rules"][0]["ObjectOwnership"]),
+        "normalize": lambda v, b: v,
+        "put": lambda s3, b, v: s3.put_bucket_ownership_controls(
+            Bucket=b, OwnershipControls={"Rules": [{"ObjectOwnership": v}]}),
+        "delete": lambda s3, b: s3.delete_bucket_ownership_controls(Bucket=b),
+    },
+    "acl": {
+        # Only the canned "private" ACL is supported: the owner holds the single FULL_CONTROL grant
+        "get": lambda s3, b, d: _acl_state(s3.get_bucket_acl(Bucket=b)),
+        "normalize": lambda v, b: v,
+        "put": lambda s3, b, v: s3.put_bucket_acl(Bucket=b, ACL=v),
+    },
+    "cors": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_cors(Bucket=b),
+            ("NoSuchCORSConfiguration",),
+            lambda r: r["CORSRules"]),
+        "normalize": _normalize_cors,
+        "put": lambda s3, b, v: s3.put_bucket_cors(Bucket=b, CORSConfiguration={"CORSRules": v}),
+        "delete": lambda s3, b: s3.delete_bucket_cors(Bucket=b),
+    },
+    "lifecycle": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_lifecycle_configuration(Bucket=b),
+            ("NoSuchLifecycleConfiguration",),
+            lambda r: r["Rules"]),
+        "normalize": _normalize_lifecycle,
+        "put": lambda s3, b, v: s3.put_bucket_lifecycle_configuration(Bucket=b, LifecycleConfiguration={"Rules": v}),
+        "delete": lambda s3, b: s3.delete_bucket_lifecycle(Bucket=b),
+    },
+    "replication": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_replication(Bucket=b),
+            ("ReplicationConfigurationNotFoundError",),
+            lambda r: r["ReplicationConfiguration"]),
+        "normalize": lambda v, b: v,
+        "put": lambda s3, b, v: s3.put_bucket_replication(Bucket=b, ReplicationConfiguration=v),
+        "delete": lambda s3, b: s3.delete_bucket_replication(Bucket=b),
+    },
+    "inventory": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_inventory_configuration(Bucket=b, Id=d["Id"]),
+            ("NoSuchConfiguration",),
+            lambda r: r["InventoryConfiguration"]),
+        "normalize": _normalize_inventory,
+        "put": lambda s3, b, v: s3.put_bucket_inventory_configuration(Bucket=b, Id=v["Id"], InventoryConfiguration=v),
+    },
+    "analytics": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_analytics_configuration(Bucket=b, Id=d["Id"]),
+            ("NoSuchConfiguration",),
+            lambda r: r["AnalyticsConfiguration"]),
+        "normalize": lambda v, b: v,
+        "put": lambda s3, b, v: s3.put_bucket_analytics_configuration(Bucket=b, Id=v["Id"], AnalyticsConfiguration=v),
+    },
+    "logging": {
+        "get": lambda s3, b, d: s3.get_bucket_logging(Bucket=b).get("LoggingEnabled"),
+        "normalize": lambda v, b: {"TargetPrefix": "logs/", **v},
+        "put": lambda s3, b, v: s3.put_bucket_logging(Bucket=b, BucketLoggingStatus={"LoggingEnabled": v}),
+        "delete": lambda s3, b: s3.put_bucket_logging(Bucket=b, BucketLoggingStatus={}),
+    },
+    "transfer_acceleration": {
+        "get": lambda s3, b, d: s3.get_bucket_accelerate_configuration(Bucket=b).get("Status", "Suspended"),
+        "normalize": lambda v, b: "Enabled" if v in (True, "Enabled") else "Suspended",
+        "put": lambda s3, b, v: s3.put_bucket_accelerate_configuration(Bucket=b, AccelerateConfiguration={"Status": v}),
+    },
+    "requester_pays": {
+        "get": lambda s3, b, d: s3.get_bucket_request_payment(Bucket=b)["Payer"] == "Requester",
+        "normalize": lambda v, b: bool(v),
+        "put": lambda s3, b, v: s3.put_bucket_request_payment(
+            Bucket=b, RequestPaymentConfiguration={"Payer": "Requester" if v else "BucketOwner"}),
+    },
+    "tags": {
+        "get": lambda s3, b, d: _get_or_none(
+            lambda: s3.get_bucket_tagging(Bucket=b),
+            ("NoSuchTagSet",),
+            lambda r: {t["Key"]: t["Value"] for t in r["TagSet"]}),
+        "normalize": _normalize_tags,
+        "put": lambda s3, b, v: s3.put_bucket_tagging(
+            Bucket=b, Tagging={"TagSet": [{"Key": k, "Value": val} for k, val in v.items()]}),
+        "delete": lambda s3, b: s3.delete_bucket_tagging(Bucket=b),
+    },
+}
+
+def _acl_state(response):
+    """Returns "private" if the bucket owner holds the only grant, otherwise "custom"."""
+    grants = response.get("Grants", [])
+    owner_id = response["Owner"].get("ID")
+    if len(grants) == 1 and grants[0]["Permission"] == "FULL_CONTROL" and grants[0]["Grantee"].get("ID") == owner_id:
+        return "private"
+    return "custom"
+
+# ================= Desired-State Document =================
+def load_desired_state(path, bucket_names=None):
+    """Loads `{"defaults": {...}, "buckets": {name: {...}}}` from YAML or JSON.
+
+    Defaults apply to every listed bucket, or to every bucket in `bucket_names`
+    (e.g. the whole account) when given. Per-bucket settings override defaults.
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml  # Only needed for YAML documents
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+
+    defaults = document.get("defaults", {})
+    buckets = document.get("buckets", {})
+    if isinstance(buckets, list):
+        buckets = {entry["name"]: {k: v for k, v in entry.items() if k != "name"} for entry in buckets}
+
+    names = list(bucket_names) if bucket_names is not None else list(buckets)
+    desired = {}
+    for name in names:
+        settings = {**defaults, **(buckets.get(name) or {})}
+        unknown = set(settings) - set(SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings for bucket '{name}': {', '.join(sorted(unknown))}")
+        desired[name] = settings
+    return desired
+
+# ================= Reconciler =================
+def plan_bucket_setting(s3, bucket_name, setting, desired_value):
+    """Fetches one setting and returns the change needed, if any."""
+    spec = SETTINGS[setting]
+    desired = None if desired_value is None else spec["normalize"](desired_value, bucket_name)
+    result = {"bucket": bucket_name, "setting": setting, "action": "ok", "desired": desired, "error": None}
+    if desired is None and "delete" not in spec:
+        return result  # Nothing we could remove, so there's nothing to check
+
+    try:
+        current = spec["get"](s3, bucket_name, desired)
+    except ClientError as e:
+        result.update(action="failed", error=e.response["Error"].get("Code", str(e)))
+        return result
+
+    result["current"] = current
+    if current == desired:
+        return result
+    result["action"] = "delete" if desired is None else "update"
+    return result
+
+def apply_change(s3, change):
+    """Issues the single put_*/delete_* call for a planned change."""
+    spec = SETTINGS[change["setting"]]
+    try:
+        if change["action"] == "delete":
+            spec["delete"](s3, change["bucket"])
+        else:
+            spec["put"](s3, change["bucket"], change["desired"])
+        change["applied"] = True
+    except ClientError as e:
+        change.update(action="failed", error=e.response["Error"].get("Code", str(e)))
+    return change
+
+def reconcile(desired, workers=32, dry_run=False, s3=None):
+    """Brings every bucket in `desired` to its desired settings and returns one record per setting."""
+    s3 = s3 or create_client(workers)
+    tasks = [(bucket, setting, value) for bucket, settings in desired.items() for setting, value in settings.items()]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        plan = list(executor.map(lambda t: plan_bucket_setting(s3, *t), tasks))
+        changes = [c for c in plan if c["action"] in ("update", "delete")]
+        if changes and not dry_run:
+            list(executor.map(lambda c: apply_change(s3, c), changes))
+    return plan
+
+def print_plan(plan, dry_run=False):
+    """Prints the changes (or failures) and a one-line summary."""
+    symbols = {"update": "~", "delete": "-", "failed": "❌"}
+    for change in plan:
+        if change["action"] == "ok":
+            continue
+        detail = change["error"] if change["action"] == "failed" else f"{change.get('current')!r} → {change['desired']!r}"
+        print(f"{symbols[change['action']]} {change['bucket']}.{change['setting']}: {detail}")
+
+    writes = sum(1 for c in plan if c["action"] in ("update", "delete"))
+    failed = sum(1 for c in plan if c["action"] == "failed")
+    compliant = sum(1 for c in plan if c["action"] == "ok")
+    verb = "would be written" if dry_run else "written"
+    logging.info(f"📋 {compliant} settings compliant, {writes} {verb}, {failed} failed.")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Reconcile S3 bucket settings against a desired-state document.")
+    parser.add_argument("desired_state", help="YAML/JSON document of desired settings per bucket")
+    parser.add_argument("--all-buckets", action="store_true", help="Apply the defaults to every bucket in the account")
+    parser.add_argument("--workers", type=int, default=32, help="Concurrent get/put calls")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff without writing anything")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to reconcile bucket settings."""
+    args = parse_args(argv)
+    s3 = create_client(args.workers)
+
+    bucket_names = None
+    if args.all_buckets:
+        bucket_names = [bucket["Name"] for bucket in s3.list_buckets().get("Buckets", [])]
+
+    try:
+        desired = load_desired_state(args.desired_state, bucket_names)
+    except (OSError, ValueError) as e:
+        logging.error(f"❌ Invalid desired-state document: {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    plan = reconcile(desired, args.workers, args.dry_run, s3)
+    print_plan(plan, args.dry_run)
+    logging.info(f"⏱ Reconciled {len(desired)} buckets in {time.perf_counter() - start:.2f}s.")
+
+    if any(c["action"] == "failed" for c in plan):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    with profiled():
+        main()
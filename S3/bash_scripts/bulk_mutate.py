@@ -0,0 +1,376 @@
+#✔ Targeted Changes: Retags or re-tiers exactly the objects a filtered listing selects (prefix, extension, size, age, class).
+#✔ Tagging: PutObjectTagging replaces each object's tag set, or merges into it and skips objects that already match.
+#✔ Storage-Class Rewrites: An in-place CopyObject (UploadPartCopy above 5 GB) changes the class and keeps metadata and tags.
+#✔ Throttle-Aware: Requests are paced per prefix by the shared rate controller and throttled requests are retried, not dropped.
+#✔ Checkpointed: Progress is saved as a listing high-water mark, so an interrupted run resumes where it stopped.
+#✔ Batch Operations Manifests: Can write the selection as an S3 Batch Operations CSV manifest and job definition instead.
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from bucket_region import RegionRoutingClient
+from checkpoint import KeyCheckpoint
+from copy_objects import GB, MAX_COPY_OBJECT_SIZE, copy_large_object, copy_object_kwargs, describe_objects
+from list_s3_contents import _keep_object, iter_objects
+from object_index import _timestamp
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MAX_TAGS = 10  # S3's limit per object
+STORAGE_CLASSES = ["STANDARD", "STANDARD_IA", "ONEZONE_IA", "INTELLIGENT_TIERING", "GLACIER_IR", "GLACIER",
+                   "DEEP_ARCHIVE", "REDUCED_REDUNDANCY"]
+ARCHIVED_CLASSES = {"GLACIER", "DEEP_ARCHIVE"}  # Must be restored before they can be copied
+MANIFEST_FORMAT = "S3BatchOperations_CSV_20180820"
+
+# ================= Object Selection =================
+def select_objects(bucket_name, prefix="", file_extension=None, min_size=None, max_size=None, modified_after=None,
+                   modified_before=None, storage_classes=None, source="live", start_after=None):
+    """Yields the objects under a prefix that pass every filter, in key order.
+
+    `source` is "live" (a ListObjectsV2 listing) or "index" (the local index kept
+    by object_index.py, which answers size and date filters without listing).
+    """
+    if source == "index":
+        from object_index import ObjectIndex
+        objects = ObjectIndex().query(bucket_name, prefix, file_extension, min_size, max_size,
+                                      modified_after, modified_before)
+        if start_after:
+            objects = (obj for obj in objects if obj["Key"] > start_after)
+    else:
+        objects = iter_objects(bucket_name, prefix, file_extension, start_after=start_after)
+
+    after = _timestamp(modified_after) if modified_after is not None else None
+    before = _timestamp(modified_before) if modified_before is not None else None
+    for obj in objects:
+        if not _keep_object(obj):
+            continue
+        if min_size is not None and obj["Size"] < min_size:
+            continue
+        if max_size is not None and obj["Size"] > max_size:
+            continue
+        if after is not None and obj["LastModified"].timestamp() < after:
+            continue
+        if before is not None and obj["LastModified"].timestamp() >= before:
+            continue
+        if storage_classes and obj.get("StorageClass", "STANDARD") not in storage_classes:
+            continue
+        yield obj
+
+# ================= Mutations =================
+class TagAction:
+    """Sets tags on each object.
+
+    By default the given tags replace the object's whole tag set with one
+    PutObjectTagging. With `merge` (implied by `remove`), the current tags are read
+    first, and objects whose tags would not change are skipped.
+    """
+
+    name = "tag"
+
+    def __init__(self, tags, merge=False, remove=()):
+        self.tags = dict(tags)
+        self.merge = merge
+        self.remove = set(remove)
+        if len(self.tags) > MAX_TAGS:
+            raise ValueError(f"S3 allows at most {MAX_TAGS} tags per object ({len(self.tags)} given)")
+
+    def describe(self):
+        tags = ", ".join(f"{k}={v}" for k, v in self.tags.items())
+        verb = "Merging tags" if self.merge or self.remove else "Replacing tags with"
+        removed = f" and removing {', '.join(sorted(self.remove))}" if self.remove else ""
+        return f"{verb} {tags or '(none)'}{removed}"
+
+    def apply(self, s3, bucket_name, obj):
+        """Tags one object; returns True if it was changed."""
+        key = obj["Key"]
+        controller = shared_controller()
+        tags = self.tags
+        if self.merge or self.remove:
+            current = controller.call(bucket_name, key, "read",
+                                      lambda: s3.get_object_tagging(Bucket=bucket_name, Key=key))
+            current = {tag["Key"]: tag["Value"] for tag in current.get("TagSet", [])}
+            tags = {**current, **self.tags}
+            for name in self.remove:
+                tags.pop(name, None)
+            if tags == current:
+                return False
+
+        tag_set = [{"Key": k, "Value": v} for k, v in tags.items()]
+        controller.call(bucket_name, key, "write",
+                        lambda: s3.put_object_tagging(Bucket=bucket_name, Key=key, Tagging={"TagSet": tag_set}))
+        return True
+
+    def batch_operation(self, bucket_name):
+        if self.merge or self.remove:
+            raise ValueError("Batch Operations can only replace tag sets; run merges and removals directly")
+        return {"S3PutObjectTagging": {"TagSet": [{"Key": k, "Value": v} for k, v in self.tags.items()]}}
+
+class StorageClassAction:
+    """Rewrites each object in place in another storage class.
+
+    Objects already in the class are skipped without a request. Archived
+    (GLACIER / DEEP_ARCHIVE) objects are skipped too: they must be restored first.
+    """
+
+    name = "storage-class"
+
+    def __init__(self, storage_class):
+        if storage_class not in STORAGE_CLASSES:
+            raise ValueError(f"Unknown storage class '{storage_class}' (expected one of {', '.join(STORAGE_CLASSES)})")
+        self.storage_class = storage_class
+
+    def describe(self):
+        return f"Rewriting objects as {self.storage_class}"
+
+    def needs_change(self, obj):
+        current = obj.get("StorageClass", "STANDARD")
+        return current != self.storage_class and current not in ARCHIVED_CLASSES
+
+    def apply(self, s3, bucket_name, obj):
+        """Re-tiers one object; returns True if it was changed."""
+        if not self.needs_change(obj):
+            return False
+        key = obj["Key"]
+        if obj["Size"] > MAX_COPY_OBJECT_SIZE:
+            copy_large_object(s3, bucket_name, key, obj["Size"], bucket_name, key, self.storage_class)
+            return True
+
+        kwargs = copy_object_kwargs(bucket_name, key, bucket_name, key)
+        # Explicit even for STANDARD: a copy onto itself must change something
+        kwargs["StorageClass"] = self.storage_class
+        if obj.get("ETag"):
+            kwargs["CopySourceIfMatch"] = obj["ETag"]  # Don't rewrite an object that changed since it was listed
+        shared_controller().call(bucket_name, key, "write", lambda: s3.copy_object(**kwargs))
+        return True
+
+    def batch_operation(self, bucket_name):
+        return {"S3PutObjectCopy": {
+            "TargetResource": f"arn:aws:s3:::{bucket_name}",
+            "StorageClass": self.storage_class,
+            "MetadataDirective": "COPY",
+        }}
+
+def mutate_objects(bucket_name, objects, action, workers=64, checkpoint_path=None, retry_failed=False, s3=None,
+                   progress_interval=10.0):
+    """Applies `action` to every object in `objects` and returns a summary.
+
+    `objects` is any key-ordered stream of listing-style dicts (see select_objects()).
+    With a checkpoint, keys up to the saved mark are skipped, so an interrupted
+    run can be restarted with the same selection.
+    """
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers * 2)
+    checkpoint = KeyCheckpoint(checkpoint_path) if checkpoint_path else None
+    summary = {"changed": 0, "unchanged": 0, "failed": 0, "bytes": 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    start = time.perf_counter()
+    last_report = [start]
+
+    def run(obj):
+        key = obj["Key"]
+        ok, changed = True, False
+        try:
+            changed = action.apply(s3, bucket_name, obj)
+        except (BotoCoreError, ClientError) as e:
+            logging.error(f"❌ Failed to update '{key}': {e}")
+            ok = False
+        finally:
+            in_flight.release()
+
+        if checkpoint:
+            checkpoint.completed(key, ok, changed=int(changed), unchanged=int(ok and not changed))
+        with lock:
+            summary["failed" if not ok else "changed" if changed else "unchanged"] += 1
+            summary["bytes"] += obj["Size"] if changed else 0
+            now = time.perf_counter()
+            if now - last_report[0] >= progress_interval:
+                last_report[0] = now
+                done = summary["changed"] + summary["unchanged"]
+                logging.info(f"🏷 {summary['changed']} objects changed, {done} checked so far "
+                             f"({done / (now - start):.0f} objects/s)...")
+
+    start_after = None
+    if retry_failed and checkpoint:
+        # Re-describe just the keys that failed last time; each stays recorded as failed until it is updated
+        objects = describe_objects(s3, bucket_name, list(checkpoint.failed))
+    elif checkpoint and checkpoint.start_after:
+        start_after = checkpoint.start_after
+        logging.info(f"⏯ Resuming after '{start_after}'.")
+
+    logging.info(f"🚀 {action.describe()} in 's3://{bucket_name}' with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for obj in objects:
+            if start_after is not None and obj["Key"] <= start_after:
+                continue
+            in_flight.acquire()
+            if checkpoint and not retry_failed:
+                checkpoint.submitted(obj["Key"])
+            executor.submit(run, obj)
+
+    if checkpoint:
+        checkpoint.finish()
+    summary["seconds"] = time.perf_counter() - start
+    seconds = max(summary["seconds"], 1e-9)
+    checked = summary["changed"] + summary["unchanged"] + summary["failed"]
+    logging.info(
+        f"📊 Changed {summary['changed']} of {checked} objects ({summary['bytes'] / GB:.2f} GB) in "
+        f"{summary['seconds']:.2f}s | {checked / seconds:.1f} objects/s | {summary['unchanged']} already up to date | "
+        f"{summary['failed']} failed"
+    )
+    shared_controller().log_snapshot()
+    return summary
+
+# ================= Batch Operations Manifests =================
+def write_manifest(bucket_name, objects, action, manifest_path, s3=None):
+    """Writes the objects `action` would change as a Batch Operations CSV manifest.
+
+    `manifest_path` is a local file or an s3:// URL (uploaded, and also kept in
+    the working directory under its file name). A job definition for
+    `aws s3control create-job --cli-input-json` is written next to the local
+    copy as <manifest>.job.json. Returns a summary.
+    """
+    operation = action.batch_operation(bucket_name)
+    summary = {"listed": 0, "skipped": 0, "too_large": 0, "bytes": 0}
+    local_path = manifest_path
+    if manifest_path.startswith("s3://"):
+        local_path = os.path.basename(manifest_path.rstrip("/")) or "manifest.csv"
+
+    with open(local_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        for obj in objects:
+            if isinstance(action, StorageClassAction) and not action.needs_change(obj):
+                summary["skipped"] += 1
+                continue
+            if isinstance(action, StorageClassAction) and obj["Size"] > MAX_COPY_OBJECT_SIZE:
+                summary["too_large"] += 1  # Batch Operations copies are limited to 5 GB
+                continue
+            writer.writerow([bucket_name, quote(obj["Key"], safe="/")])
+            summary["listed"] += 1
+            summary["bytes"] += obj["Size"]
+
+    manifest_arn, etag = f"arn:aws:s3:::MANIFEST_BUCKET/{local_path}", "MANIFEST_ETAG"
+    if manifest_path.startswith("s3://"):
+        manifest_bucket, _, manifest_key = manifest_path[len("s3://"):].partition("/")
+        s3 = s3 or RegionRoutingClient()
+        with open(local_path, "rb") as f:
+            etag = s3.put_object(Bucket=manifest_bucket, Key=manifest_key, Body=f, ContentType="text/csv")["ETag"]
+        manifest_arn = f"arn:aws:s3:::{manifest_bucket}/{manifest_key}"
+
+    job_path = f"{local_path}.job.json"
+    with open(job_path, "w") as f:
+        json.dump({
+            "AccountId": "YOUR_ACCOUNT_ID",  # Replace with your account ID
+            "ConfirmationRequired": True,
+            "Operation": operation,
+            "Manifest": {
+                "Spec": {"Format": MANIFEST_FORMAT, "Fields": ["Bucket", "Key"]},
+                "Location": {"ObjectArn": manifest_arn, "ETag": etag.strip('"')},
+            },
+            "Report": {"Enabled": False},
+            "Priority": 10,
+            "RoleArn": "arn:aws:iam::YOUR_ACCOUNT_ID:role/s3-batch-operations-role",  # Replace with your IAM Role
+        }, f, indent=2)
+
+    logging.info(f"📝 Wrote {summary['listed']} objects ({summary['bytes'] / GB:.2f} GB) to '{manifest_path}' "
+                 f"and the job definition to '{job_path}'.")
+    if summary["skipped"]:
+        logging.info(f"⏭ {summary['skipped']} objects are already in {action.storage_class} or archived.")
+    if summary["too_large"]:
+        logging.warning(f"⚠ {summary['too_large']} objects are above 5 GB, which Batch Operations cannot copy; "
+                        f"re-tier them without --manifest.")
+    return summary
+
+def parse_tag(value):
+    name, sep, tag_value = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got '{value}'")
+    return name, tag_value
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Retag or re-tier many S3 objects at once.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("bucket_name")
+    selection.add_argument("--prefix", default="", help="Only change keys under this prefix")
+    selection.add_argument("--extension", help="Only change keys with this extension (e.g. .csv)")
+    selection.add_argument("--min-size", type=int, help="Bytes")
+    selection.add_argument("--max-size", type=int, help="Bytes")
+    selection.add_argument("--after", help="Modified at or after this ISO date/time")
+    selection.add_argument("--before", help="Modified before this ISO date/time")
+    selection.add_argument("--from-class", action="append", dest="from_classes", choices=STORAGE_CLASSES,
+                           help="Only change objects currently in this storage class (repeatable)")
+    selection.add_argument("--source", choices=["live", "index"], default="live",
+                           help="Select from a live listing or the local object index")
+    selection.add_argument("--workers", type=int, default=64, help="Concurrent requests")
+    selection.add_argument("--checkpoint", help="Checkpoint file; re-run with the same file to resume")
+    selection.add_argument("--retry-failed", action="store_true", help="Only retry keys that failed in the checkpointed run")
+    selection.add_argument("--manifest", help="Write a Batch Operations CSV manifest (local path or s3://) instead")
+
+    tag = commands.add_parser("tag", parents=[selection], help="Replace or merge object tags")
+    tag.add_argument("--set", type=parse_tag, action="append", dest="tags", default=[], metavar="KEY=VALUE")
+    tag.add_argument("--remove", action="append", default=[], metavar="KEY", help="Tag to remove (implies a merge)")
+    tag.add_argument("--merge", action="store_true", help="Keep the objects' other tags")
+
+    storage_class = commands.add_parser("storage-class", parents=[selection], help="Rewrite objects in another class")
+    storage_class.add_argument("storage_class", choices=STORAGE_CLASSES)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to retag or re-tier objects."""
+    args = parse_args(argv)
+    if args.retry_failed and not args.checkpoint:
+        logging.error("❌ --retry-failed needs the --checkpoint of the earlier run.")
+        sys.exit(1)
+
+    try:
+        if args.command == "tag":
+            if not args.tags and not args.remove:
+                logging.error("❌ Nothing to do: give --set KEY=VALUE and/or --remove KEY.")
+                sys.exit(1)
+            action = TagAction(dict(args.tags), args.merge, args.remove)
+        else:
+            action = StorageClassAction(args.storage_class)
+        if args.manifest:
+            action.batch_operation(args.bucket_name)  # Fail before listing if Batch Operations can't do this
+    except ValueError as e:
+        logging.error(f"❌ {e}")
+        sys.exit(1)
+
+    start_after = None
+    if args.checkpoint and not args.retry_failed and not args.manifest:
+        start_after = KeyCheckpoint(args.checkpoint).start_after
+    objects = select_objects(args.bucket_name, args.prefix, args.extension, args.min_size, args.max_size,
+                             args.after, args.before, args.from_classes, args.source, start_after)
+
+    try:
+        if args.manifest:
+            write_manifest(args.bucket_name, objects, action, args.manifest)
+            return
+        summary = mutate_objects(args.bucket_name, objects, action, args.workers, args.checkpoint, args.retry_failed)
+    except ClientError as e:
+        logging.error(f"❌ Bulk update failed: {e}")
+        sys.exit(1)
+
+    if summary["failed"]:
+        hint = f" Re-run with --checkpoint {args.checkpoint} --retry-failed to retry them." if args.checkpoint else ""
+        logging.error(f"❌ {summary['failed']} objects could not be updated.{hint}")
+        sys.exit(1)
+    logging.info("✅ Bulk update completed.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
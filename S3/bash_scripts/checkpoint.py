@@ -0,0 +1,76 @@
+#✔ Listing Checkpoints: Records progress through a key-ordered listing as a single high-water mark.
+#✔ Out-of-Order Completion: Keys may finish in any order; the mark only advances past keys that are all done.
+#✔ Cheap Resumes: A restarted run lists with StartAfter=<mark> instead of re-processing everything.
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+class KeyCheckpoint:
+    """Tracks a bulk operation over a key-ordered listing in a small JSON file.
+
+    Keys must be submitted in listing order. Failed keys are recorded (so they can
+    be retried) and do not hold the mark back; a key leaves the failed list only
+    when a later attempt at it succeeds.
+    """
+
+    def __init__(self, path, save_interval=5.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.in_flight = deque()
+        self.done = set()
+        self.last_save = time.monotonic()
+
+        state = self._load()
+        self.start_after = state.get("start_after")
+        self.failed = dict.fromkeys(state.get("failed", []))  # Ordered set of keys
+        self.stats = state.get("stats", {})
+        self.complete = state.get("complete", False)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Writes the checkpoint atomically."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "start_after": self.start_after, "failed": list(self.failed),
+                "stats": self.stats, "complete": self.complete,
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.last_save = time.monotonic()
+
+    def submitted(self, key):
+        """Registers a key that is about to be processed."""
+        with self.lock:
+            self.in_flight.append(key)
+
+    def completed(self, key, ok=True, **counters):
+        """Marks a key as finished, adds `counters` to the running stats, and advances the mark."""
+        with self.lock:
+            self.done.add(key)
+            if ok:
+                self.failed.pop(key, None)
+            else:
+                self.failed[key] = None
+            for name, value in counters.items():
+                self.stats[name] = self.stats.get(name, 0) + value
+            while self.in_flight and self.in_flight[0] in self.done:
+                self.start_after = self.in_flight.popleft()
+                self.done.discard(self.start_after)
+            if time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+
+    def finish(self):
+        """Marks the run complete (every listed key was processed) and saves."""
+        with self.lock:
+            self.complete = not self.in_flight
+            self.save()
@@ -0,0 +1,191 @@
+#✔ Streaming Compression: Files are read in chunks, compressed on a shared pool of worker threads and written out in order.
+#✔ No Temp Files: Compressed chunks feed multipart parts directly (multipart_upload.MultipartWriter).
+#✔ Standard Streams: Each chunk is a complete gzip member / zstd frame; their concatenation is a valid .gz / .zst stream.
+#✔ Self-Describing Objects: Sets Content-Encoding plus the uncompressed size in metadata, so downloads decompress transparently.
+#✔ CPU Accounting: Tracks compression CPU seconds against bytes saved.
+
+import os
+import gzip
+import time
+import zlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from multipart_upload import MB, MultipartWriter, part_size_for
+
+KB = 1024
+CODECS = ("gzip", "zstd")
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+CHUNK_SIZE = 4 * MB            # Uncompressed bytes per independently compressed chunk
+MIN_COMPRESS_SIZE = 1 * KB     # Smaller files gain nothing from compression
+UNCOMPRESSED_SIZE = "uncompressed-size"  # x-amz-meta-uncompressed-size
+
+# Formats that are already compressed; recompressing them costs CPU and saves nothing
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".gz", ".tgz", ".zst", ".zip", ".bz2", ".xz", ".lz4", ".7z", ".rar", ".br", ".snappy",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".mp3", ".mp4", ".mov", ".mkv", ".avi", ".webm",
+    ".parquet", ".orc", ".avro", ".pdf", ".docx", ".xlsx", ".pptx", ".jar", ".whl",
+}
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstandard is required for zstd compression (pip install zstandard)")
+    return zstandard
+
+def should_compress(path, size):
+    """Returns True for files that are large enough and not already in a compressed format."""
+    return size >= MIN_COMPRESS_SIZE and os.path.splitext(path)[1].lower() not in INCOMPRESSIBLE_EXTENSIONS
+
+# ================= Compression =================
+class StreamCompressor:
+    """Compresses streams chunk by chunk on one pool of `threads` worker threads.
+
+    zlib and zstd release the GIL while they work, so chunks of one file (and of
+    every file sharing this compressor) compress in parallel. At most
+    `threads + 1` chunks per stream are held in memory.
+    """
+
+    def __init__(self, codec="zstd", level=None, threads=None, chunk_size=CHUNK_SIZE):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}' (expected one of {', '.join(CODECS)})")
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.threads = threads or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="compress")
+        self.local = threading.local()
+        if codec == "zstd":
+            _zstandard()  # Fail before any upload starts
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _compress_chunk(self, chunk):
+        start = time.thread_time()
+        if self.codec == "gzip":
+            data = gzip.compress(chunk, self.level, mtime=0)
+        else:
+            # ZstdCompressor objects must not be shared between threads
+            compressor = getattr(self.local, "zstd", None)
+            if compressor is None:
+                compressor = self.local.zstd = _zstandard().ZstdCompressor(level=self.level)
+            data = compressor.compress(chunk)
+        return data, time.thread_time() - start
+
+    def compress_stream(self, source, sink):
+        """Compresses everything read from `source` into `sink`; returns (bytes_in, bytes_out)."""
+        pending = deque()
+        bytes_in = bytes_out = 0
+        cpu_seconds = 0.0
+
+        def drain():
+            nonlocal bytes_out, cpu_seconds
+            data, cpu = pending.popleft().result()
+            sink.write(data)
+            bytes_out += len(data)
+            cpu_seconds += cpu
+
+        while True:
+            chunk = source.read(self.chunk_size)
+            if not chunk and (bytes_in or pending):
+                break
+            bytes_in += len(chunk)
+            pending.append(self.executor.submit(self._compress_chunk, chunk))
+            while len(pending) > self.threads:
+                drain()
+            if not chunk:
+                break  # An empty input still becomes one valid (empty) gzip member / zstd frame
+        while pending:
+            drain()
+
+        with self.lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+        return bytes_in, bytes_out
+
+    def stats(self):
+        """Returns totals so far: bytes in/out, ratio, CPU seconds and CPU seconds per GB saved."""
+        with self.lock:
+            saved = self.bytes_in - self.bytes_out
+            return {
+                "codec": self.codec, "level": self.level, "threads": self.threads,
+                "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "cpu_seconds_per_gb_saved": round(self.cpu_seconds / (saved / 1024 ** 3), 2) if saved > 0 else None,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+def upload_compressed(s3, compressor, file_path, bucket_name, key, part_size=8 * MB, part_concurrency=4):
+    """Streams a file through `compressor` into one object and returns (uncompressed size, ETag)."""
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as source, MultipartWriter(
+        s3, bucket_name, key, part_size_for(size, part_size), part_concurrency,
+        ContentEncoding=compressor.codec, Metadata={UNCOMPRESSED_SIZE: str(size)}
+    ) as writer:
+        compressor.compress_stream(source, writer)
+    return size, writer.etag
+
+# ================= Decompression =================
+class _Concatenated:
+    """Streaming decoder for concatenated gzip members or zstd frames (zlib and zstd stop after the first)."""
+
+    def __init__(self, new_decoder):
+        self.new_decoder = new_decoder
+        self.decoder = new_decoder()
+
+    def decompress(self, data):
+        out = []
+        while data:
+            try:
+                out.append(self.decoder.decompress(data))
+            except Exception as e:  # zlib.error / zstandard.ZstdError
+                raise ValueError(f"corrupt compressed data ({e})") from e
+            if not self.decoder.eof:
+                break
+            data = self.decoder.unused_data
+            self.decoder = self.new_decoder()
+        return b"".join(out)
+
+def encoding_of(response):
+    """Returns the codec of an object written by upload_compressed(), or None for anything else.
+
+    Objects that merely carry Content-Encoding (e.g. pre-gzipped web assets) are left alone.
+    """
+    encoding = response.get("ContentEncoding")
+    if encoding in CODECS and UNCOMPRESSED_SIZE in response.get("Metadata", {}):
+        return encoding
+    return None
+
+def expected_size(response):
+    return int(response["Metadata"][UNCOMPRESSED_SIZE])
+
+def decompressor(codec):
+    """Returns a streaming decoder with a decompress(data) method for `codec`."""
+    if codec == "gzip":
+        return _Concatenated(lambda: zlib.decompressobj(31))
+    return _Concatenated(_zstandard().ZstdDecompressor().decompressobj)
+
+def iter_decompressed(chunks, codec):
+    """Decompresses an iterable of compressed chunks."""
+    decoder = decompressor(codec)
+    for chunk in chunks:
+        data = decoder.decompress(chunk)
+        if data:
+            yield data
+
+def decompress_file(source_path, dest_path, codec, chunk_size=1 * MB):
+    """Decompresses `source_path` into `dest_path`; returns the decompressed size."""
+    written = 0
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        for data in iter_decompressed(iter(lambda: source.read(chunk_size), b""), codec):
+            dest.write(data)
+            written += len(data)
+    return written
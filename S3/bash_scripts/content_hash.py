@@ -0,0 +1,167 @@
+#✔ Local ETags: Computes MD5 and multipart-style ETags exactly as S3 reports them.
+#✔ Bounded Memory: Hashes through chunked, memory-mapped reads, so large files never load into RAM.
+#✔ Hash Cache: Remembers results by (inode, size, mtime) so unchanged files are never re-hashed.
+#✔ Remote Comparison: Matches local files against listed ETags to skip unchanged uploads.
+#✔ Stored ETags: Remembers which ETags hold a given content when the object bytes differ from it (compressed objects).
+
+import os
+import mmap
+import math
+import sqlite3
+import hashlib
+import threading
+
+MB = 1024 * 1024
+CHUNK_SIZE = 1 * MB
+DEFAULT_HASH_CACHE = os.path.expanduser("~/.s3_hash_cache.db")
+
+# Part sizes commonly used by the AWS CLI, boto3 and the console, tried when inferring a remote part size
+COMMON_PART_SIZES = [5 * MB, 8 * MB, 16 * MB, 15 * MB, 32 * MB, 64 * MB, 100 * MB, 128 * MB, 256 * MB, 512 * MB]
+
+def _iter_chunks(path, size, chunk_size=CHUNK_SIZE):
+    """Yields memoryview chunks of a file through mmap, without copying it into memory."""
+    if size == 0:
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for offset in range(0, size, chunk_size):
+                chunk = view[offset:offset + chunk_size]
+                try:
+                    yield offset, chunk
+                finally:
+                    chunk.release()
+
+def hash_file(path, part_size=8 * MB, multipart_threshold=8 * MB):
+    """Returns (md5_hex, etag) for a file in a single pass.
+
+    The ETag is the plain MD5 for files uploaded in one request and
+    `md5(concat(part_md5s))-N` for files at or above `multipart_threshold`,
+    matching what S3 reports for an upload made with the same part size.
+    """
+    size = os.path.getsize(path)
+    chunk_size = math.gcd(CHUNK_SIZE, part_size)
+    whole = hashlib.md5()
+    part_digests = []
+    part = hashlib.md5()
+
+    for offset, chunk in _iter_chunks(path, size, chunk_size):
+        whole.update(chunk)
+        part.update(chunk)
+        if (offset + len(chunk)) % part_size == 0:
+            part_digests.append(part.digest())
+            part = hashlib.md5()
+
+    if size % part_size:
+        part_digests.append(part.digest())
+
+    md5_hex = whole.hexdigest()
+    if size < multipart_threshold:
+        return md5_hex, md5_hex
+
+    combined = hashlib.md5(b"".join(part_digests)).hexdigest()
+    return md5_hex, f"{combined}-{len(part_digests)}"
+
+def multipart_etag(path, part_size):
+    """Returns the multipart ETag a file would have when uploaded with `part_size` parts."""
+    return hash_file(path, part_size, multipart_threshold=0)[1]
+
+def candidate_part_sizes(size, part_count, preferred=None):
+    """Returns part sizes consistent with a remote `-N` ETag for an object of `size` bytes."""
+    candidates = ([preferred] if preferred else []) + COMMON_PART_SIZES
+    # Tools that pick the part size from the object size usually round up to a whole MB
+    candidates.append(math.ceil(size / part_count / MB) * MB)
+    seen = []
+    for part_size in candidates:
+        if part_size not in seen and math.ceil(size / part_size) == part_count:
+            seen.append(part_size)
+    return seen
+
+def normalize_etag(etag):
+    """Strips the quotes S3 puts around ETags."""
+    return etag.strip('"') if etag else etag
+
+# ================= Hash Cache =================
+class HashCache:
+    """SQLite cache of file hashes keyed by (device, inode, size, mtime, part size)."""
+
+    def __init__(self, path=DEFAULT_HASH_CACHE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS hashes (
+                   dev INTEGER NOT NULL,
+                   ino INTEGER NOT NULL,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   part_size INTEGER NOT NULL,
+                   md5 TEXT NOT NULL,
+                   etag TEXT NOT NULL,
+                   PRIMARY KEY (dev, ino, size, mtime_ns, part_size)
+               )"""
+        )
+        # ETags of objects whose bytes differ from the content they hold (compressed objects), by content MD5
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS stored_etags (
+                   md5 TEXT NOT NULL,
+                   etag TEXT NOT NULL,
+                   PRIMARY KEY (md5, etag)
+               )"""
+        )
+        self.conn.commit()
+
+    def remember_stored(self, path, etag, stat=None):
+        """Records that the file's content is stored as the object with `etag`."""
+        md5_hex = self.get(path, stat=stat)[0]
+        with self.lock:
+            self.conn.execute("INSERT OR IGNORE INTO stored_etags VALUES (?, ?)", (md5_hex, normalize_etag(etag)))
+            self.conn.commit()
+
+    def stored_as(self, path, remote_etag, stat=None):
+        """Returns True if remember_stored() recorded the file's content under `remote_etag`."""
+        md5_hex = self.get(path, stat=stat)[0]
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM stored_etags WHERE md5 = ? AND etag = ?",
+                                    (md5_hex, normalize_etag(remote_etag))).fetchone()
+        return row is not None
+
+    def get(self, path, part_size=8 * MB, multipart_threshold=8 * MB, stat=None):
+        """Returns (md5_hex, etag) for a file, hashing it only if it changed since it was cached."""
+        stat = stat or os.stat(path)
+        # Files below the threshold are single-part, so their ETag doesn't depend on the part size
+        cache_part_size = part_size if stat.st_size >= multipart_threshold else 0
+        cache_key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, cache_part_size)
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT md5, etag FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND part_size = ?",
+                cache_key
+            ).fetchone()
+        if row:
+            return row
+
+        md5_hex, etag = hash_file(path, part_size, multipart_threshold)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)", cache_key + (md5_hex, etag))
+            self.conn.commit()
+        return md5_hex, etag
+
+    def matches_remote(self, path, remote_etag, part_size=8 * MB, multipart_threshold=8 * MB, stat=None):
+        """Returns True if the local file has the same content as an object with `remote_etag`."""
+        remote_etag = normalize_etag(remote_etag)
+        if not remote_etag:
+            return False
+
+        stat = stat or os.stat(path)
+        if "-" not in remote_etag:
+            # Single-part upload: the ETag is the plain MD5 (unless the object uses SSE-KMS)
+            return self.get(path, part_size, multipart_threshold, stat)[0] == remote_etag
+
+        part_count = int(remote_etag.rsplit("-", 1)[1])
+        for candidate in candidate_part_sizes(stat.st_size, part_count, preferred=part_size):
+            if self.get(path, candidate, 0, stat)[1] == remote_etag:
+                return True
+        return False
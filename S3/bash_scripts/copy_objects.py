@@ -0,0 +1,215 @@
+#✔ Server-Side Copies: Objects are copied inside S3 with CopyObject; no bytes pass through this host.
+#✔ Large Objects: Objects above 5 GB are copied with parallel UploadPartCopy ranges.
+#✔ Faithful Copies: Metadata, content headers, tags and storage class are preserved.
+#✔ High Concurrency: The source listing is streamed into a bounded thread pool.
+#✔ Checkpointed: Progress is saved as a listing high-water mark, so an interrupted migration resumes where it stopped.
+#✔ Rate Controlled: Copies are paced per destination prefix and throttled copies are retried, not dropped.
+
+import sys
+import time
+import logging
+import argparse
+import threading
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from bucket_region import RegionRoutingClient
+from checkpoint import KeyCheckpoint
+from list_s3_contents import iter_objects
+from multipart_upload import MB, part_size_for
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+GB = 1024 * MB
+MAX_COPY_OBJECT_SIZE = 5 * GB  # CopyObject's limit; larger objects need UploadPartCopy
+COPY_PART_SIZE = 512 * MB
+
+# Headers CopyObject copies implicitly but a multipart upload must be given explicitly
+CONTENT_HEADERS = ["ContentType", "CacheControl", "ContentDisposition", "ContentEncoding", "ContentLanguage", "Expires"]
+
+def destination_key(key, source_prefix, destination_prefix):
+    """Re-roots a key from the source prefix under the destination prefix."""
+    return destination_prefix + key[len(source_prefix):]
+
+def copy_object_kwargs(source_bucket, key, destination_bucket, dest_key, storage_class=None):
+    """Returns the CopyObject arguments that keep an object's metadata, tags and storage class."""
+    kwargs = {
+        "CopySource": {"Bucket": source_bucket, "Key": key},
+        "Bucket": destination_bucket,
+        "Key": dest_key,
+        "MetadataDirective": "COPY",
+        "TaggingDirective": "COPY",
+    }
+    # Without an explicit StorageClass, CopyObject writes the copy as STANDARD
+    if storage_class and storage_class != "STANDARD":
+        kwargs["StorageClass"] = storage_class
+    return kwargs
+
+def copy_object(s3, source_bucket, key, destination_bucket, dest_key, storage_class=None):
+    """Copies one object up to 5 GB, keeping metadata, tags and storage class."""
+    kwargs = copy_object_kwargs(source_bucket, key, destination_bucket, dest_key, storage_class)
+    shared_controller().call(destination_bucket, dest_key, "write", lambda: s3.copy_object(**kwargs))
+
+def copy_large_object(s3, source_bucket, key, size, destination_bucket, dest_key, storage_class=None,
+                      part_concurrency=8):
+    """Copies an object of any size with a multipart upload of UploadPartCopy ranges."""
+    head = s3.head_object(Bucket=source_bucket, Key=key)
+    create_kwargs = {"Bucket": destination_bucket, "Key": dest_key, "Metadata": head.get("Metadata", {})}
+    create_kwargs.update({header: head[header] for header in CONTENT_HEADERS if header in head})
+    if storage_class and storage_class != "STANDARD":
+        create_kwargs["StorageClass"] = storage_class
+    tags = s3.get_object_tagging(Bucket=source_bucket, Key=key).get("TagSet", [])
+    if tags:
+        create_kwargs["Tagging"] = urlencode({tag["Key"]: tag["Value"] for tag in tags})
+
+    upload_id = s3.create_multipart_upload(**create_kwargs)["UploadId"]
+    part_size = part_size_for(size, COPY_PART_SIZE)
+
+    def copy_part(part_number):
+        start = (part_number - 1) * part_size
+        end = min(start + part_size, size) - 1
+        response = shared_controller().call(destination_bucket, dest_key, "write", lambda: s3.upload_part_copy(
+            Bucket=destination_bucket, Key=dest_key, UploadId=upload_id, PartNumber=part_number,
+            CopySource={"Bucket": source_bucket, "Key": key}, CopySourceRange=f"bytes={start}-{end}",
+            CopySourceIfMatch=head["ETag"]
+        ), timed=False)
+        return {"PartNumber": part_number, "ETag": response["CopyPartResult"]["ETag"]}
+
+    try:
+        with ThreadPoolExecutor(max_workers=part_concurrency) as executor:
+            parts = list(executor.map(copy_part, range(1, -(-size // part_size) + 1)))
+        s3.complete_multipart_upload(
+            Bucket=destination_bucket, Key=dest_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except (BotoCoreError, ClientError):
+        s3.abort_multipart_upload(Bucket=destination_bucket, Key=dest_key, UploadId=upload_id)
+        raise
+
+def describe_objects(s3, bucket_name, keys):
+    """Yields listing-style entries for specific keys, skipping keys that no longer exist."""
+    for key in keys:
+        try:
+            head = s3.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            logging.warning(f"⚠ Skipping '{key}': {e.response['Error'].get('Code')}")
+            continue
+        yield {"Key": key, "Size": head["ContentLength"], "ETag": head["ETag"],
+               "StorageClass": head.get("StorageClass", "STANDARD")}
+
+def copy_prefix(source_bucket, destination_bucket, source_prefix="", destination_prefix=None, workers=64,
+                storage_class=None, checkpoint_path=None, retry_failed=False, s3=None, progress_interval=10.0):
+    """Copies every object under a prefix server-side and returns a summary.
+
+    `storage_class` overrides the source objects' storage classes; by default each
+    copy keeps its source's class. With a checkpoint, an interrupted run resumes
+    after the last key that (with every key before it) was finished.
+    """
+    destination_prefix = source_prefix if destination_prefix is None else destination_prefix
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers * 2)
+    checkpoint = KeyCheckpoint(checkpoint_path) if checkpoint_path else None
+    summary = {"copied": 0, "bytes": 0, "failed": 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    start = time.perf_counter()
+    last_report = [start]
+
+    def run(obj):
+        key = obj["Key"]
+        target_class = storage_class or obj.get("StorageClass")
+        ok = True
+        try:
+            dest_key = destination_key(key, source_prefix, destination_prefix)
+            if obj["Size"] > MAX_COPY_OBJECT_SIZE:
+                copy_large_object(s3, source_bucket, key, obj["Size"], destination_bucket, dest_key, target_class)
+            else:
+                copy_object(s3, source_bucket, key, destination_bucket, dest_key, target_class)
+        except (BotoCoreError, ClientError) as e:
+            # Archived (GLACIER/DEEP_ARCHIVE) objects fail with InvalidObjectState until restored
+            logging.error(f"❌ Failed to copy '{key}': {e}")
+            ok = False
+        finally:
+            in_flight.release()
+
+        if checkpoint:
+            checkpoint.completed(key, ok, copied=int(ok), bytes=obj["Size"] if ok else 0)
+        with lock:
+            summary["copied" if ok else "failed"] += 1
+            summary["bytes"] += obj["Size"] if ok else 0
+            now = time.perf_counter()
+            if now - last_report[0] >= progress_interval:
+                last_report[0] = now
+                logging.info(
+                    f"📦 {summary['copied']} objects ({summary['bytes'] / GB:.1f} GB) copied so far "
+                    f"({summary['copied'] / (now - start):.0f} objects/s)..."
+                )
+
+    if retry_failed and checkpoint:
+        # Re-describe just the keys that failed last time; each stays recorded as failed until its copy succeeds
+        objects = describe_objects(s3, source_bucket, list(checkpoint.failed))
+    else:
+        start_after = checkpoint.start_after if checkpoint else None
+        if start_after:
+            logging.info(f"⏯ Resuming after '{start_after}'.")
+        objects = iter_objects(source_bucket, prefix=source_prefix, start_after=start_after)
+
+    logging.info(f"🚀 Copying 's3://{source_bucket}/{source_prefix}' → 's3://{destination_bucket}/{destination_prefix}' with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for obj in objects:
+            in_flight.acquire()
+            if checkpoint and not retry_failed:
+                checkpoint.submitted(obj["Key"])
+            executor.submit(run, obj)
+
+    if checkpoint:
+        checkpoint.finish()
+    summary["seconds"] = time.perf_counter() - start
+    seconds = max(summary["seconds"], 1e-9)
+    logging.info(
+        f"📊 Copied {summary['copied']} objects ({summary['bytes'] / GB:.2f} GB) in {summary['seconds']:.2f}s | "
+        f"{summary['copied'] / seconds:.1f} objects/s | {summary['bytes'] / MB / seconds:.0f} MB/s server-side | "
+        f"{summary['failed']} failed"
+    )
+    return summary
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Copy or migrate objects between buckets, server-side.")
+    parser.add_argument("source_bucket")
+    parser.add_argument("destination_bucket")
+    parser.add_argument("--prefix", default="", help="Only copy keys under this prefix")
+    parser.add_argument("--destination-prefix", help="Prefix to copy into (defaults to --prefix)")
+    parser.add_argument("--workers", type=int, default=64, help="Concurrent copy requests")
+    parser.add_argument("--storage-class", help="Write copies in this storage class instead of the source's")
+    parser.add_argument("--checkpoint", help="Checkpoint file; re-run with the same file to resume")
+    parser.add_argument("--retry-failed", action="store_true", help="Only retry keys that failed in the checkpointed run")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to copy objects between buckets."""
+    args = parse_args(argv)
+    if args.retry_failed and not args.checkpoint:
+        logging.error("❌ --retry-failed needs the --checkpoint of the earlier run.")
+        sys.exit(1)
+
+    try:
+        summary = copy_prefix(
+            args.source_bucket, args.destination_bucket, args.prefix, args.destination_prefix,
+            args.workers, args.storage_class, args.checkpoint, args.retry_failed
+        )
+    except ClientError as e:
+        logging.error(f"❌ Copy failed: {e}")
+        sys.exit(1)
+
+    if summary["failed"]:
+        hint = f" Re-run with --checkpoint {args.checkpoint} --retry-failed to retry them." if args.checkpoint else ""
+        logging.error(f"❌ {summary['failed']} objects could not be copied.{hint}")
+        sys.exit(1)
+    logging.info("✅ Copy completed.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
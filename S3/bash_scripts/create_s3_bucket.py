@@ -2,24 +2,30 @@
 #✔ Automatically sets the correct region.
 #✔ Uses structured logging for clear debugging.
 #✔ Implements strong error handling to catch AWS-related issues.
+#✔ Batch mode: Creates buckets from a YAML/JSON spec file concurrently, with per-bucket results and a dry-run diff.
 
-import boto3
+import os
 import sys
+import json
+import time
 import logging
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from s3_client import REGION, get_s3_client
+from bucket_region import RegionRoutingClient, lookup_bucket_region, region_cache
+
+# Bucket settings are applied through the idempotent reconciler in bucket_setting/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bucket_setting"))
+from reconcile_settings import apply_change, plan_bucket_setting
+from instrumentation import profiled
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# AWS Region
-REGION = "eu-west-2"
-
-# Initialize AWS Clients
-try:
-    s3 = boto3.client("s3", region_name=REGION)
-except (NoCredentialsError, PartialCredentialsError):
-    logging.error("❌ AWS credentials not found or misconfigured. Run 'aws configure'.")
-    sys.exit(1)
+# Shared AWS client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def bucket_exists(bucket_name):
     """Check if an S3 bucket already exists."""
@@ -42,11 +48,11 @@ def create_s3_bucket(bucket_name):
             logging.error(f"❌ Bucket '{bucket_name}' already exists. Choose another name.")
             sys.exit(1)
 
-        # Create bucket with region specification
-        s3.create_bucket(
-            Bucket=bucket_name,
-            CreateBucketConfiguration={"LocationConstraint": REGION}
-        )
+        # Create bucket with region specification (us-east-1 rejects an explicit LocationConstraint)
+        params = {"Bucket": bucket_name}
+        if REGION != "us-east-1":
+            params["CreateBucketConfiguration"] = {"LocationConstraint": REGION}
+        s3.create_bucket(**params)
         logging.info(f"✅ Bucket '{bucket_name}' created successfully in region '{REGION}'.")
 
         return True
@@ -54,8 +60,184 @@ def create_s3_bucket(bucket_name):
         logging.error(f"❌ Failed to create bucket: {e}")
         sys.exit(1)
 
-def main():
+# ================= Batch Provisioning =================
+def client_for_region(region):
+    """Returns the shared S3 client for a region, creating it on first use."""
+    return get_s3_client(region)
+
+def load_bucket_specs(path):
+    """Loads bucket specs from a YAML or JSON file.
+
+    The file holds either a list of specs or `{"defaults": {...}, "buckets": [...]}`.
+    Each spec has a `name` and optional `region` and `settings`; defaults fill
+    in anything a bucket doesn't set.
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml  # Only needed for YAML spec files
+            document = yaml.safe_load(f)
+        else:
+            document = json.load(f)
+
+    if isinstance(document, list):
+        document = {"buckets": document}
+
+    defaults = document.get("defaults", {})
+    specs = []
+    for entry in document.get("buckets", []):
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        spec = {
+            "name": entry["name"],
+            "region": entry.get("region", defaults.get("region", REGION)),
+            "settings": {**defaults.get("settings", {}), **entry.get("settings", {})},
+        }
+        specs.append(spec)
+    return specs
+
+def apply_bucket_settings(client, bucket_name, settings, dry_run=False):
+    """Reconciles the settings from a bucket spec, returning the changes made (or needed)."""
+    changes = []
+    for setting, value in settings.items():
+        change = plan_bucket_setting(client, bucket_name, setting, value)
+        if change["action"] in ("update", "delete") and not dry_run:
+            apply_change(client, change)
+        if change["action"] != "ok":
+            changes.append(change)
+    return changes
+
+def owned_bucket_region(client, bucket_name):
+    """Returns the region of a bucket this account can access, or None if it is missing or someone else's."""
+    try:
+        response = client.head_bucket(Bucket=bucket_name)
+    except ClientError as e:
+        if e.response["Error"].get("Code") in ("301", "403", "404", "NoSuchBucket"):
+            return None
+        raise
+    return response["ResponseMetadata"]["HTTPHeaders"].get("x-amz-bucket-region") or lookup_bucket_region(bucket_name)
+
+def provision_bucket(spec):
+    """Creates one bucket from a spec and returns a result instead of exiting on failure."""
+    name, region = spec["name"], spec["region"]
+    client = client_for_region(region)
+    result = {"bucket": name, "region": region, "status": "created", "error": None}
+    start = time.perf_counter()
+
+    try:
+        # us-east-1 answers 200 instead of BucketAlreadyOwnedByYou when a bucket we own is created again
+        existing = owned_bucket_region(client, name) if region == "us-east-1" else None
+        if existing is None:
+            params = {"Bucket": name}
+            if region != "us-east-1":  # us-east-1 rejects an explicit LocationConstraint
+                params["CreateBucketConfiguration"] = {"LocationConstraint": region}
+            try:
+                client.create_bucket(**params)
+            except ClientError as e:
+                if e.response["Error"].get("Code") != "BucketAlreadyOwnedByYou":
+                    raise
+                existing = lookup_bucket_region(name) or region
+        region_cache().set(name, existing or region)  # Later calls route straight to the bucket's real region
+
+        if existing:
+            result["status"] = "exists"
+            if existing != region:
+                result["status"] = "region-mismatch"
+                result["error"] = f"exists in {existing}"
+                logging.error(f"❌ Bucket '{name}' already exists in {existing}, not {region}.")
+                result["seconds"] = round(time.perf_counter() - start, 3)
+                return result
+
+        failed = [c for c in apply_bucket_settings(client, name, spec["settings"]) if c["action"] == "failed"]
+        if failed:
+            result["status"] = "failed"
+            result["error"] = ", ".join(f"{c['setting']}: {c['error']}" for c in failed)
+            logging.error(f"❌ Failed to apply settings to bucket '{name}': {result['error']}")
+    except ClientError as e:
+        result["status"] = "failed"
+        result["error"] = e.response["Error"].get("Code", str(e))
+        logging.error(f"❌ Failed to provision bucket '{name}': {e}")
+    except BotoCoreError as e:
+        # e.g. ParamValidationError for an invalid name, EndpointConnectionError when S3 is unreachable
+        result["status"] = "failed"
+        result["error"] = type(e).__name__
+        logging.error(f"❌ Failed to provision bucket '{name}': {e}")
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def plan_buckets(specs, workers=32):
+    """Returns the dry-run diff: what would be created, what already exists, and what is taken."""
+    owned = {bucket["Name"] for bucket in s3.list_buckets().get("Buckets", [])}
+
+    def plan(spec):
+        name = spec["name"]
+        try:
+            if name in owned:
+                location = lookup_bucket_region(name) or spec["region"]  # Also maps the legacy "EU" location
+                if location != spec["region"]:
+                    return {"bucket": name, "region": spec["region"], "status": "region-mismatch", "error": f"exists in {location}"}
+                changes = apply_bucket_settings(client_for_region(location), name, spec["settings"], dry_run=True)
+                detail = ", ".join(f"~{c['setting']}" for c in changes) or None
+                return {"bucket": name, "region": spec["region"], "status": "exists", "error": detail}
+            s3.head_bucket(Bucket=name)
+            return {"bucket": name, "region": spec["region"], "status": "taken", "error": "owned by another account"}
+        except ClientError as e:
+            if e.response["Error"].get("Code") == "404":
+                return {"bucket": name, "region": spec["region"], "status": "would-create", "error": None}
+            return {"bucket": name, "region": spec["region"], "status": "taken", "error": e.response["Error"].get("Code")}
+        except BotoCoreError as e:
+            logging.error(f"❌ Failed to plan bucket '{name}': {e}")
+            return {"bucket": name, "region": spec["region"], "status": "failed", "error": type(e).__name__}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(plan, specs))
+
+def provision_buckets(specs, workers=32, dry_run=False):
+    """Creates every bucket in `specs` concurrently and returns one result per bucket."""
+    if dry_run:
+        return plan_buckets(specs, workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(provision_bucket, specs))
+
+def print_results(results, dry_run=False):
+    """Prints a per-bucket result table."""
+    symbols = {"created": "✅", "exists": "=", "would-create": "+", "failed": "❌", "taken": "❌", "region-mismatch": "⚠"}
+    print(f"\n{'📋 Dry run' if dry_run else '📋 Results'}:")
+    for result in results:
+        error = f" ({result['error']})" if result.get("error") else ""
+        print(f"{symbols.get(result['status'], '-')} {result['bucket']} [{result['region']}] {result['status']}{error}")
+
+def run_batch(spec_path, workers=32, dry_run=False):
+    """Runs batch provisioning from a spec file and returns the results."""
+    specs = load_bucket_specs(spec_path)
+    logging.info(f"🚀 Provisioning {len(specs)} buckets with {workers} workers{' (dry run)' if dry_run else ''}...")
+
+    start = time.perf_counter()
+    results = provision_buckets(specs, workers, dry_run)
+    print_results(results, dry_run)
+
+    failed = sum(1 for r in results if r["status"] in ("failed", "taken", "region-mismatch"))
+    logging.info(f"⏱ Finished {len(results)} buckets in {time.perf_counter() - start:.2f}s, {failed} failed.")
+    return results
+
+def parse_args(argv=None):
+    """Parses command-line arguments; with no arguments the script runs interactively."""
+    parser = argparse.ArgumentParser(description="Create S3 buckets interactively or from a spec file.")
+    parser.add_argument("--spec", help="YAML/JSON bucket spec file for batch mode")
+    parser.add_argument("--workers", type=int, default=32, help="Buckets created concurrently in batch mode")
+    parser.add_argument("--dry-run", action="store_true", help="Show what batch mode would change without changing it")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to create a bucket."""
+    args = parse_args(argv)
+    if args.spec:
+        results = run_batch(args.spec, args.workers, args.dry_run)
+        if any(r["status"] in ("failed", "taken", "region-mismatch") for r in results):
+            sys.exit(1)
+        return
+
     bucket_name = input("Enter a unique S3 bucket name: ").strip()
 
     if not bucket_name:
@@ -66,4 +248,5 @@ def main():
         logging.info("🎉 Core bucket setup completed successfully.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profiled():
+        main()
\ No newline at end of file
@@ -29,12 +29,10 @@ fi
 
 echo "🚀 Deleting bucket '$BUCKET_NAME'..."
 
-# Empty the bucket before deletion (required for non-empty buckets)
-aws s3api delete-objects --bucket "$BUCKET_NAME" --delete "$(aws s3api list-object-versions --bucket "$BUCKET_NAME" --query='{Objects: Versions[].{Key:Key,VersionId:VersionId}}' --output json 2>/dev/null)" 2>/dev/null
-aws s3api delete-objects --bucket "$BUCKET_NAME" --delete "$(aws s3api list-object-versions --bucket "$BUCKET_NAME" --query='{Objects: DeleteMarkers[].{Key:Key,VersionId:VersionId}}' --output json 2>/dev/null)" 2>/dev/null
-
-# Now delete the empty bucket
-aws s3api delete-bucket --bucket "$BUCKET_NAME"
+# Empty the bucket (every version, delete marker and multipart upload) with the
+# paginated, parallel Python purge engine, then delete the empty bucket
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+python3 "$SCRIPT_DIR/empty_bucket.py" "$BUCKET_NAME" --delete-bucket
 
 # Check if the bucket was deleted successfully
 if [ $? -eq 0 ]; then
@@ -0,0 +1,348 @@
+#✔ Ranged GETs: Large objects are split into byte ranges fetched concurrently.
+#✔ No Reassembly: Each range is written straight to its offset in a preallocated file with os.pwrite.
+#✔ Resumable: A checkpoint next to the partial file records finished ranges, so a restart fetches only what is missing.
+#✔ Prefix Downloads: Small and large objects under a prefix share one bounded thread pool.
+#✔ Skip Unchanged: Local files whose ETag matches the remote object are not downloaded again.
+#✔ Rate Controlled: GETs are paced by the shared per-prefix rate controller.
+#✔ Transparent Decompression: Objects written by upload_files.py --compress are decompressed to their original bytes.
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, NoCredentialsError, PartialCredentialsError, ClientError
+
+from bucket_region import RegionRoutingClient
+from compression import decompress_file, encoding_of, expected_size, iter_decompressed
+from content_hash import DEFAULT_HASH_CACHE, HashCache
+from list_s3_contents import iter_objects
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MB = 1024 * 1024
+WRITE_CHUNK_SIZE = 1 * MB
+PARTIAL_SUFFIX = ".s3partial"
+CHECKPOINT_SUFFIX = ".s3partial.json"
+
+class ObjectDownload:
+    """One object being written into a preallocated partial file, range by range."""
+
+    def __init__(self, bucket_name, key, size, etag, last_modified, path, part_size):
+        self.bucket_name = bucket_name
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.path = path
+        self.part_size = part_size
+        self.partial_path = path + PARTIAL_SUFFIX
+        self.checkpoint_path = path + CHECKPOINT_SUFFIX
+        self.part_count = max(1, -(-size // part_size))
+        self.done = set()
+        self.finished_parts = 0
+        self.failed = False
+        self.lock = threading.Lock()
+        self.fd = None
+        # Set from the GET responses of compressed objects; single-request downloads decode while streaming
+        self.encoding = None
+        self.expected_size = None
+        self.decoded_size = None
+
+    @property
+    def checkpointed(self):
+        return self.part_count > 1
+
+    def open(self):
+        """Opens the partial file, resuming from a checkpoint that still matches the object."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        checkpoint = self._load_checkpoint()
+        if checkpoint and os.path.exists(self.partial_path):
+            self.done = set(checkpoint["done"])
+            self.encoding, self.expected_size = checkpoint.get("encoding"), checkpoint.get("expected_size")
+            self.fd = os.open(self.partial_path, os.O_WRONLY)
+            if self.done:
+                logging.info(f"⏯ Resuming '{self.key}' ({len(self.done)}/{self.part_count} parts already downloaded).")
+        else:
+            self.fd = os.open(self.partial_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            # Reserve the full size up front so ranges can land at their offsets in any order
+            if self.size and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self.fd, 0, self.size)
+            else:
+                os.ftruncate(self.fd, self.size)
+            self._save_checkpoint()
+        self.finished_parts = len(self.done)
+        return [part for part in range(self.part_count) if part not in self.done]
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expected = {"bucket": self.bucket_name, "key": self.key, "size": self.size, "etag": self.etag, "part_size": self.part_size}
+        return checkpoint if all(checkpoint.get(k) == v for k, v in expected.items()) else None
+
+    def _save_checkpoint(self):
+        if not self.checkpointed:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "bucket": self.bucket_name, "key": self.key, "size": self.size, "etag": self.etag,
+                "part_size": self.part_size, "done": sorted(self.done),
+                "encoding": self.encoding, "expected_size": self.expected_size
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def fetch_part(self, s3, part, max_attempts=5):
+        """Downloads one byte range and writes it at its offset; returns the bytes written."""
+        start = part * self.part_size
+        end = min(start + self.part_size, self.size) - 1
+        kwargs = {"Bucket": self.bucket_name, "Key": self.key, "IfMatch": self.etag}
+        if self.checkpointed:
+            kwargs["Range"] = f"bytes={start}-{end}"
+
+        controller = shared_controller()
+        for attempt in range(max_attempts):
+            offset = start
+            try:
+                with controller.slot(self.bucket_name, self.key, "read", timed=False):
+                    response = s3.get_object(**kwargs)
+                    chunks = response["Body"].iter_chunks(WRITE_CHUNK_SIZE)
+                    encoding = encoding_of(response)
+                    if encoding:
+                        self.encoding, self.expected_size = encoding, expected_size(response)
+                        if not self.checkpointed:
+                            chunks = iter_decompressed(chunks, encoding)
+                    for chunk in chunks:
+                        # pwrite may write less than asked, so loop until the chunk is on disk
+                        view = memoryview(chunk)
+                        while view:
+                            written = os.pwrite(self.fd, view, offset)
+                            offset += written
+                            view = view[written:]
+                if encoding and not self.checkpointed:
+                    self.decoded_size = offset - start
+                return offset - start
+            except ClientError as e:
+                # PreconditionFailed means the object changed since we started; retrying won't help
+                if e.response["Error"].get("Code") in ("PreconditionFailed", "412") or attempt == max_attempts - 1:
+                    raise
+            except BotoCoreError:
+                # Connection drops mid-body are not retried by botocore, so retry the whole range
+                if attempt == max_attempts - 1:
+                    raise
+            time.sleep(min(10.0, 0.5 * 2 ** attempt))
+
+    def part_finished(self, part, ok):
+        """Records a finished part; returns True once every part has been attempted."""
+        with self.lock:
+            self.finished_parts += 1
+            if ok:
+                self.done.add(part)
+                self._save_checkpoint()
+            else:
+                self.failed = True
+            return self.finished_parts == self.part_count
+
+    def _decode(self):
+        """Turns a fully downloaded compressed object into the original file; returns False if it does not decode."""
+        size = self.decoded_size
+        if self.checkpointed:
+            decoded_path = self.partial_path + ".decoded"
+            try:
+                size = decompress_file(self.partial_path, decoded_path, self.encoding)
+                os.replace(decoded_path, self.partial_path)
+            except ValueError as e:
+                logging.error(f"❌ '{self.key}' is not valid {self.encoding} data: {e}")
+                os.remove(decoded_path)
+                size = None
+        if size != self.expected_size:
+            if size is not None:
+                logging.error(f"❌ '{self.key}' decompressed to {size} bytes instead of {self.expected_size}.")
+            if self.checkpointed:
+                os.remove(self.checkpoint_path)  # The ranges themselves are suspect, so start over next time
+            return False
+        return True
+
+    def close(self):
+        """Closes the partial file and, if every range arrived, moves it into place (decompressed if need be)."""
+        if not self.failed:
+            if self.decoded_size is not None:
+                os.ftruncate(self.fd, self.decoded_size)  # The file was preallocated at the compressed size
+            os.fsync(self.fd)
+        os.close(self.fd)
+        if not self.failed and self.encoding and not self._decode():
+            self.failed = True
+            if self.checkpointed:
+                os.remove(self.partial_path)
+        if self.failed:
+            if not self.checkpointed:
+                os.remove(self.partial_path)  # Nothing to resume for a single-request download
+            return False
+
+        os.replace(self.partial_path, self.path)
+        if self.checkpointed:
+            os.remove(self.checkpoint_path)
+        if self.last_modified is not None:
+            mtime = self.last_modified.timestamp()
+            os.utime(self.path, (mtime, mtime))
+        return True
+
+def local_path_for(dest_dir, key, prefix=""):
+    """Maps a key under `prefix` to a path under `dest_dir`, refusing keys that would escape it."""
+    base = prefix[:prefix.rfind("/") + 1]
+    relative = key[len(base):] if key.startswith(base) else key
+    path = os.path.normpath(os.path.join(dest_dir, *relative.split("/")))
+    if os.path.commonpath([os.path.abspath(path), os.path.abspath(dest_dir)]) != os.path.abspath(dest_dir):
+        raise ValueError(f"Key '{key}' resolves outside '{dest_dir}'")
+    return path
+
+def download_objects(objects, bucket_name, dest_for, workers=16, part_size_mb=16, multipart_threshold_mb=32,
+                     skip_unchanged=True, hash_cache_path=DEFAULT_HASH_CACHE, s3=None):
+    """Downloads list_objects_v2-style objects concurrently and returns a throughput summary.
+
+    Small objects are one task each; large objects are split into ranged-GET
+    tasks. Both kinds share the same pool, and at most `workers * 2` tasks are
+    queued at once.
+    """
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers)
+    part_size = part_size_mb * MB
+    hash_cache = HashCache(hash_cache_path) if skip_unchanged else None
+    summary = {"files": 0, "bytes": 0, "failed": 0, "skipped": 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def run(download, part):
+        written, ok = 0, True
+        try:
+            written = download.fetch_part(s3, part)
+        except (BotoCoreError, ClientError, OSError, ValueError) as e:
+            logging.error(f"❌ Failed to download part {part + 1}/{download.part_count} of '{download.key}': {e}")
+            ok = False
+        finally:
+            in_flight.release()
+
+        with lock:
+            summary["bytes"] += written
+        if download.part_finished(part, ok):
+            completed = download.close()
+            if completed and download.encoding and hash_cache:
+                # The local file won't hash to the compressed object's ETag, so remember the pairing
+                hash_cache.remember_stored(download.path, download.etag)
+            with lock:
+                summary["files" if completed else "failed"] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for obj in objects:
+            try:
+                path = dest_for(obj["Key"])
+            except ValueError as e:
+                logging.error(f"❌ Skipping '{obj['Key']}': {e}")
+                with lock:
+                    summary["failed"] += 1
+                continue
+            etag = obj["ETag"]
+            if hash_cache and os.path.isfile(path) and (
+                    os.path.getsize(path) == obj["Size"] and hash_cache.matches_remote(path, etag)
+                    or hash_cache.stored_as(path, etag)):
+                summary["skipped"] += 1
+                continue
+
+            object_part_size = part_size if obj["Size"] > multipart_threshold_mb * MB else max(obj["Size"], 1)
+            download = ObjectDownload(bucket_name, obj["Key"], obj["Size"], etag, obj.get("LastModified"), path, object_part_size)
+            try:
+                pending = download.open()
+            except OSError as e:
+                logging.error(f"❌ Cannot write '{path}': {e}")
+                summary["failed"] += 1
+                continue
+
+            if not pending:
+                # Every range arrived before an interruption; only the final rename is left
+                summary["files"] += download.close()
+                continue
+            for part in pending:
+                in_flight.acquire()
+                executor.submit(run, download, part)
+
+    summary["seconds"] = time.perf_counter() - start
+    log_summary(summary)
+    return summary
+
+def download_prefix(bucket_name, prefix, dest_dir, workers=16, **kwargs):
+    """Downloads every object under a prefix into `dest_dir`, keeping the key hierarchy."""
+    return download_objects(
+        iter_objects(bucket_name, prefix=prefix), bucket_name,
+        lambda key: local_path_for(dest_dir, key, prefix), workers, **kwargs
+    )
+
+def download_object(bucket_name, key, dest_path, workers=16, s3=None, **kwargs):
+    """Downloads a single object to `dest_path`, splitting it into ranges if it is large."""
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers)
+    head = s3.head_object(Bucket=bucket_name, Key=key)
+    obj = {"Key": key, "Size": head["ContentLength"], "ETag": head["ETag"], "LastModified": head["LastModified"]}
+    return download_objects([obj], bucket_name, lambda _: dest_path, workers, s3=s3, **kwargs)
+
+def log_summary(summary):
+    """Logs files/s and MB/s for a finished run."""
+    seconds = max(summary["seconds"], 1e-9)
+    megabytes = summary["bytes"] / MB
+    logging.info(
+        f"📊 Downloaded {summary['files']} files ({megabytes:.2f} MB) in {summary['seconds']:.2f}s | "
+        f"{summary['files'] / seconds:.1f} files/s | {megabytes / seconds:.2f} MB/s | {summary['failed']} failed"
+    )
+    if summary["skipped"]:
+        logging.info(f"⏭ Skipped {summary['skipped']} unchanged files")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Download an object or prefix from S3 with parallel ranged GETs.")
+    parser.add_argument("bucket_name", help="Source S3 bucket")
+    parser.add_argument("source", help="Object key, or prefix (ending in '/') to download recursively")
+    parser.add_argument("destination", help="Local file (single object) or directory (prefix)")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent GET requests")
+    parser.add_argument("--part-size-mb", type=int, default=16, help="Byte-range size for large objects in MB")
+    parser.add_argument("--multipart-threshold-mb", type=int, default=32, help="Objects above this size are split into ranges")
+    parser.add_argument("--no-skip-unchanged", action="store_true", help="Download even if the local file's ETag matches")
+    parser.add_argument("--hash-cache", default=DEFAULT_HASH_CACHE, help="Path of the SQLite hash cache")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to download files."""
+    args = parse_args(argv)
+    options = dict(
+        part_size_mb=args.part_size_mb, multipart_threshold_mb=args.multipart_threshold_mb,
+        skip_unchanged=not args.no_skip_unchanged, hash_cache_path=args.hash_cache
+    )
+
+    try:
+        if args.source == "" or args.source.endswith("/"):
+            summary = download_prefix(args.bucket_name, args.source, args.destination, args.workers, **options)
+        else:
+            destination = args.destination
+            if os.path.isdir(destination):
+                destination = os.path.join(destination, args.source.rsplit("/", 1)[-1])
+            summary = download_object(args.bucket_name, args.source, destination, args.workers, **options)
+    except (NoCredentialsError, PartialCredentialsError):
+        logging.error("❌ AWS credentials not found or misconfigured. Run 'aws configure'.")
+        sys.exit(1)
+    except ClientError as e:
+        logging.error(f"❌ Failed to download 's3://{args.bucket_name}/{args.source}': {e}")
+        sys.exit(1)
+
+    if summary["failed"]:
+        sys.exit(1)
+    logging.info("✅ Download process completed.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
@@ -0,0 +1,167 @@
+#✔ Paginated Purge: Streams every object version and delete marker page by page (no 1,000-key limit).
+#✔ Concurrent Batches: Deletes in 1,000-key DeleteObjects batches issued in parallel.
+#✔ Partial-Failure Retry: Keys reported in a batch's Errors list are retried with backoff.
+#✔ Progress Reporting: Logs objects deleted per second while it runs.
+#✔ Rate Controlled: Batches are paced by the shared per-prefix rate controller (each key counts as one DELETE).
+
+import sys
+import time
+import random
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from bucket_region import RegionRoutingClient
+from rate_control import MAX_TOTAL_ATTEMPTS, attempts_made, shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DELETE_BATCH_SIZE = 1000  # DeleteObjects accepts at most 1,000 keys per request
+RETRYABLE_CODES = {"SlowDown", "InternalError", "ServiceUnavailable", "RequestTimeout", "503", "500"}
+
+def iter_version_batches(s3, bucket_name, prefix=""):
+    """Yields lists of up to 1,000 {Key, VersionId} entries covering every version and delete marker."""
+    paginator = s3.get_paginator("list_object_versions")
+    batch = []
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for entry in page.get("Versions", []) + page.get("DeleteMarkers", []):
+            batch.append({"Key": entry["Key"], "VersionId": entry["VersionId"]})
+            if len(batch) == DELETE_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def delete_batch(s3, bucket_name, batch, max_attempts=6):
+    """Deletes one batch, retrying keys that failed with retryable errors. Returns (deleted, failed)."""
+    controller = shared_controller()
+    pending = batch
+    deleted = 0
+    requests = 0  # HTTP attempts of whole-request failures, including botocore's own retries
+    for attempt in range(max_attempts):
+        try:
+            with controller.slot(bucket_name, pending[0]["Key"], "write", cost=len(pending)):
+                response = s3.delete_objects(Bucket=bucket_name, Delete={"Objects": pending, "Quiet": True})
+        except ClientError as e:
+            requests += attempts_made(e)
+            code = e.response["Error"].get("Code")
+            if code not in RETRYABLE_CODES or attempt == max_attempts - 1 or requests >= MAX_TOTAL_ATTEMPTS:
+                raise
+            time.sleep(min(10.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.5))
+            continue
+
+        # With Quiet=True only failures are reported
+        errors = response.get("Errors", [])
+        if any(e.get("Code") == "SlowDown" for e in errors):
+            controller.throttled(bucket_name, pending[0]["Key"], "write")
+        deleted += len(pending) - len(errors)
+        retryable = [{"Key": e["Key"], "VersionId": e["VersionId"]} for e in errors if e.get("Code") in RETRYABLE_CODES]
+        permanent = [e for e in errors if e.get("Code") not in RETRYABLE_CODES]
+        for error in permanent:
+            logging.error(f"❌ Could not delete '{error['Key']}' ({error.get('VersionId')}): {error.get('Code')}")
+        if not retryable:
+            return deleted, len(permanent)
+        pending = retryable
+        if attempt < max_attempts - 1:  # No point waiting after the last attempt
+            time.sleep(min(10.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.5))
+
+    logging.error(f"❌ Gave up on {len(pending)} keys after {max_attempts} attempts.")
+    return deleted, len(pending)
+
+def abort_multipart_uploads(s3, bucket_name, prefix="", initiated_before=None):
+    """Aborts in-progress multipart uploads (only those started before `initiated_before`, if given)."""
+    aborted = 0
+    paginator = s3.get_paginator("list_multipart_uploads")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+        for upload in page.get("Uploads", []):
+            if initiated_before is not None and upload["Initiated"] >= initiated_before:
+                continue
+            s3.abort_multipart_upload(Bucket=bucket_name, Key=upload["Key"], UploadId=upload["UploadId"])
+            aborted += 1
+    return aborted
+
+def purge_bucket(bucket_name, prefix="", workers=16, s3=None, progress_interval=5.0):
+    """Deletes every object version, delete marker and multipart upload under a prefix.
+
+    Listing continues while earlier batches are being deleted; at most
+    `workers * 2` batches are queued at once so memory stays bounded.
+    """
+    s3 = s3 or RegionRoutingClient(max_pool_connections=workers)
+    summary = {"deleted": 0, "failed": 0}
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    start = time.perf_counter()
+    last_report = [start]
+
+    def run(batch):
+        try:
+            deleted, failed = delete_batch(s3, bucket_name, batch)
+        except (BotoCoreError, ClientError) as e:
+            logging.error(f"❌ Batch of {len(batch)} keys failed: {e}")
+            deleted, failed = 0, len(batch)
+        finally:
+            in_flight.release()
+
+        with lock:
+            summary["deleted"] += deleted
+            summary["failed"] += failed
+            now = time.perf_counter()
+            if now - last_report[0] >= progress_interval:
+                last_report[0] = now
+                rate = summary["deleted"] / (now - start)
+                logging.info(f"🗑 {summary['deleted']} deleted so far ({rate:.0f} objects/s)...")
+
+    logging.info(f"🚀 Emptying 's3://{bucket_name}/{prefix}' with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in iter_version_batches(s3, bucket_name, prefix):
+            in_flight.acquire()
+            executor.submit(run, batch)
+
+    summary["aborted_uploads"] = abort_multipart_uploads(s3, bucket_name, prefix)
+    summary["seconds"] = time.perf_counter() - start
+    rate = summary["deleted"] / max(summary["seconds"], 1e-9)
+    logging.info(
+        f"📊 Deleted {summary['deleted']} versions/markers in {summary['seconds']:.2f}s ({rate:.0f} objects/s), "
+        f"{summary['failed']} failed, {summary['aborted_uploads']} multipart uploads aborted."
+    )
+    return summary
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Delete every object version in an S3 bucket, in parallel.")
+    parser.add_argument("bucket_name", help="Bucket to empty")
+    parser.add_argument("--prefix", default="", help="Only purge keys under this prefix")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent DeleteObjects requests")
+    parser.add_argument("--delete-bucket", action="store_true", help="Delete the bucket once it is empty")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to empty (and optionally delete) a bucket."""
+    args = parse_args(argv)
+    s3 = RegionRoutingClient(max_pool_connections=args.workers)
+
+    try:
+        summary = purge_bucket(args.bucket_name, args.prefix, args.workers, s3)
+    except ClientError as e:
+        logging.error(f"❌ Failed to empty bucket '{args.bucket_name}': {e}")
+        sys.exit(1)
+
+    if summary["failed"]:
+        logging.error("❌ Some objects could not be deleted; the bucket is not empty.")
+        sys.exit(1)
+
+    if args.delete_bucket:
+        try:
+            s3.delete_bucket(Bucket=args.bucket_name)
+            logging.info(f"✅ Bucket '{args.bucket_name}' deleted successfully.")
+        except ClientError as e:
+            logging.error(f"❌ Failed to delete bucket '{args.bucket_name}': {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    with profiled():
+        main()
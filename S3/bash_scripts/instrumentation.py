@@ -0,0 +1,287 @@
+#✔ Per-Operation Metrics: Counts calls, errors, retries and bytes for every S3 API operation via botocore events.
+#✔ Latency Histograms: Log-bucketed histograms give p50/p95/p99 per operation with bounded memory.
+#✔ Connection Pool: Measures time spent waiting for a pooled connection and how many new connections were opened.
+#✔ --profile: Any script run with --profile prints a summary table; --profile=FILE/:PORT exports JSON or OpenMetrics.
+
+import os
+import sys
+import json
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from botocore.utils import determine_content_length
+
+# Histogram bucket i covers [1.05^i - 1, 1.05^(i+1) - 1) ms, so percentiles are accurate to within 5%
+LATENCY_GROWTH = 1.05
+LATENCY_BUCKETS = int(math.log(3600 * 1000 + 1, LATENCY_GROWTH)) + 1
+
+def latency_bucket(milliseconds):
+    """Returns the histogram bucket for a latency in milliseconds."""
+    return min(LATENCY_BUCKETS - 1, int(math.log(milliseconds + 1, LATENCY_GROWTH)))
+
+def percentiles(histogram, fractions=(0.5, 0.9, 0.99)):
+    """Returns approximate latency percentiles (ms) from a histogram."""
+    total = sum(histogram)
+    if not total:
+        return [None] * len(fractions)
+    results = []
+    for fraction in fractions:
+        target, seen = fraction * total, 0
+        for i, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                results.append(round(LATENCY_GROWTH ** (i + 0.5) - 1, 1))  # Bucket midpoint
+                break
+    return results
+
+class OperationStats:
+    """Running totals for one API operation."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.histogram = [0] * LATENCY_BUCKETS
+
+    def as_dict(self):
+        p50, p95, p99 = percentiles(self.histogram, (0.5, 0.95, 0.99))
+        return {
+            "calls": self.calls, "errors": self.errors, "retries": self.retries,
+            "bytes_sent": self.bytes_sent, "bytes_received": self.bytes_received,
+            "seconds": round(self.seconds, 3), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+        }
+
+class ApiMetrics:
+    """Process-wide S3 API metrics, fed by botocore event handlers."""
+
+    def __init__(self):
+        self.operations = {}
+        self.pool_wait_seconds = 0.0
+        self.pool_wait_max = 0.0
+        self.pool_checkouts = 0
+        self.new_connections = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    # ---------- botocore event handlers ----------
+    def before_call(self, model, params, context, **kwargs):
+        length = params.get("headers", {}).get("Content-Length")
+        if length is None and params.get("body") is not None:
+            length = determine_content_length(params["body"])  # bytes, str or a seekable file; None if unknown
+        context["metrics"] = (model.name, time.perf_counter(), int(length or 0))
+
+    def after_call(self, http_response, parsed, model, context, **kwargs):
+        operation, start, sent = context.pop("metrics", (None, None, 0))
+        if operation is None:
+            return
+        # HEAD responses carry the object's Content-Length but no body
+        received = 0 if model.http.get("method") == "HEAD" else int(http_response.headers.get("content-length") or 0)
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        self._record(operation, time.perf_counter() - start, http_response.status_code >= 400, retries, sent, received)
+
+    def after_call_error(self, context, **kwargs):
+        operation, start, sent = context.pop("metrics", (None, None, 0))
+        if operation is not None:
+            self._record(operation, time.perf_counter() - start, True, 0, sent, 0)
+
+    def _record(self, operation, seconds, error, retries, sent, received):
+        with self.lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = OperationStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.retries += retries
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+            stats.seconds += seconds
+            stats.histogram[latency_bucket(seconds * 1000)] += 1
+
+    def pool_checkout(self, seconds):
+        with self.lock:
+            self.pool_checkouts += 1
+            self.pool_wait_seconds += seconds
+            self.pool_wait_max = max(self.pool_wait_max, seconds)
+
+    def connection_opened(self):
+        with self.lock:
+            self.new_connections += 1
+
+    # ---------- Reports ----------
+    def snapshot(self):
+        """Returns every metric as a JSON-serializable dict."""
+        with self.lock:
+            return {
+                "wall_seconds": round(time.perf_counter() - self.started, 3),
+                "operations": {name: stats.as_dict() for name, stats in sorted(self.operations.items())},
+                "connection_pool": {
+                    "checkouts": self.pool_checkouts, "new_connections": self.new_connections,
+                    "wait_seconds": round(self.pool_wait_seconds, 4), "max_wait_ms": round(self.pool_wait_max * 1000, 2),
+                },
+            }
+
+    def print_summary(self, file=sys.stderr):
+        """Prints one row per operation, slowest (by total time) first."""
+        snapshot = self.snapshot()
+        rows = sorted(snapshot["operations"].items(), key=lambda item: -item[1]["seconds"])
+        print(f"\n⏱ S3 API profile ({snapshot['wall_seconds']:.2f}s wall):", file=file)
+        print(f"{'operation':<34} {'calls':>8} {'errors':>7} {'retries':>8} {'sent MB':>9} {'recv MB':>9} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'total s':>9}", file=file)
+        for name, stats in rows:
+            print(f"{name:<34} {stats['calls']:>8,} {stats['errors']:>7,} {stats['retries']:>8,} "
+                  f"{stats['bytes_sent'] / 1024 ** 2:>9.2f} {stats['bytes_received'] / 1024 ** 2:>9.2f} "
+                  f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['seconds']:>9.2f}", file=file)
+        pool = snapshot["connection_pool"]
+        if pool["checkouts"]:  # aiobotocore pools connections in aiohttp, which is not hooked
+            print(f"🔌 Connection pool: {pool['checkouts']:,} checkouts, {pool['new_connections']:,} new connections, "
+                  f"{pool['wait_seconds']:.3f}s waiting (max {pool['max_wait_ms']} ms)", file=file)
+
+    def openmetrics(self):
+        """Returns the metrics in OpenMetrics text format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.extend(samples)
+
+        operations = snapshot["operations"]
+        label = lambda op, quantile=None: (
+            f'{{operation="{op}"}}' if quantile is None else f'{{operation="{op}",quantile="{quantile}"}}'
+        )
+        family("s3_api_calls", "counter", "S3 API calls.",
+               [f"s3_api_calls_total{label(op)} {s['calls']}" for op, s in operations.items()])
+        family("s3_api_errors", "counter", "S3 API calls that failed.",
+               [f"s3_api_errors_total{label(op)} {s['errors']}" for op, s in operations.items()])
+        family("s3_api_retries", "counter", "Retried attempts within S3 API calls.",
+               [f"s3_api_retries_total{label(op)} {s['retries']}" for op, s in operations.items()])
+        family("s3_api_sent_bytes", "counter", "Request body bytes sent.",
+               [f"s3_api_sent_bytes_total{label(op)} {s['bytes_sent']}" for op, s in operations.items()])
+        family("s3_api_received_bytes", "counter", "Response body bytes received.",
+               [f"s3_api_received_bytes_total{label(op)} {s['bytes_received']}" for op, s in operations.items()])
+
+        samples = []
+        for op, s in operations.items():
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                samples.append(f"s3_api_call_duration_seconds{label(op, quantile)} {s[key] / 1000}")
+            samples.append(f"s3_api_call_duration_seconds_sum{label(op)} {s['seconds']}")
+            samples.append(f"s3_api_call_duration_seconds_count{label(op)} {s['calls']}")
+        family("s3_api_call_duration_seconds", "summary", "S3 API call latency, retries included.", samples)
+
+        pool = snapshot["connection_pool"]
+        family("s3_connection_pool_wait_seconds", "counter", "Time spent waiting for a pooled connection.",
+               [f"s3_connection_pool_wait_seconds_total {pool['wait_seconds']}"])
+        family("s3_connections_opened", "counter", "New HTTP connections opened.",
+               [f"s3_connections_opened_total {pool['new_connections']}"])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Writes the metrics to `path`: JSON for *.json, OpenMetrics text otherwise."""
+        with open(path, "w") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.openmetrics())
+        logging.info(f"💾 Wrote S3 API metrics to '{path}'.")
+
+    def serve(self, port):
+        """Serves /metrics in OpenMetrics format from a background thread (for long-running scripts)."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.openmetrics().encode()
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logging.info(f"📡 Serving S3 API metrics on http://localhost:{port}/metrics")
+        return server
+
+# ================= Wiring =================
+_metrics = None
+
+def metrics():
+    """Returns the active ApiMetrics, or None if profiling is off."""
+    return _metrics
+
+def enable():
+    """Turns profiling on for clients created from now on and hooks the connection pool."""
+    global _metrics
+    if _metrics is None:
+        _metrics = ApiMetrics()
+        _hook_connection_pool(_metrics)
+    return _metrics
+
+def attach(client):
+    """Registers the metrics handlers on a (botocore or aiobotocore) client if profiling is on."""
+    if _metrics is not None:
+        client.meta.events.register("before-call.s3", _metrics.before_call)
+        client.meta.events.register("after-call.s3", _metrics.after_call)
+        client.meta.events.register("after-call-error.s3", _metrics.after_call_error)
+    return client
+
+def _hook_connection_pool(api_metrics):
+    """Times urllib3 pool checkouts and counts new connections (botocore has no events for these)."""
+    try:
+        from urllib3.connectionpool import HTTPConnectionPool
+    except ImportError:
+        return
+    get_conn, new_conn = HTTPConnectionPool._get_conn, HTTPConnectionPool._new_conn
+
+    def timed_get_conn(pool, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return get_conn(pool, *args, **kwargs)
+        finally:
+            api_metrics.pool_checkout(time.perf_counter() - start)
+
+    def counted_new_conn(pool, *args, **kwargs):
+        api_metrics.connection_opened()
+        return new_conn(pool, *args, **kwargs)
+
+    HTTPConnectionPool._get_conn = timed_get_conn
+    HTTPConnectionPool._new_conn = counted_new_conn
+
+@contextmanager
+def profiled(argv=None):
+    """Enables profiling for a script run with --profile (or S3_PROFILE=1), reporting when it finishes.
+
+    --profile=metrics.json or --profile=metrics.prom also exports the metrics to a file;
+    --profile=:9102 serves them for scraping while the script runs. The flag is
+    removed from `argv` (default sys.argv) so the script's own parser never sees it.
+    """
+    argv = sys.argv if argv is None else argv
+    target = os.environ.get("S3_PROFILE")
+    for arg in list(argv[1:]):
+        if arg == "--profile" or arg.startswith("--profile="):
+            argv.remove(arg)
+            target = arg.partition("=")[2] or target or "1"
+    if not target:
+        yield None
+        return
+
+    api_metrics = enable()
+    if target.startswith(":"):
+        api_metrics.serve(int(target[1:]))
+    try:
+        yield api_metrics
+    finally:
+        api_metrics.print_summary()
+        if target not in ("1", "true") and not target.startswith(":"):
+            api_metrics.export(target)
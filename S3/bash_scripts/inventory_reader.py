@@ -0,0 +1,179 @@
+#✔ Latest Report Discovery: Finds the newest inventory manifest.json for a bucket from its inventory configuration.
+#✔ Streaming Reads: Decompresses gzipped CSV data files on the fly, row by row, without staging them on disk.
+#✔ ORC / Parquet: Reads columnar inventory files batch by batch when pyarrow is installed.
+#✔ Same Interface: Yields the same object dicts as list_s3_contents.iter_objects(), with the same filters.
+
+import io
+import re
+import csv
+import gzip
+import json
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+from bucket_region import RegionRoutingClient
+from list_s3_contents import _keep_object, format_object, newest_objects
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Shared S3 client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
+
+# Report folders are named after their delivery time, e.g. 2024-06-01T01-00Z/
+REPORT_FOLDER = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z/$")
+
+def inventory_destination(source_bucket, config_id="InventoryConfig"):
+    """Returns (destination_bucket, key_prefix) where a bucket's inventory reports are delivered."""
+    config = s3.get_bucket_inventory_configuration(Bucket=source_bucket, Id=config_id)["InventoryConfiguration"]
+    destination = config["Destination"]["S3BucketDestination"]
+    destination_bucket = destination["Bucket"].split(":::")[-1]
+    prefix = destination.get("Prefix", "").strip("/")
+    prefix = f"{prefix}/" if prefix else ""
+    return destination_bucket, f"{prefix}{source_bucket}/{config_id}/"
+
+def latest_manifest(source_bucket, config_id="InventoryConfig"):
+    """Loads the newest manifest.json for a bucket's inventory configuration."""
+    destination_bucket, report_prefix = inventory_destination(source_bucket, config_id)
+
+    folders = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=destination_bucket, Prefix=report_prefix, Delimiter="/"):
+        folders.extend(p["Prefix"] for p in page.get("CommonPrefixes", []) if REPORT_FOLDER.search(p["Prefix"]))
+
+    if not folders:
+        raise FileNotFoundError(f"No inventory reports found under s3://{destination_bucket}/{report_prefix}")
+
+    manifest_key = max(folders) + "manifest.json"
+    body = s3.get_object(Bucket=destination_bucket, Key=manifest_key)["Body"]
+    manifest = json.load(body)
+    manifest["manifestBucket"] = destination_bucket
+    manifest["manifestKey"] = manifest_key
+    logging.info(f"📦 Using inventory report s3://{destination_bucket}/{manifest_key} ({len(manifest['files'])} data files).")
+    return manifest
+
+def _parse_row(row):
+    """Converts an inventory row (field name → raw value) into a list_objects_v2-style object dict."""
+    obj = {"Key": row["Key"]}
+    if row.get("Size") not in (None, ""):
+        obj["Size"] = int(row["Size"])
+    last_modified = row.get("LastModifiedDate")
+    if isinstance(last_modified, str) and last_modified:
+        obj["LastModified"] = datetime.fromisoformat(last_modified.replace("Z", "+00:00"))
+    elif last_modified is not None:
+        obj["LastModified"] = last_modified  # Already a timestamp in ORC/Parquet
+    if row.get("ETag"):
+        obj["ETag"] = f'"{row["ETag"].strip(chr(34))}"'
+    for field in ("StorageClass", "VersionId"):
+        if row.get(field):
+            obj[field] = row[field]
+    for field in ("IsLatest", "IsDeleteMarker"):
+        if row.get(field) not in (None, ""):
+            obj[field] = row[field] in (True, "true")
+    return obj
+
+def _iter_csv_rows(manifest_bucket, data_key, fields):
+    """Streams one gzipped CSV data file, decompressing as it is read."""
+    body = s3.get_object(Bucket=manifest_bucket, Key=data_key)["Body"]
+    with gzip.GzipFile(fileobj=body) as compressed, io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+        for values in csv.reader(text):
+            row = dict(zip(fields, values))
+            row["Key"] = unquote_plus(row["Key"])  # CSV inventory keys are URL-encoded
+            yield row
+
+def _iter_columnar_rows(manifest_bucket, data_key, file_format, batch_size=65536):
+    """Reads one ORC or Parquet data file batch by batch through a temporary file."""
+    try:
+        import pyarrow.orc as orc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"pyarrow is required to read {file_format} inventory reports (pip install pyarrow)")
+
+    with tempfile.TemporaryFile() as spool:
+        s3.download_fileobj(manifest_bucket, data_key, spool)
+        spool.seek(0)
+        if file_format == "Parquet":
+            batches = pq.ParquetFile(spool).iter_batches(batch_size=batch_size)
+        else:
+            reader = orc.ORCFile(spool)
+            batches = (reader.read_stripe(i) for i in range(reader.nstripes))
+
+        for batch in batches:
+            # Columnar reports use lower-case field names (key, size, last_modified_date, ...)
+            columns = {_field_name(name): batch.column(i).to_pylist() for i, name in enumerate(batch.schema.names)}
+            for values in zip(*columns.values()):
+                yield dict(zip(columns.keys(), values))
+
+def _field_name(column):
+    """Maps a columnar field name (e.g. last_modified_date) to the CSV schema name (LastModifiedDate)."""
+    special = {"e_tag": "ETag", "version_id": "VersionId"}
+    return special.get(column, "".join(part.capitalize() for part in column.split("_")))
+
+def iter_inventory_rows(manifest):
+    """Yields raw rows from every data file listed in a manifest, one file at a time."""
+    file_format = manifest.get("fileFormat", "CSV")
+    fields = [field.strip() for field in manifest.get("fileSchema", "").split(",")]
+    for data_file in manifest["files"]:
+        if file_format == "CSV":
+            yield from _iter_csv_rows(manifest["manifestBucket"], data_file["key"], fields)
+        else:
+            yield from _iter_columnar_rows(manifest["manifestBucket"], data_file["key"], file_format)
+
+def iter_inventory_objects(source_bucket, prefix="", file_extension=None, config_id="InventoryConfig",
+                           manifest=None, include_versions=False):
+    """Yields objects from the latest inventory report, like list_s3_contents.iter_objects().
+
+    Only current, non-delete-marker versions are yielded unless `include_versions` is set.
+    """
+    manifest = manifest or latest_manifest(source_bucket, config_id)
+    for row in iter_inventory_rows(manifest):
+        if prefix and not row["Key"].startswith(prefix):
+            continue
+        obj = _parse_row(row)
+        if not include_versions and (obj.get("IsDeleteMarker") or obj.get("IsLatest") is False):
+            continue
+        if _keep_object(obj, file_extension):
+            yield obj
+
+def size_report(objects):
+    """Returns total object count and bytes per storage class."""
+    report = {}
+    for obj in objects:
+        entry = report.setdefault(obj.get("StorageClass", "STANDARD"), {"objects": 0, "bytes": 0})
+        entry["objects"] += 1
+        entry["bytes"] += obj.get("Size", 0)
+    return report
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="List or summarize a bucket from its latest S3 Inventory report.")
+    parser.add_argument("bucket_name", help="Source bucket the inventory describes")
+    parser.add_argument("--config-id", default="InventoryConfig", help="Inventory configuration Id")
+    parser.add_argument("--prefix", default="", help="Only include keys under this prefix")
+    parser.add_argument("--extension", help="Only include keys with this extension (e.g. .csv)")
+    parser.add_argument("--newest", type=int, help="Only show the N most recently modified objects")
+    parser.add_argument("--sizes", action="store_true", help="Print a size report per storage class instead of keys")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to read an inventory report."""
+    args = parse_args(argv)
+    objects = iter_inventory_objects(args.bucket_name, args.prefix, args.extension, args.config_id)
+
+    if args.sizes:
+        for storage_class, entry in sorted(size_report(objects).items()):
+            print(f"- {storage_class}: {entry['objects']} objects | {entry['bytes'] / 1024 ** 3:.2f} GB")
+        return
+
+    if args.newest:
+        objects = newest_objects(objects, args.newest)
+    for obj in objects:
+        print(format_object(obj))
+
+if __name__ == "__main__":
+    with profiled():
+        main()
@@ -1,21 +1,30 @@
 #✔ Multi-threading for Faster Execution: Runs directory & object listing in parallel.
+#✔ Sharded Parallel Listing: Splits large buckets into prefix/character-range shards and lists them concurrently.
 #✔ Better Error Handling: Detects missing credentials, bucket permissions, and API failures.
-#✔ Sorting & Formatting: Lists files sorted by last modified date and displays size in KB.
+#✔ Streaming Pagination: Follows continuation tokens, so buckets with millions of keys list completely in bounded memory.
+#✔ Sorting & Formatting: Shows the newest N files via a bounded heap and displays size in KB.
 #✔ File Type Filtering: Allows optional filtering by file extension (e.g., .jpg, .csv).
 #✔ Security Enhancements: Ensures access permissions before running.
 #✔ User Confirmation: Warns user if the bucket name isn't found in AWS.
 
-import boto3
 import sys
+import time
+import heapq
+import queue
+import string
 import logging
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 
+from bucket_region import RegionRoutingClient
+from instrumentation import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-# Initialize S3 client
-s3 = boto3.client("s3")
+# Shared S3 client, created on first use and routed to each bucket's region
+s3 = RegionRoutingClient()
 
 def list_s3_buckets():
     """Lists all available S3 buckets."""
@@ -56,48 +65,236 @@ def list_directories(bucket_name):
     """Lists directories (folders) in an S3 bucket."""
     print(f"\n📁 Listing directories in 's3://{bucket_name}/'...")
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Delimiter="/")
-        folders = [prefix["Prefix"].rstrip("/") for prefix in response.get("CommonPrefixes", [])]  # Remove trailing slashes
+        paginator = s3.get_paginator("list_objects_v2")
+        found = False
+        for page in paginator.paginate(Bucket=bucket_name, Delimiter="/"):
+            for prefix in page.get("CommonPrefixes", []):
+                found = True
+                print(f"- {prefix['Prefix'].rstrip('/')}")  # Remove trailing slashes
 
-        if folders:
-            for folder in folders:
-                print(f"- {folder}")
-        else:
+        if not found:
             print("⚠ No directories found.")
     except Exception as e:
         logging.error(f"❌ Error fetching directories: {e}")
 
-def list_objects(bucket_name, file_extension=None):
-    """Lists files in an S3 bucket, excluding folders."""
-    print(f"\n📄 Listing objects (files) in 's3://{bucket_name}/'...")
-    try:
-        response = s3.list_objects_v2(Bucket=bucket_name)
-        files = response.get("Contents", [])
+def clean_key(key):
+    """Removes the "Home/" or "Home/users/" prefix from an object key."""
+    return key.replace("Home/users/", "").replace("Home/", "")
 
-        if not files:
-            print("⚠ No files found.")
+def _keep_object(obj, file_extension=None):
+    """Returns True if the object is a file that passes the extension filter."""
+    key = obj["Key"]
+
+    # **EXCLUDE FOLDERS from the object list** (folders have `/` at the end)
+    if key.endswith("/"):
+        return False
+
+    # Apply file extension filter
+    if file_extension and not key.endswith(file_extension):
+        return False  # Skip files that don't match the extension filter
+
+    return True
+
+def iter_object_pages(bucket_name, prefix="", file_extension=None, page_size=1000, start_after=None, end_at=None):
+    """Yields filtered pages (lists) of objects, following continuation tokens.
+
+    `start_after` (exclusive) and `end_at` (inclusive) restrict the listing to a
+    key range, which is how shards of a parallel listing are expressed.
+    """
+    params = {"Bucket": bucket_name, "Prefix": prefix, "PaginationConfig": {"PageSize": page_size}}
+    if start_after:
+        params["StartAfter"] = start_after
+
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(**params):
+        contents = page.get("Contents", [])
+        if end_at is not None and contents and contents[-1]["Key"] > end_at:
+            yield [obj for obj in contents if obj["Key"] <= end_at and _keep_object(obj, file_extension)]
             return
+        yield [obj for obj in contents if _keep_object(obj, file_extension)]
+
+def iter_objects(bucket_name, prefix="", file_extension=None, page_size=1000, start_after=None):
+    """Yields objects page by page, following continuation tokens until the listing is exhausted."""
+    for page in iter_object_pages(bucket_name, prefix, file_extension, page_size, start_after):
+        yield from page
+
+# ================= Parallel (Sharded) Listing =================
+# Characters used to split a flat key space into ranges, in S3 (UTF-8 binary) order.
+SHARD_SPLIT_CHARS = "".join(sorted(string.digits + string.ascii_letters))
+
+def _common_prefixes(bucket_name, prefix):
+    """Returns the CommonPrefixes (sub-directories) directly under a prefix."""
+    paginator = s3.get_paginator("list_objects_v2")
+    prefixes = []
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter="/"):
+        prefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+    return prefixes
+
+def discover_shards(bucket_name, prefix="", target_shards=64, max_depth=3, executor=None):
+    """Splits the key space under `prefix` into ordered, disjoint key ranges.
+
+    Boundaries are discovered level by level through `Delimiter="/"`
+    CommonPrefixes. Prefixes without sub-directories (flat key spaces) are
+    split further on character ranges until `target_shards` is reached.
+    Each shard is a `(start_after, end_at)` tuple; `None` means unbounded.
+    """
+    boundaries = set()
+    frontier = [prefix]
+    leaves = []
+
+    for _ in range(max_depth):
+        if not frontier or len(boundaries) + 1 >= target_shards:
+            break
+        if executor:
+            children_per_prefix = list(executor.map(lambda p: _common_prefixes(bucket_name, p), frontier))
+        else:
+            children_per_prefix = [_common_prefixes(bucket_name, p) for p in frontier]
+
+        next_frontier = []
+        for parent, children in zip(frontier, children_per_prefix):
+            if children:
+                boundaries.update(children)
+                next_frontier.extend(children)
+            else:
+                leaves.append(parent)
+        frontier = next_frontier
+
+    # Flat key spaces have no sub-directories to split on, so split on characters instead
+    missing = target_shards - (len(boundaries) + 1)
+    if missing > 0 and leaves:
+        per_leaf = min(len(SHARD_SPLIT_CHARS), max(1, missing // len(leaves)))
+        step = len(SHARD_SPLIT_CHARS) / per_leaf
+        for leaf in leaves:
+            boundaries.update(leaf + SHARD_SPLIT_CHARS[int(i * step)] for i in range(per_leaf))
 
-        sorted_files = sorted(files, key=lambda x: x["LastModified"], reverse=True)
+    boundaries = sorted(b for b in boundaries if b.startswith(prefix) and b != prefix)
+    starts = [None] + boundaries
+    ends = boundaries + [None]
+    return list(zip(starts, ends))
 
-        for obj in sorted_files:
-            key = obj["Key"]
+def _put(pages_queue, stop, item):
+    """Puts an item on a bounded queue, giving up once the consumer has stopped; returns False if it did."""
+    while not stop.is_set():
+        try:
+            pages_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
 
-            # **EXCLUDE FOLDERS from the object list** (folders have `/` at the end)
-            if key.endswith("/"):
-                continue
+def _fill_queue(pages_queue, stop, bucket_name, prefix, shard, file_extension):
+    """Lists one shard and pushes its pages onto a bounded queue."""
+    start_after, end_at = shard
+    if stop.is_set():
+        return
+    try:
+        for page in iter_object_pages(bucket_name, prefix, file_extension, start_after=start_after, end_at=end_at):
+            if not _put(pages_queue, stop, page):
+                return
+    except Exception as e:
+        _put(pages_queue, stop, e)
+        return
+    _put(pages_queue, stop, None)  # Shard finished
+
+def parallel_iter_objects(bucket_name, prefix="", file_extension=None, workers=16, ordered=True, max_buffered_pages=8):
+    """Lists a bucket concurrently across prefix shards and yields one object stream.
+
+    With `ordered=True` shards are consumed in key order, so the output matches
+    the sequential paginator; later shards prefetch into bounded queues while
+    earlier ones drain. With `ordered=False` pages are yielded as they arrive.
+    """
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        shards = discover_shards(bucket_name, prefix, target_shards=workers * 4, executor=executor)
+        logging.info(f"🧩 Listing 's3://{bucket_name}/{prefix}' across {len(shards)} shards with {workers} workers...")
+
+        if ordered:
+            queues = [queue.Queue(maxsize=max_buffered_pages) for _ in shards]
+        else:
+            shared = queue.Queue(maxsize=max_buffered_pages * workers)
+            queues = [shared] * len(shards)
+
+        for shard, pages_queue in zip(shards, queues):
+            executor.submit(_fill_queue, pages_queue, stop, bucket_name, prefix, shard, file_extension)
+
+        try:
+            pending = len(shards)
+            index = 0
+            while pending:
+                item = queues[index].get()
+                if item is None:
+                    pending -= 1
+                    if ordered:
+                        index += 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield from item
+        finally:
+            stop.set()
+
+def benchmark_listing(bucket_name, prefix="", workers=16):
+    """Times the sequential paginator against the parallel lister and logs the speedup."""
+    start = time.perf_counter()
+    sequential_count = sum(1 for _ in iter_objects(bucket_name, prefix))
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel_count = sum(1 for _ in parallel_iter_objects(bucket_name, prefix, workers=workers, ordered=False))
+    parallel_time = time.perf_counter() - start
 
-            size = round(obj["Size"] / 1024, 2)  # Convert bytes to KB
-            last_modified = obj["LastModified"].strftime("%Y-%m-%d %H:%M:%S")
+    logging.info(f"⏱ Sequential: {sequential_count} objects in {sequential_time:.2f}s ({sequential_count / max(sequential_time, 1e-9):.0f} obj/s)")
+    logging.info(f"⏱ Parallel ({workers} workers): {parallel_count} objects in {parallel_time:.2f}s ({parallel_count / max(parallel_time, 1e-9):.0f} obj/s)")
+    logging.info(f"🚀 Speedup: {sequential_time / max(parallel_time, 1e-9):.1f}x")
+    return {
+        "sequential_seconds": sequential_time,
+        "parallel_seconds": parallel_time,
+        "objects": sequential_count,
+        "parallel_objects": parallel_count,
+    }
 
-            # Apply file extension filter
-            if file_extension and not key.endswith(file_extension):
-                continue  # Skip files that don't match the extension filter
+def newest_objects(objects, count):
+    """Returns the `count` most recently modified objects using a bounded heap (top-k)."""
+    return heapq.nlargest(count, objects, key=lambda x: x["LastModified"])
 
-            # **Remove "Home/" or "Home/users/" prefix from filenames**
-            cleaned_key = key.replace("Home/users/", "").replace("Home/", "")
+def format_object(obj):
+    """Formats an object as a single output line."""
+    size = round(obj["Size"] / 1024, 2)  # Convert bytes to KB
+    last_modified = obj["LastModified"].strftime("%Y-%m-%d %H:%M:%S")
+    return f"- {clean_key(obj['Key'])} | {size} KB | Last Modified: {last_modified}"
 
-            print(f"- {cleaned_key} | {size} KB | Last Modified: {last_modified}")
+def list_objects(bucket_name, file_extension=None, newest=None, workers=None, source="live"):
+    """Lists files in an S3 bucket, excluding folders.
+
+    Objects are streamed in key order so memory stays bounded. When `newest` is
+    given, only the `newest` most recently modified files are shown, newest first.
+    When `workers` is given, the bucket is listed in parallel across prefix shards.
+    `source` can also be "inventory" (the latest S3 Inventory report, up to a day
+    old) or "index" (the local object index kept by object_index.py); neither
+    makes LIST calls.
+    """
+    print(f"\n📄 Listing objects (files) in 's3://{bucket_name}/'...")
+    try:
+        if source == "inventory":
+            from inventory_reader import iter_inventory_objects
+            objects = iter_inventory_objects(bucket_name, file_extension=file_extension)
+        elif source == "index":
+            from object_index import ObjectIndex
+            objects = ObjectIndex().query(bucket_name, extension=file_extension, newest_first=bool(newest), limit=newest)
+        elif workers:
+            objects = parallel_iter_objects(bucket_name, file_extension=file_extension, workers=workers)
+        else:
+            objects = iter_objects(bucket_name, file_extension=file_extension)
+        if newest:
+            objects = newest_objects(objects, newest)
+
+        found = False
+        for obj in objects:
+            found = True
+            print(format_object(obj))
+
+        if not found:
+            print("⚠ No files found.")
 
     except Exception as e:
         logging.error(f"❌ Error fetching files: {e}")
@@ -122,12 +319,25 @@ def main():
     filter_extension = input("Enter a file extension to filter (or press Enter to list all files): ").strip()
     filter_extension = filter_extension if filter_extension else None
 
+    # Ask if the user only wants the most recently modified files
+    newest = input("Show only the newest N files (or press Enter to list all in key order): ").strip()
+    newest = int(newest) if newest.isdigit() and int(newest) > 0 else None
+
+    # Ask how many workers to use for sharded listing of large buckets
+    workers = input("Number of parallel listing workers (or press Enter for sequential listing): ").strip()
+    workers = int(workers) if workers.isdigit() and int(workers) > 1 else None
+
+    # Ask where to read objects from: a live listing, the latest inventory report, or the local index
+    source = input("Object source - live, inventory or index (press Enter for a live listing): ").strip().lower()
+    source = source if source in ("inventory", "index") else "live"
+
     # Run directory and object listing in parallel for efficiency
     with ThreadPoolExecutor() as executor:
         executor.submit(list_directories, bucket_name)  # This now correctly lists directories
-        executor.submit(list_objects, bucket_name, filter_extension)
+        executor.submit(list_objects, bucket_name, filter_extension, newest, workers, source)
 
     print("\n✅ Done!")
 
 if __name__ == "__main__":
-    main()
+    with profiled():
+        main()
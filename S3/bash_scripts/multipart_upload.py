@@ -0,0 +1,369 @@
+#✔ Resumable Uploads: Saves the UploadId and finished part ETags to a state file, so a restart resumes at the first missing part.
+#✔ Zero-Copy Parts: Parts are sent straight from a memory-mapped file, without reading them into buffers.
+#✔ Concurrent Parts: Uploads several parts of one file at once.
+#✔ Streaming Writer: MultipartWriter turns a stream of unknown length into parts uploaded in the background, without a temp file.
+#✔ Stale Upload Cleanup: Aborts multipart uploads older than a cutoff so abandoned parts stop costing money.
+
+import os
+import sys
+import json
+import mmap
+import math
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from bucket_region import RegionRoutingClient
+from empty_bucket import abort_multipart_uploads
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+DEFAULT_STATE_DIR = os.environ.get("S3_UPLOAD_STATE_DIR", os.path.expanduser("~/.s3_upload_state"))
+
+class MappedPart:
+    """Read-only, seekable file object over one part of a memory-mapped file.
+
+    read() hands out memoryview slices of the mapping, so part data is never
+    copied into Python buffers; seek() lets botocore rewind for checksums and retries.
+    """
+
+    def __init__(self, view, start, length):
+        self.view = view[start:start + length]
+        self.position = 0
+
+    def __len__(self):
+        return len(self.view)
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(self.position + size, len(self.view))
+        chunk = self.view[self.position:end]
+        self.position = end
+        return chunk
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: len(self.view)}[whence]
+        self.position = max(0, min(base + offset, len(self.view)))
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        self.view.release()
+
+def part_size_for(size, part_size):
+    """Returns a part size of at least `part_size` that keeps the upload within 10,000 parts."""
+    needed = math.ceil(size / MAX_PARTS / MB) * MB
+    return max(part_size, needed, MIN_PART_SIZE)
+
+class ResumableUpload:
+    """A multipart upload whose progress survives restarts through a JSON state file."""
+
+    def __init__(self, s3, file_path, bucket_name, key, part_size=8 * MB, state_dir=DEFAULT_STATE_DIR):
+        self.s3 = s3
+        self.file_path = os.path.abspath(file_path)
+        self.bucket_name = bucket_name
+        self.key = key
+        self.stat = os.stat(self.file_path)
+        self.part_size = part_size_for(self.stat.st_size, part_size)
+        self.part_count = max(1, math.ceil(self.stat.st_size / self.part_size))
+        state_id = hashlib.sha1(f"{bucket_name}\0{key}\0{self.file_path}".encode()).hexdigest()
+        self.state_path = os.path.join(state_dir, f"{state_id}.json")
+        self.upload_id = None
+        self.parts = {}
+        self.lock = threading.Lock()
+
+    # ---------- State ----------
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        unchanged = (state.get("size"), state.get("mtime_ns"), state.get("part_size")) == \
+            (self.stat.st_size, self.stat.st_mtime_ns, self.part_size)
+        if not unchanged:
+            logging.info(f"♻ '{self.file_path}' changed since its last upload attempt; starting over.")
+            self._abort(state["upload_id"])
+            return None
+        return state
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "bucket": self.bucket_name, "key": self.key, "path": self.file_path, "upload_id": self.upload_id,
+                "size": self.stat.st_size, "mtime_ns": self.stat.st_mtime_ns, "part_size": self.part_size,
+                "parts": {str(n): etag for n, etag in self.parts.items()},
+            }, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _abort(self, upload_id):
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=upload_id)
+        except ClientError:
+            pass  # Already completed, aborted or expired
+
+    def _remote_parts(self):
+        """Returns {part_number: etag} for parts S3 already holds, or None if the upload is gone."""
+        parts = {}
+        try:
+            paginator = self.s3.get_paginator("list_parts")
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id):
+                for part in page.get("Parts", []):
+                    if part["Size"] == self._part_length(part["PartNumber"]):
+                        parts[part["PartNumber"]] = part["ETag"]
+        except ClientError as e:
+            if e.response["Error"].get("Code") in ("NoSuchUpload", "404"):
+                return None
+            raise
+        return parts
+
+    def _part_length(self, part_number):
+        start = (part_number - 1) * self.part_size
+        return min(self.part_size, self.stat.st_size - start)
+
+    # ---------- Upload ----------
+    def start(self):
+        """Resumes the saved upload if S3 still has it, otherwise creates a new one. Returns missing part numbers."""
+        state = self._load_state()
+        if state:
+            self.upload_id = state["upload_id"]
+            # S3's own part list also covers parts that finished after the state file was last written
+            remote = self._remote_parts()
+            if remote is not None:
+                self.parts = remote
+                logging.info(f"⏯ Resuming '{self.key}' ({len(self.parts)}/{self.part_count} parts already uploaded).")
+            else:
+                logging.info(f"♻ Upload for '{self.key}' no longer exists; starting over.")
+                self.upload_id = None
+
+        if self.upload_id is None:
+            self.upload_id = self.s3.create_multipart_upload(Bucket=self.bucket_name, Key=self.key)["UploadId"]
+            self.parts = {}
+        self._save_state()
+        return [n for n in range(1, self.part_count + 1) if n not in self.parts]
+
+    def upload_part(self, view, part_number):
+        """Uploads one part straight from the mapping and records its ETag."""
+        length = self._part_length(part_number)
+        body = MappedPart(view, (part_number - 1) * self.part_size, length)
+
+        def send():
+            body.seek(0)  # A throttled attempt may have read part of the body already
+            return self.s3.upload_part(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                PartNumber=part_number, Body=body, ContentLength=length
+            )
+
+        try:
+            response = shared_controller().call(self.bucket_name, self.key, "write", send, timed=False)
+        finally:
+            body.close()
+        with self.lock:
+            self.parts[part_number] = response["ETag"]
+            self._save_state()
+        return length
+
+    def run(self, part_concurrency=4):
+        """Uploads every missing part and completes the upload. Returns the object's ETag."""
+        missing = self.start()
+        if self.stat.st_size:
+            with open(self.file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    with ThreadPoolExecutor(max_workers=part_concurrency) as executor:
+                        # list() re-raises the first failed part; finished parts stay recorded for the next run
+                        list(executor.map(lambda n: self.upload_part(view, n), missing))
+                finally:
+                    view.release()
+        elif missing:
+            # An empty file is a single empty part
+            self.parts[1] = shared_controller().call(self.bucket_name, self.key, "write", lambda: self.s3.upload_part(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id, PartNumber=1, Body=b""
+            ))["ETag"]
+
+        response = self.s3.complete_multipart_upload(
+            Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": n, "ETag": self.parts[n]} for n in sorted(self.parts)]}
+        )
+        os.remove(self.state_path)
+        return response["ETag"]
+
+def resumable_upload(s3, file_path, bucket_name, key, part_size=8 * MB, part_concurrency=4, state_dir=DEFAULT_STATE_DIR):
+    """Uploads a file with a resumable multipart upload and returns its size."""
+    upload = ResumableUpload(s3, file_path, bucket_name, key, part_size, state_dir)
+    upload.run(part_concurrency)
+    return upload.stat.st_size
+
+class MultipartWriter:
+    """Write-only file object that streams into one S3 object.
+
+    Written data is cut into `part_size` parts that upload in the background
+    (at most `part_concurrency` at a time, which also bounds memory) while the
+    caller keeps writing, so data of unknown length never touches local disk.
+    Objects smaller than one part are sent with a single PutObject on close().
+    `put_kwargs` (ContentType, Metadata, ...) apply to the finished object.
+    """
+
+    def __init__(self, s3, bucket_name, key, part_size=16 * MB, part_concurrency=4, **put_kwargs):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.part_concurrency = part_concurrency
+        self.put_kwargs = put_kwargs
+        self.buffer = bytearray()
+        self.position = 0
+        self.upload_id = None
+        self.part_number = 0
+        self.parts = {}
+        self.futures = []
+        self.executor = None
+        self.slots = threading.BoundedSemaphore(part_concurrency)
+        self.closed = False
+        self.etag = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._submit(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def _submit(self, data):
+        if self.part_number == MAX_PARTS:
+            raise OSError(f"'{self.key}' exceeds {MAX_PARTS} parts of {self.part_size // MB} MB; use a larger part size")
+        if self.upload_id is None:
+            self.upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, **self.put_kwargs
+            )["UploadId"]
+            self.executor = ThreadPoolExecutor(max_workers=self.part_concurrency)
+        for future in self.futures:
+            if future.done() and future.exception():
+                raise future.exception()  # Stop producing data for an upload that already failed
+        self.part_number += 1
+        self.slots.acquire()
+        self.futures.append(self.executor.submit(self._upload_part, self.part_number, data))
+
+    def _upload_part(self, part_number, data):
+        try:
+            response = shared_controller().call(self.bucket_name, self.key, "write", lambda: self.s3.upload_part(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=data
+            ), timed=False)
+            self.parts[part_number] = response["ETag"]
+        finally:
+            self.slots.release()
+
+    def close(self):
+        """Uploads what is buffered and completes the object; aborts the multipart upload on failure."""
+        if self.closed:
+            return
+        try:
+            if self.upload_id is None:
+                response = shared_controller().call(self.bucket_name, self.key, "write", lambda: self.s3.put_object(
+                    Bucket=self.bucket_name, Key=self.key, Body=bytes(self.buffer), **self.put_kwargs
+                ), timed=False)
+            else:
+                if self.buffer:
+                    self._submit(bytes(self.buffer))
+                for future in self.futures:
+                    future.result()
+                response = self.s3.complete_multipart_upload(
+                    Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                    MultipartUpload={"Parts": [{"PartNumber": n, "ETag": self.parts[n]} for n in sorted(self.parts)]}
+                )
+        except BaseException:
+            self.abort()
+            raise
+        self.etag = response["ETag"]
+        self.closed = True
+        self.buffer = bytearray()
+        if self.executor:
+            self.executor.shutdown()
+
+    def abort(self):
+        """Discards the object: waits for in-flight parts, then aborts the multipart upload."""
+        self.closed = True
+        self.buffer = bytearray()
+        if self.executor:
+            self.executor.shutdown()
+        if self.upload_id:
+            try:
+                self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+            except ClientError:
+                pass  # Already aborted or expired
+
+def abort_stale_uploads(bucket_name, older_than_hours=24, prefix="", s3=None):
+    """Aborts multipart uploads initiated more than `older_than_hours` ago; returns how many."""
+    s3 = s3 or RegionRoutingClient()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=older_than_hours)
+    aborted = abort_multipart_uploads(s3, bucket_name, prefix, initiated_before=cutoff)
+    logging.info(f"🧹 Aborted {aborted} multipart uploads older than {older_than_hours}h in '{bucket_name}'.")
+    return aborted
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Resumable multipart uploads and stale-upload cleanup.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upload = commands.add_parser("upload", help="Upload (or resume uploading) one large file")
+    upload.add_argument("file_path")
+    upload.add_argument("bucket_name")
+    upload.add_argument("key")
+    upload.add_argument("--part-size-mb", type=int, default=8, help="Part size in MB")
+    upload.add_argument("--part-concurrency", type=int, default=4, help="Parts uploaded concurrently")
+    upload.add_argument("--state-dir", default=DEFAULT_STATE_DIR, help="Directory for upload state files")
+
+    abort = commands.add_parser("abort-stale", help="Abort multipart uploads older than a cutoff (run from cron)")
+    abort.add_argument("bucket_name")
+    abort.add_argument("--older-than-hours", type=float, default=24)
+    abort.add_argument("--prefix", default="")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function for resumable uploads and cleanup."""
+    args = parse_args(argv)
+
+    try:
+        if args.command == "upload":
+            s3 = RegionRoutingClient(max_pool_connections=args.part_concurrency)
+            resumable_upload(s3, args.file_path, args.bucket_name, args.key, args.part_size_mb * MB,
+                             args.part_concurrency, args.state_dir)
+            logging.info(f"✅ Uploaded '{args.file_path}' to 's3://{args.bucket_name}/{args.key}'.")
+        else:
+            abort_stale_uploads(args.bucket_name, args.older_than_hours, args.prefix)
+    except (BotoCoreError, ClientError, OSError) as e:
+        logging.error(f"❌ {e} (re-run the same command to resume)" if args.command == "upload" else f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    with profiled():
+        main()
@@ -0,0 +1,229 @@
+#✔ Persistent Index: Keeps key, size, ETag, storage class and last-modified for every object in SQLite.
+#✔ Fast Queries: Prefix, extension, size-range and date-range queries are answered from indexed columns.
+#✔ Flexible Loading: Built from a full (optionally parallel) listing or from the latest S3 Inventory report.
+#✔ Incremental Refresh: New keys are picked up with StartAfter from the last indexed key under a prefix.
+
+import os
+import time
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timezone
+
+from list_s3_contents import format_object, iter_objects, parallel_iter_objects
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_OBJECT_INDEX = os.environ.get("S3_OBJECT_INDEX", os.path.expanduser("~/.s3_object_index.db"))
+INSERT_BATCH_SIZE = 5000
+ANALYSIS_LIMIT = 10000  # Rows sampled per index by ANALYZE, so statistics stay cheap on huge buckets
+
+def key_extension(key):
+    """Returns the extension of an object key's file name (e.g. ".csv"), or "" if it has none."""
+    return os.path.splitext(key.rsplit("/", 1)[-1])[1]
+
+def _timestamp(value):
+    """Converts a datetime or ISO-8601 string to epoch seconds."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class ObjectIndex:
+    """SQLite index of object metadata, one set of rows per bucket."""
+
+    def __init__(self, path=DEFAULT_OBJECT_INDEX):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS objects (
+                   bucket TEXT NOT NULL,
+                   key TEXT NOT NULL,
+                   extension TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   etag TEXT,
+                   storage_class TEXT,
+                   last_modified REAL NOT NULL,
+                   PRIMARY KEY (bucket, key)
+               ) WITHOUT ROWID;
+               CREATE INDEX IF NOT EXISTS objects_extension ON objects (bucket, extension);
+               CREATE INDEX IF NOT EXISTS objects_size ON objects (bucket, size);
+               CREATE INDEX IF NOT EXISTS objects_last_modified ON objects (bucket, last_modified);
+               CREATE TABLE IF NOT EXISTS buckets (
+                   bucket TEXT PRIMARY KEY,
+                   source TEXT NOT NULL,
+                   refreshed_at REAL NOT NULL
+               );"""
+        )
+        self.conn.commit()
+
+    # ---------- Loading ----------
+    def _insert(self, bucket_name, objects):
+        """Inserts or replaces objects in batches; returns how many were written."""
+        count = 0
+        batch = []
+        for obj in objects:
+            batch.append((
+                bucket_name, obj["Key"], key_extension(obj["Key"]), obj.get("Size", 0), obj.get("ETag"),
+                obj.get("StorageClass", "STANDARD"), _timestamp(obj["LastModified"])
+            ))
+            if len(batch) == INSERT_BATCH_SIZE:
+                self.conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        self.conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        return count + len(batch)
+
+    def _mark_refreshed(self, bucket_name, source):
+        self.conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (bucket_name, source, time.time()))
+        # Without statistics SQLite walks the primary key rather than the extension/size/date indexes
+        self.conn.execute("ANALYZE objects")
+
+    def rebuild(self, bucket_name, objects, source="listing"):
+        """Replaces a bucket's index with `objects` in a single transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM objects WHERE bucket = ?", (bucket_name,))
+            count = self._insert(bucket_name, objects)
+            self._mark_refreshed(bucket_name, source)
+        logging.info(f"🗂 Indexed {count} objects for bucket '{bucket_name}' from {source}.")
+        return count
+
+    def last_key(self, bucket_name, prefix=""):
+        """Returns the greatest indexed key under a prefix, or None."""
+        row = self.conn.execute(
+            "SELECT MAX(key) FROM objects WHERE bucket = ? AND key >= ? AND key < ?",
+            (bucket_name, prefix, prefix + "\U0010ffff")
+        ).fetchone()
+        return row[0]
+
+    def refresh(self, bucket_name, prefixes=("",)):
+        """Adds objects written after the last indexed key under each prefix.
+
+        This suits prefixes whose new keys sort after existing ones (dates, sequence
+        numbers); changes to existing keys are only picked up by a full rebuild.
+        """
+        count = 0
+        with self.conn:
+            for prefix in prefixes:
+                start_after = self.last_key(bucket_name, prefix)
+                count += self._insert(bucket_name, iter_objects(bucket_name, prefix, start_after=start_after))
+            self._mark_refreshed(bucket_name, "refresh")
+        logging.info(f"🔄 Added {count} new objects to the index for bucket '{bucket_name}'.")
+        return count
+
+    # ---------- Queries ----------
+    def refreshed_at(self, bucket_name):
+        """Returns (datetime, source) of a bucket's last refresh, or None if it was never indexed."""
+        row = self.conn.execute("SELECT refreshed_at, source FROM buckets WHERE bucket = ?", (bucket_name,)).fetchone()
+        if row is None:
+            return None
+        return datetime.fromtimestamp(row[0], timezone.utc), row[1]
+
+    def query(self, bucket_name, prefix="", extension=None, min_size=None, max_size=None,
+              modified_after=None, modified_before=None, newest_first=False, limit=None):
+        """Yields indexed objects as list_objects_v2-style dicts, in key order (or newest first)."""
+        clauses = ["bucket = ?"]
+        params = [bucket_name]
+        if prefix:
+            clauses.append("key >= ? AND key < ?")
+            params += [prefix, prefix + "\U0010ffff"]
+        if extension:
+            if extension.startswith(".") and "." not in extension[1:] and "/" not in extension:
+                clauses.append("extension = ?")  # A single suffix such as ".csv" uses the extension index
+            else:
+                clauses.append("substr(key, -?) = ?")
+                params.append(len(extension))
+            params.append(extension)
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        if modified_after is not None:
+            clauses.append("last_modified >= ?")
+            params.append(_timestamp(modified_after))
+        if modified_before is not None:
+            clauses.append("last_modified < ?")
+            params.append(_timestamp(modified_before))
+
+        sql = "SELECT key, size, etag, storage_class, last_modified FROM objects WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_modified DESC" if newest_first else " ORDER BY key"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        for key, size, etag, storage_class, last_modified in self.conn.execute(sql, params):
+            yield {
+                "Key": key, "Size": size, "ETag": etag, "StorageClass": storage_class,
+                "LastModified": datetime.fromtimestamp(last_modified, timezone.utc),
+            }
+
+def build_index(bucket_name, index=None, use_inventory=False, workers=None):
+    """Rebuilds a bucket's index from the latest inventory report or a full listing."""
+    index = index or ObjectIndex()
+    if use_inventory:
+        from inventory_reader import iter_inventory_objects
+        return index.rebuild(bucket_name, iter_inventory_objects(bucket_name), "inventory")
+    if workers:
+        return index.rebuild(bucket_name, parallel_iter_objects(bucket_name, workers=workers), "listing")
+    return index.rebuild(bucket_name, iter_objects(bucket_name), "listing")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Build and query a local index of S3 object metadata.")
+    parser.add_argument("--index", default=DEFAULT_OBJECT_INDEX, help="SQLite index path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="(Re)build a bucket's index from a full listing or inventory")
+    build.add_argument("bucket_name")
+    build.add_argument("--inventory", action="store_true", help="Load from the latest S3 Inventory report")
+    build.add_argument("--workers", type=int, help="List in parallel across prefix shards")
+
+    refresh = commands.add_parser("refresh", help="Add keys written after the last indexed key under prefixes")
+    refresh.add_argument("bucket_name")
+    refresh.add_argument("--prefix", action="append", dest="prefixes", help="Prefix to refresh (repeatable)")
+
+    query = commands.add_parser("query", help="Query a bucket's index")
+    query.add_argument("bucket_name")
+    query.add_argument("--prefix", default="")
+    query.add_argument("--extension", help="e.g. .csv")
+    query.add_argument("--min-size", type=int, help="Bytes")
+    query.add_argument("--max-size", type=int, help="Bytes")
+    query.add_argument("--after", help="Modified at or after this ISO date/time")
+    query.add_argument("--before", help="Modified before this ISO date/time")
+    query.add_argument("--newest", type=int, help="Only the N most recently modified objects")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to build, refresh or query the object index."""
+    args = parse_args(argv)
+    index = ObjectIndex(args.index)
+
+    if args.command == "build":
+        build_index(args.bucket_name, index, args.inventory, args.workers)
+    elif args.command == "refresh":
+        index.refresh(args.bucket_name, args.prefixes or [""])
+    else:
+        refreshed = index.refreshed_at(args.bucket_name)
+        if refreshed is None:
+            logging.error(f"❌ Bucket '{args.bucket_name}' has not been indexed; run 'build' first.")
+            return
+        start = time.perf_counter()
+        count = 0
+        for obj in index.query(args.bucket_name, args.prefix, args.extension, args.min_size, args.max_size,
+                               args.after, args.before, newest_first=bool(args.newest), limit=args.newest):
+            print(format_object(obj))
+            count += 1
+        logging.info(
+            f"📋 {count} objects in {(time.perf_counter() - start) * 1000:.1f} ms "
+            f"(index refreshed {refreshed[0]:%Y-%m-%d %H:%M:%S} UTC from {refreshed[1]})."
+        )
+
+if __name__ == "__main__":
+    with profiled():
+        main()
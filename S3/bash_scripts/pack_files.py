@@ -0,0 +1,319 @@
+#✔ Small-File Packing: Streams many small files into large tar archives, so a million 10 KB files cost a few hundred requests.
+#✔ Sidecar Index: Each archive gets a gzip'd JSON index of member offsets, written only after the archive is complete.
+#✔ Ranged Retrieval: A single member is fetched with one byte-range GET; neighbouring members share one GET when extracting.
+#✔ Incremental: Files whose size and mtime match their newest packed copy are skipped on the next run.
+#✔ Standard Archives: Archives are plain (PAX) tar files, so `aws s3 cp s3://.../x.tar - | tar t` still works.
+
+import os
+import sys
+import gzip
+import json
+import time
+import logging
+import tarfile
+import argparse
+import threading
+from datetime import datetime, timezone
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+
+from bucket_region import RegionRoutingClient
+from download_files import local_path_for
+from list_s3_contents import iter_objects
+from multipart_upload import MultipartWriter
+from rate_control import shared_controller
+from upload_files import MB, build_key, create_client, iter_files, upload_path
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+KB = 1024
+PACK_DIR = "_packs"                   # Archives live under <prefix>/_packs/
+INDEX_SUFFIX = ".index.json.gz"
+DEFAULT_PACK_THRESHOLD = 64 * KB      # Files below this size are packed
+DEFAULT_ARCHIVE_SIZE = 256 * MB
+MIN_ARCHIVE_SIZE = 16 * MB            # Small runs are still split this fine, so archives build in parallel
+COALESCE_GAP = 1 * MB                 # Members closer than this in one archive are fetched by one GET ...
+MAX_RANGE = 64 * MB                   # ... as long as the combined range stays below this
+
+def pack_root(prefix=""):
+    prefix = prefix.strip("/")
+    return f"{prefix}/{PACK_DIR}/" if prefix else f"{PACK_DIR}/"
+
+def _data_offset(tar, size):
+    """Offset of the data just written by tar.addfile(): the archive ends with it, padded to 512-byte blocks."""
+    blocks = -(-size // tarfile.BLOCKSIZE)
+    return tar.offset - blocks * tarfile.BLOCKSIZE
+
+# ================= Packing =================
+def write_archive(s3, bucket_name, archive_key, files, part_size=8 * MB, part_concurrency=4):
+    """Streams `files` [(path, name)] into one tar object, then uploads its index.
+
+    Returns (members, failed) where members are [name, offset, size, mtime_ns].
+    Files that cannot be opened are skipped; any other error aborts the archive.
+    """
+    members, failed = [], []
+    with MultipartWriter(s3, bucket_name, archive_key, part_size, part_concurrency,
+                         ContentType="application/x-tar") as writer:
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for path, name in files:
+                try:
+                    f = open(path, "rb")
+                except OSError as e:
+                    logging.error(f"❌ Failed to pack '{path}': {e}")
+                    failed.append(path)
+                    continue
+                with f:
+                    stat = os.fstat(f.fileno())
+                    info = tarfile.TarInfo(name)
+                    info.size, info.mtime, info.mode = stat.st_size, stat.st_mtime, stat.st_mode & 0o777
+                    tar.addfile(info, f)
+                members.append([name, _data_offset(tar, info.size), info.size, stat.st_mtime_ns])
+
+    index = {"version": 1, "archive": archive_key, "created": datetime.now(timezone.utc).isoformat(),
+             "members": members}
+    body = gzip.compress(json.dumps(index, separators=(",", ":")).encode(), compresslevel=6)
+    shared_controller().call(bucket_name, archive_key, "write", lambda: s3.put_object(
+        Bucket=bucket_name, Key=archive_key + INDEX_SUFFIX, Body=body,
+        ContentType="application/json", ContentEncoding="gzip"
+    ))
+    return members, failed
+
+def group_files(files, archive_size, workers):
+    """Splits [(path, name, size)] into archive-sized groups, with at least `workers` groups when there is enough data."""
+    total = sum(size for _, _, size in files)
+    target = min(archive_size, max(MIN_ARCHIVE_SIZE, total // max(1, workers)))
+    group, group_size = [], 0
+    for path, name, size in files:
+        if group and group_size + size > target:
+            yield group
+            group, group_size = [], 0
+        group.append((path, name))
+        group_size += size + tarfile.BLOCKSIZE  # Header block
+    if group:
+        yield group
+
+def pack_path(local_path, bucket_name, prefix="", threshold=DEFAULT_PACK_THRESHOLD, archive_size=DEFAULT_ARCHIVE_SIZE,
+              workers=8, part_size_mb=8, part_concurrency=4, skip_unchanged=True, **upload_kwargs):
+    """Packs files smaller than `threshold` into archives and uploads the rest as individual objects.
+
+    Returns the upload summary, with `packed` files in `archives` archive objects.
+    `upload_kwargs` are passed to upload_path() for the large files.
+    """
+    s3 = create_client(workers, part_concurrency)
+    start = time.perf_counter()
+
+    packed_before = {}
+    if skip_unchanged:
+        packed_before = {name: (size, mtime_ns) for name, (_, _, size, mtime_ns)
+                         in PackIndex.load(bucket_name, prefix, s3).members.items()}
+
+    small, skipped, large = [], 0, 0
+    for path in iter_files(local_path):
+        stat = os.stat(path)
+        if stat.st_size >= threshold:
+            large += 1
+            continue
+        name = build_key(local_path, path, prefix)
+        if packed_before.get(name) == (stat.st_size, stat.st_mtime_ns):
+            skipped += 1
+        else:
+            small.append((path, name, stat.st_size))
+
+    summary = {"files": 0, "bytes": 0, "failed": 0, "skipped": skipped, "deduplicated": 0, "packed": 0, "archives": 0}
+    lock = threading.Lock()
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    root = pack_root(prefix)
+
+    def run(number, group):
+        archive_key = f"{root}{run_id}-{number:05d}.tar"
+        try:
+            members, failed = write_archive(s3, bucket_name, archive_key, group, part_size_mb * MB, part_concurrency)
+        except (BotoCoreError, ClientError, OSError) as e:
+            logging.error(f"❌ Failed to write archive '{archive_key}' ({len(group)} files): {e}")
+            members, failed = [], group
+        with lock:
+            summary["packed"] += len(members)
+            summary["files"] += len(members)
+            summary["bytes"] += sum(member[2] for member in members)
+            summary["failed"] += len(failed)
+            summary["archives"] += bool(members)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for number, group in enumerate(group_files(small, archive_size, workers), 1):
+            executor.submit(run, number, group)
+    logging.info(f"📦 Packed {summary['packed']} files ({summary['bytes'] / MB:.2f} MB) into {summary['archives']} "
+                 f"archives under s3://{bucket_name}/{root} ({skipped} unchanged)")
+
+    if large:
+        rest = upload_path(local_path, bucket_name, prefix, workers, part_size_mb, part_concurrency=part_concurrency,
+                           skip_unchanged=skip_unchanged, min_size=threshold, **upload_kwargs)
+        for field in ("files", "bytes", "failed", "skipped", "deduplicated"):
+            summary[field] += rest[field]
+        if "compression" in rest:
+            summary["compression"] = rest["compression"]
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+# ================= Reading =================
+class PackIndex:
+    """Maps member names to (archive_key, offset, size, mtime_ns) across every archive under a prefix.
+
+    A name packed more than once resolves to its newest copy (archive keys sort by creation time).
+    """
+
+    def __init__(self, bucket_name, members, s3=None):
+        self.bucket_name = bucket_name
+        self.members = members
+        self.s3 = s3 or RegionRoutingClient()
+
+    @classmethod
+    def load(cls, bucket_name, prefix="", s3=None, workers=16):
+        """Downloads every index under <prefix>/_packs/ concurrently and merges them."""
+        s3 = s3 or RegionRoutingClient()
+        keys = sorted(obj["Key"] for obj in iter_objects(bucket_name, prefix=pack_root(prefix),
+                                                         file_extension=INDEX_SUFFIX))
+
+        def fetch(key):
+            body = shared_controller().call(bucket_name, key, "read",
+                                            lambda: s3.get_object(Bucket=bucket_name, Key=key)["Body"].read())
+            # botocore does not undo Content-Encoding, so the body is still gzip'd
+            return json.loads(gzip.decompress(body))
+
+        members = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index in executor.map(fetch, keys):
+                archive_key = index["archive"]
+                for name, offset, size, mtime_ns in index["members"]:
+                    members[name] = (archive_key, offset, size, mtime_ns)
+        return cls(bucket_name, members, s3)
+
+    def names(self, member_prefix=""):
+        return sorted(name for name in self.members if name.startswith(member_prefix))
+
+    def _get_range(self, archive_key, start, length):
+        if not length:
+            return b""
+        return shared_controller().call(self.bucket_name, archive_key, "read", lambda: self.s3.get_object(
+            Bucket=self.bucket_name, Key=archive_key, Range=f"bytes={start}-{start + length - 1}"
+        )["Body"].read(), timed=False)
+
+    def read(self, name):
+        """Returns one member's content with a single ranged GET."""
+        try:
+            archive_key, offset, size, _ = self.members[name]
+        except KeyError:
+            raise KeyError(f"'{name}' is not in any archive under s3://{self.bucket_name}") from None
+        return self._get_range(archive_key, offset, size)
+
+    def ranges(self, names):
+        """Groups members into coalesced GETs: yields (archive_key, start, length, [(name, offset, size, mtime_ns)])."""
+        by_archive = {}
+        for name in names:
+            archive_key, offset, size, mtime_ns = self.members[name]
+            by_archive.setdefault(archive_key, []).append((name, offset, size, mtime_ns))
+        for archive_key, members in sorted(by_archive.items()):
+            members.sort(key=lambda member: member[1])
+            batch = []
+            for member in members:
+                _, offset, size, _ = member
+                if batch and (offset - end > COALESCE_GAP or offset + size - start > MAX_RANGE):
+                    yield archive_key, start, end - start, batch
+                    batch = []
+                if not batch:
+                    start = end = offset
+                batch.append(member)
+                end = max(end, offset + size)
+            if batch:
+                yield archive_key, start, end - start, batch
+
+    def extract(self, names, dest_dir, prefix="", workers=16):
+        """Writes members to files under `dest_dir` and returns a summary; one GET per coalesced range."""
+        summary = {"files": 0, "bytes": 0, "failed": 0, "requests": 0}
+        lock = threading.Lock()
+        start_time = time.perf_counter()
+
+        def run(item):
+            archive_key, start, length, members = item
+            try:
+                data = memoryview(self._get_range(archive_key, start, length))
+                for name, offset, size, mtime_ns in members:
+                    path = local_path_for(dest_dir, name, prefix)
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    with open(path, "wb") as f:
+                        f.write(data[offset - start:offset - start + size])
+                    os.utime(path, ns=(mtime_ns, mtime_ns))
+                with lock:
+                    summary["files"] += len(members)
+                    summary["bytes"] += sum(member[2] for member in members)
+                    summary["requests"] += bool(length)
+            except (BotoCoreError, ClientError, OSError, ValueError) as e:
+                logging.error(f"❌ Failed to extract {len(members)} members of '{archive_key}': {e}")
+                with lock:
+                    summary["failed"] += len(members)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run, self.ranges(names)))
+        summary["seconds"] = time.perf_counter() - start_time
+        return summary
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Read files packed into archives by upload_files.py --pack.")
+    parser.add_argument("--prefix", default="", help="Prefix the files were uploaded under (archives are in <prefix>/_packs/)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ls = commands.add_parser("ls", help="List packed files")
+    ls.add_argument("bucket_name")
+    ls.add_argument("member_prefix", nargs="?", default="", help="Only list names starting with this")
+
+    get = commands.add_parser("get", help="Fetch one packed file with a single ranged GET")
+    get.add_argument("bucket_name")
+    get.add_argument("name", help="Key the file would have had if uploaded on its own")
+    get.add_argument("destination", nargs="?", default="-", help="Local file ('-' for stdout)")
+
+    extract = commands.add_parser("extract", help="Extract many packed files, coalescing neighbouring members")
+    extract.add_argument("bucket_name")
+    extract.add_argument("destination", help="Local directory")
+    extract.add_argument("member_prefix", nargs="?", default="", help="Only extract names starting with this")
+    extract.add_argument("--workers", type=int, default=16, help="Concurrent ranged GETs")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to read packed files."""
+    args = parse_args(argv)
+
+    try:
+        index = PackIndex.load(args.bucket_name, args.prefix)
+        if args.command == "ls":
+            for name in index.names(args.member_prefix):
+                archive_key, offset, size, _ = index.members[name]
+                print(f"{size:>12,}  {name}  ({archive_key} @ {offset})")
+        elif args.command == "get":
+            data = index.read(args.name)
+            if args.destination == "-":
+                sys.stdout.buffer.write(data)
+            else:
+                with open(args.destination, "wb") as f:
+                    f.write(data)
+                logging.info(f"✅ Fetched '{args.name}' ({len(data):,} bytes) with one ranged GET.")
+        else:
+            names = index.names(args.member_prefix)
+            summary = index.extract(names, args.destination, args.member_prefix, args.workers)
+            logging.info(
+                f"📊 Extracted {summary['files']} files ({summary['bytes'] / MB:.2f} MB) with {summary['requests']} "
+                f"GETs in {summary['seconds']:.2f}s | {summary['failed']} failed"
+            )
+            if summary["failed"]:
+                sys.exit(1)
+    except KeyError as e:
+        logging.error(f"❌ {e.args[0]}")
+        sys.exit(1)
+    except (BotoCoreError, ClientError, OSError) as e:
+        logging.error(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    with profiled():
+        main()
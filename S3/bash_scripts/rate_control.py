@@ -0,0 +1,348 @@
+#✔ Per-Prefix Limits: S3 allows roughly 3,500 writes/s and 5,500 reads/s per key prefix; each prefix gets its own budget.
+#✔ Token Buckets: Requests are paced to the prefix's current rate instead of bursting into SlowDown errors.
+#✔ AIMD: Rate and in-flight limits grow additively while calls are healthy; throttling cuts the rate, rising latency cuts concurrency.
+#✔ Shared: Every bulk operation (and every shared client's internal retries) feeds the same process-wide controller.
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+# S3's documented per-prefix request rates
+PREFIX_WRITE_RATE = float(os.environ.get("S3_PREFIX_WRITE_RATE", "3500"))  # PUT/COPY/POST/DELETE per second
+PREFIX_READ_RATE = float(os.environ.get("S3_PREFIX_READ_RATE", "5500"))    # GET/HEAD per second
+# How many '/'-separated key segments identify a prefix for rate purposes
+PREFIX_DEPTH = int(os.environ.get("S3_RATE_PREFIX_DEPTH", "1"))
+MAX_CONCURRENCY = int(os.environ.get("S3_RATE_MAX_CONCURRENCY", "512"))
+# HTTP attempts one throttled call may make in total, counting the client's own retries (S3_MAX_ATTEMPTS)
+MAX_TOTAL_ATTEMPTS = int(os.environ.get("S3_MAX_TOTAL_ATTEMPTS", "20"))
+
+THROTTLE_CODES = {
+    "SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded", "TooManyRequests",
+    "RequestThrottled", "ServiceUnavailable", "503",
+}
+
+def is_throttle(error):
+    """Returns True if an exception (or botocore error response dict) is a throttling response."""
+    response = getattr(error, "response", error)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in THROTTLE_CODES
+
+def attempts_made(error):
+    """Returns how many HTTP attempts a failed call made: one plus the retries botocore already ran."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return 1
+    return 1 + response.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+
+def prefix_of(key, depth=PREFIX_DEPTH):
+    """Returns the first `depth` '/'-separated segments of a key (the unit S3 rate limits)."""
+    if not key:
+        return ""
+    parts = key.split("/", depth)
+    return "/".join(parts[:depth]) + "/" if len(parts) > depth else ""
+
+class TokenBucket:
+    """Thread-safe token bucket with reservations, so waits happen outside the lock."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate / 10)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """Takes `cost` tokens (going into debt if needed) and returns how long to wait before acting."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def set_rate(self, rate):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.rate = rate
+            self.burst = max(1.0, rate / 10)
+
+class PrefixController:
+    """Rate and concurrency budget for one (bucket, prefix, read/write) partition.
+
+    Throttling cuts the rate by `decrease`, at most once per cooldown, so one
+    burst of SlowDowns counts as one signal. Rising latency (queueing) cuts the
+    concurrency limit instead. Healthy windows add back a slice of the ceiling;
+    near the rate that was last throttled the slice shrinks, so the rate settles
+    just under where S3 pushes back instead of sawing up and down.
+    """
+
+    def __init__(self, ceiling, max_concurrency=MAX_CONCURRENCY, decrease=0.8, increase=0.02,
+                 latency_tolerance=3.0, window=1.0):
+        self.ceiling = ceiling
+        self.min_rate = max(1.0, ceiling / 100)
+        self.bucket = TokenBucket(ceiling)
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self.decrease = decrease
+        self.increase = increase
+        self.latency_tolerance = latency_tolerance
+        self.window = window
+        self.successes = 0
+        self.served = 0
+        self.served_since = time.monotonic()
+        self.throttles = 0
+        self.throttled_rate = None
+        self.base_latency = None
+        self.latency = None
+        self.last_decrease = 0.0
+        self.last_increase = time.monotonic()
+        self.condition = threading.Condition()
+        self.async_waiters = deque()  # (loop, future) of coroutines waiting in enter_async()
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    # ---------- Admission ----------
+    def enter(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    async def enter_async(self):
+        """enter() for coroutines: parks on a future that leave() resolves, so the event loop keeps running."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self.condition:
+                    try:
+                        self.async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        self._wake(1)  # Already woken: hand the wakeup on
+                raise
+
+    def leave(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+            self._wake(1)
+
+    def _wake(self, count=None):
+        """Wakes `count` (default: all) coroutines waiting in enter_async(). Called with the condition held."""
+        while self.async_waiters and (count is None or count > 0):
+            loop, waiter = self.async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                continue  # Its event loop has closed
+            if count is not None:
+                count -= 1
+
+    # ---------- Feedback ----------
+    def observe(self, latency=None, throttled=False):
+        """Feeds one finished request (or a throttled attempt) into the AIMD loop."""
+        with self.condition:
+            now = time.monotonic()
+            if throttled:
+                self.throttles += 1
+                if self._cooled_down(now):
+                    # Cut from what S3 actually served since the last cut, which may be far below the budget
+                    elapsed = now - self.served_since
+                    served_rate = self.served / elapsed if self.served and elapsed >= self.window else self.rate
+                    self.throttled_rate = min(self.rate, served_rate)
+                    self.served, self.served_since = 0, now
+                    self.bucket.set_rate(max(self.min_rate, self.throttled_rate * self.decrease))
+                return
+
+            self.successes += 1
+            self.served += 1
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+                # The baseline follows the fastest recent responses but drifts up slowly, so it can recover
+                self.base_latency = latency if self.base_latency is None else min(self.base_latency * 1.001, latency)
+                if self.latency > self.base_latency * self.latency_tolerance and self.latency > 0.05:
+                    if self._cooled_down(now):
+                        # Cut from what is actually in flight, so a limit the pool never reached still bites
+                        self.limit = max(1, int(min(self.limit, self.in_flight) * self.decrease))
+                    return
+
+            if now - self.last_increase >= self.window:
+                self.last_increase = now
+                self.successes = 0
+                self.limit = min(self.max_concurrency, self.limit + 1)
+                step = self.ceiling * self.increase
+                if self.throttled_rate and self.rate >= self.throttled_rate * 0.9:
+                    step /= 8  # Probe carefully around the rate that was throttled last time
+                self.bucket.set_rate(min(self.ceiling, self.rate + step))
+                self.condition.notify_all()
+                self._wake()
+
+    def _cooled_down(self, now):
+        cooldown = max(self.window, 2 * (self.latency or 0))
+        if now - self.last_decrease < cooldown:
+            return False
+        self.last_decrease = now
+        self.last_increase = now
+        self.successes = 0
+        return True
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+class RateController:
+    """Process-wide registry of PrefixControllers, keyed by bucket, key prefix and read/write."""
+
+    def __init__(self, write_rate=PREFIX_WRITE_RATE, read_rate=PREFIX_READ_RATE, prefix_depth=PREFIX_DEPTH,
+                 max_concurrency=MAX_CONCURRENCY):
+        self.rates = {"write": write_rate, "read": read_rate}
+        self.prefix_depth = prefix_depth
+        self.max_concurrency = max_concurrency
+        self.controllers = {}
+        self.lock = threading.Lock()
+
+    def controller(self, bucket_name, key="", kind="write"):
+        """Returns the controller for the partition a key falls in."""
+        partition = (bucket_name, prefix_of(key, self.prefix_depth), kind)
+        controller = self.controllers.get(partition)
+        if controller is None:
+            with self.lock:
+                controller = self.controllers.setdefault(
+                    partition, PrefixController(self.rates[kind], self.max_concurrency)
+                )
+        return controller
+
+    @contextmanager
+    def slot(self, bucket_name, key="", kind="write", cost=1, timed=True):
+        """Waits for concurrency and rate budget, then times the request run inside the block.
+
+        `cost` is the number of S3 operations the request counts as (e.g. keys in a
+        DeleteObjects batch). Pass `timed=False` for body transfers, whose latency
+        reflects their size rather than congestion.
+        """
+        controller = self.controller(bucket_name, key, kind)
+        controller.enter()
+        try:
+            delay = controller.bucket.reserve(cost)
+            if delay:
+                time.sleep(delay)
+            start = time.monotonic()
+            try:
+                yield controller
+            except Exception as e:
+                controller.observe(throttled=is_throttle(e))
+                raise
+            controller.observe(time.monotonic() - start if timed else None)
+        finally:
+            controller.leave()
+
+    @asynccontextmanager
+    async def async_slot(self, bucket_name, key="", kind="write", cost=1, timed=True):
+        """asyncio version of slot(); waits without blocking the event loop."""
+        controller = self.controller(bucket_name, key, kind)
+        await controller.enter_async()
+        try:
+            delay = controller.bucket.reserve(cost)
+            if delay:
+                await asyncio.sleep(delay)
+            start = time.monotonic()
+            try:
+                yield controller
+            except Exception as e:
+                controller.observe(throttled=is_throttle(e))
+                raise
+            controller.observe(time.monotonic() - start if timed else None)
+        finally:
+            controller.leave()
+
+    def call(self, bucket_name, key, kind, call, cost=1, timed=True, max_attempts=MAX_TOTAL_ATTEMPTS):
+        """Runs `call()` in a slot, retrying throttled attempts with jittered exponential backoff.
+
+        `max_attempts` bounds the HTTP attempts of this loop and the client's own
+        retries together, so the two layers add up instead of multiplying.
+        """
+        attempts = 0
+        retry = 0
+        while True:
+            try:
+                with self.slot(bucket_name, key, kind, cost, timed):
+                    return call()
+            except Exception as e:
+                attempts += attempts_made(e)
+                if not is_throttle(e) or attempts >= max_attempts:
+                    raise
+            time.sleep(min(20.0, 0.1 * 2 ** retry) * random.uniform(0.5, 1.5))
+            retry += 1
+
+    def throttled(self, bucket_name, key="", kind="write"):
+        """Reports a throttled attempt that did not go through a slot (e.g. a botocore internal retry)."""
+        self.controller(bucket_name, key, kind).observe(throttled=True)
+
+    def snapshot(self):
+        """Returns the current rate, concurrency limit and throttle count of every partition."""
+        return [
+            {"bucket": bucket, "prefix": prefix, "kind": kind, "rate": round(c.rate, 1), "limit": c.limit,
+             "in_flight": c.in_flight, "throttles": c.throttles}
+            for (bucket, prefix, kind), c in sorted(self.controllers.items())
+        ]
+
+    def log_snapshot(self):
+        for row in self.snapshot():
+            if row["throttles"]:
+                logging.info(
+                    f"🚦 s3://{row['bucket']}/{row['prefix']} ({row['kind']}): settled at {row['rate']:.0f} req/s, "
+                    f"{row['limit']} in flight after {row['throttles']} throttles"
+                )
+
+# ================= Shared Controller =================
+READ_OPERATIONS = {"GetObject", "HeadObject", "ListObjectsV2", "ListObjects", "ListObjectVersions", "ListParts",
+                   "ListMultipartUploads", "GetObjectTagging", "SelectObjectContent"}
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def shared_controller():
+    """Returns the process-wide RateController, creating it on first use."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = RateController()
+    return _controller
+
+def _record_partition(params, context, **kwargs):
+    context["rate_partition"] = (params.get("Bucket"), params.get("Key", ""))
+
+def _report_throttle(response, operation, request_dict, **kwargs):
+    if response is None or not is_throttle(response[1]):
+        return None
+    bucket_name, key = request_dict.get("context", {}).get("rate_partition", (None, ""))
+    if bucket_name:
+        kind = "read" if operation.name in READ_OPERATIONS else "write"
+        shared_controller().throttled(bucket_name, key, kind)
+    return None
+
+def instrument_client(client):
+    """Makes a botocore S3 client report every throttled attempt, including ones it retries itself."""
+    client.meta.events.register("before-parameter-build.s3", _record_partition)
+    # Registered first so it sees the response before the retry handler decides to sleep and retry
+    client.meta.events.register_first("needs-retry.s3", _report_throttle)
+    return client
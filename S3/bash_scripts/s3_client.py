@@ -0,0 +1,86 @@
+#✔ Shared Clients: One S3 client per region/credentials, created on first use and reused by every module.
+#✔ Lazy Startup: boto3 is only imported and clients only built when a call is actually made (fast --help).
+#✔ Tuned Connections: Large connection pool, standard retries, timeouts and TCP keepalive for bulk work.
+#✔ Throttle Feedback: Every client reports SlowDown responses to the shared per-prefix rate controller.
+
+import os
+import threading
+
+# Default region, overridable with the usual AWS environment variables
+REGION = os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or "eu-west-2"
+
+# Enough pooled connections for 64+ concurrent requests without pool-exhaustion warnings
+MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "128"))
+MAX_ATTEMPTS = int(os.environ.get("S3_MAX_ATTEMPTS", "10"))
+CONNECT_TIMEOUT = float(os.environ.get("S3_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("S3_READ_TIMEOUT", "60"))
+
+_clients = {}
+_sessions = {}
+_lock = threading.Lock()
+
+def client_config(max_pool_connections=MAX_POOL_CONNECTIONS, max_attempts=MAX_ATTEMPTS,
+                  connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, tcp_keepalive=True):
+    """Returns the botocore Config shared by every S3 client."""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max_pool_connections,
+        # Pacing is left to rate_control: adaptive mode's client-wide limiter lets one throttled prefix stall them all
+        retries={"mode": "standard", "max_attempts": max_attempts},
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        tcp_keepalive=tcp_keepalive
+    )
+
+def _credentials_key(profile_name):
+    """Identifies the credentials a client would use, so different identities never share a client."""
+    return (
+        profile_name or os.environ.get("AWS_PROFILE"),
+        os.environ.get("AWS_ACCESS_KEY_ID"),
+        os.environ.get("AWS_ROLE_ARN"),
+    )
+
+def _session(profile_name):
+    """Returns a cached boto3 session per profile (sessions are not safe to create clients from concurrently)."""
+    import boto3
+
+    if profile_name not in _sessions:
+        _sessions[profile_name] = boto3.session.Session(profile_name=profile_name)
+    return _sessions[profile_name]
+
+def get_s3_client(region_name=None, profile_name=None, max_pool_connections=None, **config_overrides):
+    """Returns the shared S3 client for a region and set of credentials, creating it on first use.
+
+    `max_pool_connections` only needs to be passed when a caller runs more
+    concurrent requests than the default pool holds.
+    """
+    region_name = region_name or REGION
+    max_pool_connections = max(max_pool_connections or 0, MAX_POOL_CONNECTIONS)
+    key = (region_name, _credentials_key(profile_name), max_pool_connections, tuple(sorted(config_overrides.items())))
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        if key not in _clients:
+            config = client_config(max_pool_connections=max_pool_connections, **config_overrides)
+            from rate_control import instrument_client
+            from instrumentation import attach
+
+            client = _session(profile_name).client("s3", region_name=region_name, config=config)
+            _clients[key] = attach(instrument_client(client))
+        return _clients[key]
+
+class LazyS3Client:
+    """Stands in for an S3 client at module level and resolves the shared client on first use."""
+
+    def __init__(self, region_name=None, profile_name=None, **kwargs):
+        self._kwargs = dict(region_name=region_name, profile_name=profile_name, **kwargs)
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = get_s3_client(**self._kwargs)
+        return getattr(self._client, name)
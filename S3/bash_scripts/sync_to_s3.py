@@ -0,0 +1,335 @@
+#✔ Incremental Sync: Uploads or deletes only the paths that changed, instead of a full `aws s3 sync`.
+#✔ Local Manifest: Tracks path, size, mtime and ETag of every synced file in SQLite.
+#✔ Event Debouncing: Coalesces bursts of filesystem events into a single batch.
+#✔ Content Check: Touched-but-identical files are recognised by ETag and not re-uploaded.
+#✔ Compression: With --compress gzip|zstd, changed files are uploaded through the streaming compressor.
+#✔ Explicit Reconciliation: Re-lists the remote prefix only when asked to with --reconcile.
+#✔ Rate Controlled: Uploads and deletes are paced per key prefix by the shared rate controller and throttled requests are retried.
+
+import os
+import sys
+import time
+import queue
+import shutil
+import sqlite3
+import logging
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError, ClientError
+
+from upload_files import MB, create_client, iter_files, transfer_config, upload_errors
+from compression import CODECS, StreamCompressor, should_compress, upload_compressed
+from content_hash import DEFAULT_HASH_CACHE, HashCache, normalize_etag
+from list_s3_contents import iter_objects
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+DEFAULT_MANIFEST = os.path.expanduser("~/.s3_sync_manifest.db")
+MULTIPART_THRESHOLD = 16 * MB
+PART_SIZE = 8 * MB
+
+# ================= Manifest =================
+def open_manifest(path):
+    """Opens (and creates if needed) the SQLite manifest of synced files."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS files (
+               bucket TEXT NOT NULL,
+               key TEXT NOT NULL,
+               path TEXT NOT NULL,
+               size INTEGER NOT NULL,
+               mtime_ns INTEGER NOT NULL,
+               etag TEXT,
+               PRIMARY KEY (bucket, key)
+           )"""
+    )
+    conn.commit()
+    return conn
+
+def manifest_entry(conn, bucket_name, key):
+    """Returns (size, mtime_ns, etag) for a synced key, or None."""
+    return conn.execute(
+        "SELECT size, mtime_ns, etag FROM files WHERE bucket = ? AND key = ?", (bucket_name, key)
+    ).fetchone()
+
+def manifest_keys_under(conn, bucket_name, key_prefix):
+    """Returns every synced key under a key prefix (used when a directory is deleted)."""
+    rows = conn.execute(
+        "SELECT key FROM files WHERE bucket = ? AND key >= ? AND key < ?",
+        (bucket_name, key_prefix, key_prefix + "\U0010ffff")
+    )
+    return [row[0] for row in rows]
+
+# ================= Sync Engine =================
+class S3Syncer:
+    """Keeps an S3 prefix in step with a local directory using a local manifest."""
+
+    def __init__(self, local_dir, bucket_name, s3_prefix="", manifest_path=DEFAULT_MANIFEST, workers=8,
+                 hash_cache_path=DEFAULT_HASH_CACHE, compressor=None):
+        self.local_dir = os.path.abspath(local_dir)
+        self.bucket_name = bucket_name
+        self.s3_prefix = s3_prefix.strip("/") + "/" if s3_prefix.strip("/") else ""
+        self.workers = workers
+        self.s3 = create_client(workers, 1)
+        self.transfer_config = transfer_config(PART_SIZE, MULTIPART_THRESHOLD, 1)
+        self.conn = open_manifest(manifest_path)
+        self.hash_cache = HashCache(hash_cache_path)
+        self.compressor = compressor
+
+    def key_for(self, path):
+        """Maps a local path to its S3 key."""
+        relative = os.path.relpath(path, self.local_dir).replace(os.sep, "/")
+        return self.s3_prefix + relative
+
+    def _upload(self, path, key, size):
+        """Uploads one file and returns its ETag."""
+        if self.compressor and should_compress(path, size):
+            stat = os.stat(path)
+            _, etag = upload_compressed(self.s3, self.compressor, path, self.bucket_name, key, PART_SIZE, 1)
+            self.hash_cache.remember_stored(path, etag, stat)
+            return normalize_etag(etag)
+
+        controller = shared_controller()
+        if size < MULTIPART_THRESHOLD:
+            with open(path, "rb") as f:
+                def put():
+                    f.seek(0)  # A throttled attempt may have read part of the file already
+                    return self.s3.put_object(Bucket=self.bucket_name, Key=key, Body=f)
+
+                response = controller.call(self.bucket_name, key, "write", put, timed=False)
+            return response["ETag"].strip('"')
+
+        controller.call(self.bucket_name, key, "write",
+                        lambda: self.s3.upload_file(path, self.bucket_name, key, Config=self.transfer_config), timed=False)
+        response = controller.call(self.bucket_name, key, "read", lambda: self.s3.head_object(Bucket=self.bucket_name, Key=key))
+        return response["ETag"].strip('"')
+
+    def _delete(self, keys):
+        """Deletes keys from S3 in batches of 1,000. Returns {key: error code} for keys S3 did not delete."""
+        errors = {}
+        for i in range(0, len(keys), 1000):
+            batch = keys[i:i + 1000]
+            response = shared_controller().call(self.bucket_name, batch[0], "write", lambda: self.s3.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+            ), cost=len(batch))
+            # With Quiet=True only failures are reported
+            errors.update((error["Key"], error.get("Code")) for error in response.get("Errors", []))
+        return errors
+
+    def _changed_files(self, paths):
+        """Expands changed paths into (path, key, stat, known_etag) for files that differ from the manifest, plus deleted keys."""
+        changed, deleted = [], []
+        for path in paths:
+            if os.path.isdir(path):
+                candidates = iter_files(path)
+                # Files removed inside a still-existing directory
+                dir_prefix = self.s3_prefix if os.path.abspath(path) == self.local_dir else self.key_for(path) + "/"
+                for key in manifest_keys_under(self.conn, self.bucket_name, dir_prefix):
+                    if not os.path.exists(os.path.join(self.local_dir, key[len(self.s3_prefix):])):
+                        deleted.append(key)
+            elif os.path.isfile(path):
+                candidates = [path]
+            else:
+                key = self.key_for(path)
+                if manifest_entry(self.conn, self.bucket_name, key):
+                    deleted.append(key)
+                else:
+                    deleted.extend(manifest_keys_under(self.conn, self.bucket_name, key + "/"))
+                continue
+
+            for file_path in candidates:
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue  # Removed again before we got to it
+                key = self.key_for(file_path)
+                entry = manifest_entry(self.conn, self.bucket_name, key)
+                if entry is None or entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+                    # A compressed object's size differs from the file's, so its ETag is worth checking either way
+                    known_etag = entry[2] if entry and (entry[0] == stat.st_size or self.compressor) else None
+                    changed.append((file_path, key, stat, known_etag))
+        return changed, deleted
+
+    def sync_paths(self, paths):
+        """Uploads or deletes only the given changed paths and updates the manifest."""
+        changed, deleted = self._changed_files(paths)
+        if not changed and not deleted:
+            return
+
+        logging.info(f"🔄 Syncing {len(changed)} changed and {len(deleted)} deleted paths to 's3://{self.bucket_name}/{self.s3_prefix}'...")
+
+        errors = upload_errors()
+
+        def upload(item):
+            path, key, stat, known_etag = item
+            try:
+                # Same size and content as what's already synced (e.g. only touched): just refresh the manifest
+                if known_etag and (self.hash_cache.matches_remote(path, known_etag, PART_SIZE, MULTIPART_THRESHOLD, stat)
+                                   or self.hash_cache.stored_as(path, known_etag, stat)):
+                    return item, normalize_etag(known_etag)
+                return item, self._upload(path, key, stat.st_size)
+            except errors as e:
+                logging.error(f"❌ Failed to upload '{path}': {e}")
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(upload, changed))
+
+        with self.conn:
+            for (path, key, stat, _), etag in results:
+                if etag is None:
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (bucket, key, path, size, mtime_ns, etag) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.bucket_name, key, path, stat.st_size, stat.st_mtime_ns, etag)
+                )
+
+        delete_errors = {}
+        if deleted:
+            try:
+                delete_errors = self._delete(deleted)
+            except (BotoCoreError, ClientError) as e:
+                logging.error(f"❌ Failed to delete removed files: {e}")
+                delete_errors = dict.fromkeys(deleted)
+            else:
+                for key, code in delete_errors.items():
+                    logging.error(f"❌ Failed to delete '{key}': {code}")
+                # Keys S3 refused stay in the manifest, so the next sync of their paths deletes them again
+                with self.conn:
+                    self.conn.executemany(
+                        "DELETE FROM files WHERE bucket = ? AND key = ?",
+                        [(self.bucket_name, key) for key in deleted if key not in delete_errors]
+                    )
+
+        failed = sum(1 for _, etag in results if etag is None)
+        if failed or delete_errors:
+            logging.error(f"❌ Sync finished with {failed} failed uploads and {len(delete_errors)} failed deletes.")
+        else:
+            logging.info("✅ Sync completed successfully.")
+
+    def scan(self):
+        """Compares the local tree against the manifest (no remote listing) and syncs differences."""
+        self.sync_paths([self.local_dir])
+
+    def reconcile(self, delete_remote_extras=False):
+        """Re-lists the remote prefix, rebuilds the manifest from it and uploads anything missing or different."""
+        logging.info(f"🔍 Reconciling with 's3://{self.bucket_name}/{self.s3_prefix}' (full remote listing)...")
+        remote = {}
+        for obj in iter_objects(self.bucket_name, prefix=self.s3_prefix):
+            remote[obj["Key"]] = (obj["Size"], obj["ETag"].strip('"'))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM files WHERE bucket = ? AND key >= ? AND key < ?",
+                              (self.bucket_name, self.s3_prefix, self.s3_prefix + "\U0010ffff"))
+            for path in iter_files(self.local_dir):
+                key = self.key_for(path)
+                if key not in remote:
+                    continue
+                size, etag = remote.pop(key)
+                # mtime -1 forces a content check: files whose local ETag matches are not re-uploaded
+                self.conn.execute(
+                    "INSERT INTO files (bucket, key, path, size, mtime_ns, etag) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.bucket_name, key, path, size, -1, etag)
+                )
+
+        self.sync_paths([self.local_dir])
+
+        if remote and delete_remote_extras:
+            logging.info(f"🗑 Deleting {len(remote)} remote objects that no longer exist locally...")
+            self._delete(list(remote))
+
+# ================= Filesystem Events =================
+def watch_inotify(local_dir, events):
+    """Streams changed paths from `inotifywait -m` onto the events queue."""
+    process = subprocess.Popen(
+        ["inotifywait", "-m", "-r", "-q", "-e", "close_write,create,delete,moved_to,moved_from",
+         "--format", "%w%f", local_dir],
+        stdout=subprocess.PIPE, text=True
+    )
+    for line in process.stdout:
+        events.put(line.rstrip("\n"))
+
+def watch_polling(syncer, interval):
+    """Fallback when inotifywait is unavailable: re-scans the local tree against the manifest."""
+    while True:
+        time.sleep(interval)
+        syncer.scan()
+
+def run_daemon(syncer, debounce=2.0, max_delay=30.0):
+    """Consumes filesystem events, coalescing bursts until `debounce` seconds pass without new events."""
+    if not shutil.which("inotifywait"):
+        logging.warning("⚠ inotifywait not found; falling back to polling the local tree.")
+        watch_polling(syncer, max(debounce, 5.0))
+        return
+
+    events = queue.Queue()
+    threading.Thread(target=watch_inotify, args=(syncer.local_dir, events), daemon=True).start()
+
+    while True:
+        pending = {events.get()}
+        first_event = time.monotonic()
+        while time.monotonic() - first_event < max_delay:
+            try:
+                pending.add(events.get(timeout=debounce))
+            except queue.Empty:
+                break
+        syncer.sync_paths(sorted(pending))
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Incrementally sync a local directory to S3.")
+    parser.add_argument("local_dir", help="Local directory to watch")
+    parser.add_argument("bucket_name", help="Destination S3 bucket")
+    parser.add_argument("--prefix", default="", help="S3 folder (prefix) to sync into")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Path of the SQLite manifest")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent uploads per batch")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds of quiet before a batch is synced")
+    parser.add_argument("--reconcile", action="store_true", help="Re-list the remote prefix and rebuild the manifest first")
+    parser.add_argument("--delete", action="store_true", help="With --reconcile, delete remote objects missing locally")
+    parser.add_argument("--once", action="store_true", help="Sync once and exit instead of watching")
+    parser.add_argument("--compress", choices=CODECS, help="Compress files on the fly (zstd needs the zstandard package)")
+    parser.add_argument("--compression-level", type=int, help="Codec level (default: gzip 6, zstd 3)")
+    parser.add_argument("--compression-threads", type=int, help="Threads compressing chunks (default: CPU count)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to run the sync daemon."""
+    args = parse_args(argv)
+
+    if not os.path.isdir(args.local_dir):
+        logging.error(f"❌ Error: The directory '{args.local_dir}' does not exist.")
+        sys.exit(1)
+
+    compressor = None
+    if args.compress:
+        try:
+            compressor = StreamCompressor(args.compress, args.compression_level, args.compression_threads)
+        except RuntimeError as e:
+            logging.error(f"❌ {e}")
+            sys.exit(1)
+    syncer = S3Syncer(args.local_dir, args.bucket_name, args.prefix, args.manifest, args.workers, compressor=compressor)
+
+    if args.reconcile:
+        syncer.reconcile(delete_remote_extras=args.delete)
+    else:
+        syncer.scan()
+
+    if args.once:
+        return
+
+    logging.info(f"🚀 Watching for changes in '{syncer.local_dir}'... (Press Ctrl+C to stop)")
+    try:
+        run_daemon(syncer, debounce=args.debounce)
+    except KeyboardInterrupt:
+        logging.info("👋 Stopped watching.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
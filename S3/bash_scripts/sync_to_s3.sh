@@ -4,6 +4,7 @@
 BUCKET_NAME="demo-sirvan-v1"  # Your S3 bucket
 LOCAL_DIR="/e/AWS Project/S3/files"  # Your correct local directory
 S3_DIR="Home/users/"  # Your correct S3 directory
+COMPRESS=""  # gzip or zstd to compress files on the way up (download_files.py decompresses them); empty for raw bytes
 
 # Check if AWS CLI is configured
 if ! aws sts get-caller-identity &>/dev/null; then
@@ -17,24 +18,8 @@ if [ ! -d "$LOCAL_DIR" ]; then
     exit 1
 fi
 
-echo "🚀 Watching for changes in '$LOCAL_DIR'... (Press Ctrl+C to stop)"
-
-# Function to sync files to S3
-sync_files() {
-    echo "🔄 Syncing '$LOCAL_DIR' to 's3://$BUCKET_NAME/$S3_DIR'..."
-    aws s3 sync "$LOCAL_DIR" "s3://$BUCKET_NAME/$S3_DIR" --exact-timestamps
-    if [ $? -eq 0 ]; then
-        echo "✅ Sync completed successfully."
-    else
-        echo "❌ Sync failed."
-    fi
-}
-
-# Initial sync
-sync_files
-
-# Watch for changes using inotifywait (Linux/macOS) or fswatch (alternative for macOS)
-while true; do
-    inotifywait -r -e modify,create,delete "$LOCAL_DIR" &>/dev/null
-    sync_files
-done
+# Hand off to the incremental Python sync daemon: it keeps a local manifest and only
+# uploads/deletes the paths reported by inotifywait, instead of a full `aws s3 sync`
+# on every event. Pass --reconcile to force a full remote re-listing.
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+exec python3 "$SCRIPT_DIR/sync_to_s3.py" "$LOCAL_DIR" "$BUCKET_NAME" --prefix "$S3_DIR" ${COMPRESS:+--compress "$COMPRESS"} "$@"
@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SCRIPTS_DIR, os.path.join(SCRIPTS_DIR, "bucket_setting")]
+
+# Fake credentials and private caches, set before the scripts read them at import time
+STATE_DIR = tempfile.mkdtemp(prefix="s3-scripts-tests-")
+os.environ.pop("AWS_ENDPOINT_URL", None)
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing", "AWS_REGION": "us-east-1",
+    "S3_BUCKET_REGION_CACHE": os.path.join(STATE_DIR, "regions.json"),
+    "S3_UPLOAD_STATE_DIR": os.path.join(STATE_DIR, "uploads"),
+    "S3_OBJECT_INDEX": os.path.join(STATE_DIR, "index.db"),
+})
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_s3():
+    """In-process moto S3, started before any shared client is created."""
+    moto = pytest.importorskip("moto")
+    with moto.mock_aws():
+        yield
@@ -0,0 +1,39 @@
+import boto3
+from botocore.exceptions import ClientError
+
+from access_log_analyzer import analyze_logs, load_state
+
+BUCKET = "access-logs-1"
+LINE = ('owner {bucket} [06/Feb/2024:00:00:38 +0000] 192.0.2.3 requester REQ REST.GET.OBJECT {key} '
+        '"GET /{bucket}/{key} HTTP/1.1" 200 - 100 100 7 5 "-" "ua" -\n')
+
+class FlakyClient:
+    """Passes calls through to S3, but denies GetObject for some keys."""
+
+    def __init__(self, denied):
+        self.s3 = boto3.client("s3")
+        self.denied = set(denied)
+
+    def get_object(self, Bucket, Key):
+        if Key in self.denied:
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "GetObject")
+        return self.s3.get_object(Bucket=Bucket, Key=Key)
+
+def test_unreadable_logs_are_retried_on_the_next_run(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    keys = [f"logs/2024-02-06-00-00-{i:02d}" for i in range(4)]
+    for key in keys:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=LINE.format(bucket="data", key=key).encode())
+    state_path = str(tmp_path / "state.json.gz")
+
+    stats = analyze_logs(BUCKET, workers=2, processes=1, state_path=state_path, batch_objects=2,
+                         s3=FlakyClient(denied=[keys[1]]))
+    assert (stats["objects"], stats["lines"]) == (3, 3)
+    start_after, _, failed = load_state(state_path)
+    assert (start_after, failed) == (keys[-1], [keys[1]])
+
+    stats = analyze_logs(BUCKET, workers=2, processes=1, state_path=state_path, s3=FlakyClient(denied=[]))
+    assert (stats["objects"], stats["lines"]) == (4, 4)
+    assert sorted(stats["keys"]) == keys
+    assert load_state(state_path)[::2] == (keys[-1], [])
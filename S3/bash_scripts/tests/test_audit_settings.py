@@ -0,0 +1,18 @@
+from botocore.exceptions import ReadTimeoutError
+
+from audit_settings import audit_buckets
+
+class TimingOutClient:
+    """Answers every versioning request, except for one bucket whose requests time out."""
+
+    def get_bucket_versioning(self, Bucket):
+        if Bucket == "slow-bucket":
+            raise ReadTimeoutError(endpoint_url=f"https://{Bucket}.s3.amazonaws.com")
+        return {"Status": "Enabled"}
+
+def test_connection_errors_fail_only_their_bucket():
+    records = audit_buckets(["fast-bucket", "slow-bucket"], settings=["versioning"], workers=2, s3=TimingOutClient())
+    by_bucket = {r["bucket"]: r for r in records}
+    assert by_bucket["fast-bucket"]["status"] == "ok"
+    assert by_bucket["slow-bucket"]["status"] == "error"
+    assert by_bucket["slow-bucket"]["error"] == "ReadTimeoutError"
@@ -0,0 +1,82 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from bulk_mutate import StorageClassAction, TagAction, mutate_objects, select_objects
+from checkpoint import KeyCheckpoint
+
+BUCKET = "mutate-bucket-1"
+
+@pytest.fixture(scope="module", autouse=True)
+def bucket():
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+
+class ScriptedAction:
+    """Fails with AccessDenied for `denied` keys and stops dead (like an interrupted run) at `crash` keys."""
+
+    def __init__(self, denied=(), crash=()):
+        self.denied, self.crash = set(denied), set(crash)
+
+    def describe(self):
+        return "Testing"
+
+    def apply(self, s3, bucket_name, obj):
+        if obj["Key"] in self.crash:
+            raise RuntimeError("interrupted")
+        if obj["Key"] in self.denied:
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "PutObjectTagging")
+        return True
+
+def test_interrupted_retry_keeps_unretried_keys(tmp_path):
+    s3 = boto3.client("s3")
+    keys = [f"retry/{name}" for name in "abcd"]
+    for key in keys:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+    path = str(tmp_path / "checkpoint.json")
+
+    objects = select_objects(BUCKET, "retry/")
+    mutate_objects(BUCKET, objects, ScriptedAction(denied=keys[:3]), workers=2, checkpoint_path=path)
+    assert sorted(KeyCheckpoint(path).failed) == keys[:3]
+
+    # The retry fixes one key, fails another again and never finishes the third
+    mutate_objects(BUCKET, [], ScriptedAction(denied=keys[1:2], crash=keys[2:3]), workers=1,
+                   checkpoint_path=path, retry_failed=True)
+    assert sorted(KeyCheckpoint(path).failed) == keys[1:3]
+
+def tags_of(key):
+    tag_set = boto3.client("s3").get_object_tagging(Bucket=BUCKET, Key=key)["TagSet"]
+    return {tag["Key"]: tag["Value"] for tag in tag_set}
+
+def test_tag_merge_only_touches_objects_that_change():
+    s3 = boto3.client("s3")
+    s3.put_object(Bucket=BUCKET, Key="tags/a.csv", Body=b"a", Tagging="team=data&stage=raw")
+    s3.put_object(Bucket=BUCKET, Key="tags/b.csv", Body=b"b", Tagging="stage=clean")
+    s3.put_object(Bucket=BUCKET, Key="tags/c.txt", Body=b"c")
+    action = TagAction({"stage": "clean"}, remove=["team"])
+
+    summary = mutate_objects(BUCKET, select_objects(BUCKET, "tags/", file_extension=".csv"), action, workers=2)
+    assert (summary["changed"], summary["unchanged"], summary["failed"]) == (1, 1, 0)
+    assert tags_of("tags/a.csv") == {"stage": "clean"}
+    assert tags_of("tags/b.csv") == {"stage": "clean"}
+    assert tags_of("tags/c.txt") == {}
+
+    summary = mutate_objects(BUCKET, select_objects(BUCKET, "tags/"), TagAction({"owner": "ops"}, merge=True), workers=2)
+    assert summary["changed"] == 3
+    assert tags_of("tags/a.csv") == {"stage": "clean", "owner": "ops"}
+
+def test_storage_class_rewrite_keeps_metadata_and_tags():
+    s3 = boto3.client("s3")
+    s3.put_object(Bucket=BUCKET, Key="tier/hot.bin", Body=b"hot", Metadata={"origin": "test"},
+                  ContentType="application/x-test", Tagging="team=data")
+    s3.put_object(Bucket=BUCKET, Key="tier/cold.bin", Body=b"cold", StorageClass="GLACIER")
+    action = StorageClassAction("STANDARD_IA")
+
+    summary = mutate_objects(BUCKET, select_objects(BUCKET, "tier/"), action, workers=2)
+    assert (summary["changed"], summary["unchanged"], summary["failed"]) == (1, 1, 0)
+    head = s3.head_object(Bucket=BUCKET, Key="tier/hot.bin")
+    assert (head["StorageClass"], head["Metadata"], head["ContentType"]) == ("STANDARD_IA", {"origin": "test"}, "application/x-test")
+    assert tags_of("tier/hot.bin") == {"team": "data"}
+    assert s3.head_object(Bucket=BUCKET, Key="tier/cold.bin")["StorageClass"] == "GLACIER"
+
+    summary = mutate_objects(BUCKET, select_objects(BUCKET, "tier/"), action, workers=2)
+    assert summary["changed"] == 0
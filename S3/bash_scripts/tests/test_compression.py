@@ -0,0 +1,57 @@
+import os
+
+import boto3
+import pytest
+
+from compression import KB, MB, StreamCompressor, decompress_file, upload_compressed
+from download_files import download_object
+
+BUCKET = "compression-bucket-1"
+
+@pytest.fixture(scope="module")
+def bucket():
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+    return BUCKET
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "events.log"
+    lines = b"".join(b"%06d GET /index.html 200\n" % n for n in range(20000))
+    path.write_bytes(lines + os.urandom(1200 * KB).hex().encode())  # Still over 1 MB once compressed
+    return path
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_compressed_upload_round_trip(codec, bucket, text_file, tmp_path):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    compressor = StreamCompressor(codec, threads=2, chunk_size=64 * KB)  # Several chunks, compressed in parallel
+    try:
+        size, _ = upload_compressed(boto3.client("s3"), compressor, str(text_file), bucket, f"logs/{codec}.log")
+    finally:
+        compressor.shutdown()
+    original = text_file.read_bytes()
+    assert size == len(original)
+    assert compressor.stats()["bytes_out"] < len(original) // 2
+
+    s3 = boto3.client("s3")
+    head = s3.head_object(Bucket=bucket, Key=f"logs/{codec}.log")
+    assert head["ContentLength"] > MB  # So the second download below takes more than one range
+    assert (head["ContentEncoding"], head["Metadata"]["uncompressed-size"]) == (codec, str(len(original)))
+    compressed = tmp_path / "object"
+    compressed.write_bytes(s3.get_object(Bucket=bucket, Key=f"logs/{codec}.log")["Body"].read())
+    assert decompress_file(str(compressed), str(tmp_path / "decoded"), codec) == len(original)
+    assert (tmp_path / "decoded").read_bytes() == original
+
+    # The downloader decodes transparently, both in one request and in ranges
+    for part_size_mb, threshold_mb in ((16, 32), (1, 0)):
+        dest = tmp_path / f"download-{part_size_mb}.log"
+        summary = download_object(bucket, f"logs/{codec}.log", str(dest), workers=2, part_size_mb=part_size_mb,
+                                  multipart_threshold_mb=threshold_mb, hash_cache_path=str(tmp_path / "hashes.db"))
+        assert summary["files"] == 1
+        assert dest.read_bytes() == original
+
+def test_corrupt_data_is_rejected(tmp_path):
+    path = tmp_path / "corrupt.gz"
+    path.write_bytes(b"not gzip at all")
+    with pytest.raises(ValueError):
+        decompress_file(str(path), str(tmp_path / "out"), "gzip")
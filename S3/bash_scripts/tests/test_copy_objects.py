@@ -0,0 +1,62 @@
+import boto3
+from botocore.exceptions import ClientError
+
+from checkpoint import KeyCheckpoint
+from copy_objects import copy_prefix
+
+SOURCE, DESTINATION = "copy-source-1", "copy-destination-1"
+KEYS = [f"src/{name}.txt" for name in "abcdef"]
+
+class ScriptedClient:
+    """Passes calls through to S3, recording CopyObject keys; `crash` keys stop the worker like an interruption."""
+
+    def __init__(self, crash=(), denied=()):
+        self.s3 = boto3.client("s3")
+        self.crash, self.denied = set(crash), set(denied)
+        self.copied = []
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def copy_object(self, **kwargs):
+        key = kwargs["CopySource"]["Key"]
+        self.copied.append(key)
+        if key in self.crash:
+            raise RuntimeError("interrupted")
+        if key in self.denied:
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "CopyObject")
+        return self.s3.copy_object(**kwargs)
+
+def destination_keys():
+    listing = boto3.client("s3").list_objects_v2(Bucket=DESTINATION).get("Contents", [])
+    return [obj["Key"] for obj in listing]
+
+def test_interrupted_copy_resumes_after_the_checkpoint(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=SOURCE)
+    s3.create_bucket(Bucket=DESTINATION)
+    for key in KEYS:
+        s3.put_object(Bucket=SOURCE, Key=key, Body=key.encode(), Metadata={"origin": "test"},
+                      Tagging="team=data", StorageClass="STANDARD_IA")
+    path = str(tmp_path / "copy.json")
+    options = {"source_prefix": "src/", "destination_prefix": "dst/", "workers": 1, "checkpoint_path": path}
+
+    first = ScriptedClient(crash=[KEYS[3]], denied=[KEYS[1]])
+    copy_prefix(SOURCE, DESTINATION, s3=first, **options)
+    checkpoint = KeyCheckpoint(path)
+    assert (checkpoint.start_after, list(checkpoint.failed), checkpoint.complete) == (KEYS[2], [KEYS[1]], False)
+
+    second = ScriptedClient()
+    summary = copy_prefix(SOURCE, DESTINATION, s3=second, **options)
+    assert second.copied == KEYS[3:]
+    assert summary["failed"] == 0 and KeyCheckpoint(path).complete
+
+    third = ScriptedClient()
+    copy_prefix(SOURCE, DESTINATION, s3=third, retry_failed=True, **options)
+    assert third.copied == [KEYS[1]]
+    assert not KeyCheckpoint(path).failed
+    assert destination_keys() == [key.replace("src/", "dst/") for key in KEYS]
+
+    head = s3.head_object(Bucket=DESTINATION, Key="dst/a.txt")
+    assert (head["Metadata"], head["StorageClass"]) == ({"origin": "test"}, "STANDARD_IA")
+    assert s3.get_object_tagging(Bucket=DESTINATION, Key="dst/a.txt")["TagSet"] == [{"Key": "team", "Value": "data"}]
@@ -0,0 +1,39 @@
+from bucket_region import region_cache
+from create_s3_bucket import REGION, bucket_exists, create_s3_bucket, provision_buckets
+
+SPECS = [
+    {"name": "Bad_Name!!", "region": "us-east-1", "settings": {}},
+    {"name": "good-bucket-1", "region": "us-east-1", "settings": {}},
+]
+
+def test_invalid_name_fails_only_its_own_bucket():
+    results = {r["bucket"]: r for r in provision_buckets(SPECS)}
+    assert results["Bad_Name!!"]["status"] == "failed"
+    assert results["Bad_Name!!"]["error"] == "ParamValidationError"
+    assert results["good-bucket-1"]["status"] == "created"
+
+def test_dry_run_reports_invalid_name():
+    results = {r["bucket"]: r for r in provision_buckets(SPECS, dry_run=True)}
+    assert results["Bad_Name!!"]["status"] == "failed"
+    assert results["good-bucket-1"]["status"] in ("would-create", "exists")
+
+def test_interactive_create_in_us_east_1():
+    assert REGION == "us-east-1"
+    assert create_s3_bucket("interactive-bucket-1")
+    assert bucket_exists("interactive-bucket-1")
+
+def test_reprovisioning_reports_existing_buckets():
+    specs = [{"name": "again-bucket-1", "region": "us-east-1", "settings": {}},
+             {"name": "again-bucket-2", "region": "eu-west-1", "settings": {}}]
+    assert [r["status"] for r in provision_buckets(specs)] == ["created", "created"]
+    assert [r["status"] for r in provision_buckets(specs)] == ["exists", "exists"]
+    assert region_cache().get("again-bucket-2") == "eu-west-1"
+
+def test_existing_bucket_in_another_region_is_a_mismatch():
+    provision_buckets([{"name": "moved-bucket-1", "region": "eu-west-1", "settings": {}}])
+    region_cache().set("moved-bucket-1", "us-west-2")
+    result, = provision_buckets([{"name": "moved-bucket-1", "region": "us-west-2", "settings": {}}])
+    assert result["status"] == "region-mismatch"
+    assert region_cache().get("moved-bucket-1") == "eu-west-1"
+    planned, = provision_buckets([{"name": "moved-bucket-1", "region": "us-west-2", "settings": {}}], dry_run=True)
+    assert planned["status"] == "region-mismatch"
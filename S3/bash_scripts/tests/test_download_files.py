@@ -0,0 +1,59 @@
+import os
+
+import boto3
+from botocore.exceptions import ClientError
+
+from download_files import CHECKPOINT_SUFFIX, MB, download_object, download_prefix
+
+BUCKET = "download-bucket-1"
+
+def test_key_escaping_the_destination_fails_only_itself(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_object(Bucket=BUCKET, Key="data/../../escape.txt", Body=b"nope")
+    s3.put_object(Bucket=BUCKET, Key="data/ok.txt", Body=b"fine")
+
+    dest = tmp_path / "dest"
+    summary = download_prefix(BUCKET, "data/", str(dest), workers=2, hash_cache_path=str(tmp_path / "hashes.db"))
+    assert (summary["files"], summary["failed"]) == (1, 1)
+    assert (dest / "ok.txt").read_bytes() == b"fine"
+    assert not (tmp_path / "escape.txt").exists()
+
+class RecordingClient:
+    """Passes calls through to S3, recording GetObject ranges and rejecting the ranges in `fail`."""
+
+    def __init__(self, fail=()):
+        self.s3 = boto3.client("s3")
+        self.fail = set(fail)
+        self.ranges = []
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def get_object(self, **kwargs):
+        self.ranges.append(kwargs.get("Range"))
+        if kwargs.get("Range") in self.fail:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        return self.s3.get_object(**kwargs)
+
+def test_interrupted_download_resumes_missing_ranges(tmp_path):
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    body = os.urandom(3 * MB)
+    s3.put_object(Bucket=BUCKET, Key="big/blob.bin", Body=body)
+    dest = tmp_path / "blob.bin"
+    options = {"part_size_mb": 1, "multipart_threshold_mb": 1, "hash_cache_path": str(tmp_path / "hashes.db")}
+    middle = f"bytes={MB}-{2 * MB - 1}"
+
+    first = RecordingClient(fail=[middle])
+    summary = download_object(BUCKET, "big/blob.bin", str(dest), workers=2, s3=first, **options)
+    assert (summary["files"], summary["failed"]) == (0, 1)
+    assert not dest.exists()
+    assert os.path.exists(str(dest) + CHECKPOINT_SUFFIX)
+
+    second = RecordingClient()
+    summary = download_object(BUCKET, "big/blob.bin", str(dest), workers=2, s3=second, **options)
+    assert (summary["files"], summary["failed"]) == (1, 0)
+    assert second.ranges == [middle]
+    assert dest.read_bytes() == body
+    assert not os.path.exists(str(dest) + CHECKPOINT_SUFFIX)
@@ -0,0 +1,36 @@
+import boto3
+
+import empty_bucket
+from empty_bucket import delete_batch, purge_bucket
+
+BUCKET = "purge-bucket-1"
+
+class SlowDownClient:
+    """Reports every key of every DeleteObjects batch as throttled."""
+
+    def delete_objects(self, Bucket, Delete):
+        return {"Errors": [{**obj, "Code": "SlowDown"} for obj in Delete["Objects"]]}
+
+def test_gives_up_without_sleeping_after_the_last_attempt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(empty_bucket.time, "sleep", sleeps.append)
+    batch = [{"Key": "k", "VersionId": "v"}]
+    assert delete_batch(SlowDownClient(), BUCKET, batch, max_attempts=3) == (0, 1)
+    assert len(sleeps) == 2
+
+def test_purge_deletes_more_than_one_batch_of_versions():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    s3.put_bucket_versioning(Bucket=BUCKET, VersioningConfiguration={"Status": "Enabled"})
+    for n in range(520):
+        for body in (b"v1", b"v2"):
+            s3.put_object(Bucket=BUCKET, Key=f"purge/{n:04d}", Body=body)
+    for n in range(20):
+        s3.delete_object(Bucket=BUCKET, Key=f"purge/{n:04d}")  # Leaves delete markers
+    s3.create_multipart_upload(Bucket=BUCKET, Key="purge/unfinished")
+
+    summary = purge_bucket(BUCKET, "purge/", workers=4)
+    assert (summary["deleted"], summary["failed"], summary["aborted_uploads"]) == (1060, 0, 1)
+    listing = s3.list_object_versions(Bucket=BUCKET)
+    assert not listing.get("Versions") and not listing.get("DeleteMarkers")
+    assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
@@ -0,0 +1,49 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+import boto3
+
+from inventory_reader import iter_inventory_objects, latest_manifest
+
+SOURCE, DESTINATION = "inventoried-bucket-1", "inventory-reports-1"
+SCHEMA = "Bucket, Key, VersionId, IsLatest, IsDeleteMarker, Size, LastModifiedDate, ETag, StorageClass"
+ROWS = [
+    [SOURCE, "data/report+2024.csv", "v2", "true", "false", "1024", "2024-05-01T10:00:00.000Z", "abc", "STANDARD"],
+    [SOURCE, "data/report+2024.csv", "v1", "false", "false", "512", "2024-04-01T10:00:00.000Z", "def", "STANDARD"],
+    [SOURCE, "data/gone.txt", "v3", "true", "true", "", "2024-05-02T10:00:00.000Z", "", ""],
+    [SOURCE, "data/folder/", "v4", "true", "false", "0", "2024-05-02T10:00:00.000Z", "d41d8", "STANDARD"],
+    [SOURCE, "logs/app%C3%BC.log", "v5", "true", "false", "2048", "2024-05-03T10:00:00.000Z", "123", "GLACIER"],
+]
+
+def csv_gz(rows):
+    return gzip.compress("".join(",".join(f'"{v}"' for v in row) + "\n" for row in rows).encode())
+
+def deliver_report():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=SOURCE)
+    s3.create_bucket(Bucket=DESTINATION)
+    s3.put_bucket_inventory_configuration(Bucket=SOURCE, Id="InventoryConfig", InventoryConfiguration={
+        "Id": "InventoryConfig", "IsEnabled": True, "IncludedObjectVersions": "All", "Schedule": {"Frequency": "Daily"},
+        "Destination": {"S3BucketDestination": {"Bucket": f"arn:aws:s3:::{DESTINATION}", "Format": "CSV", "Prefix": "inventory"}},
+    })
+    report = f"inventory/{SOURCE}/InventoryConfig/"
+    data_keys = [f"{report}data/part-{i}.csv.gz" for i in range(2)]
+    s3.put_object(Bucket=DESTINATION, Key=data_keys[0], Body=csv_gz(ROWS[:3]))
+    s3.put_object(Bucket=DESTINATION, Key=data_keys[1], Body=csv_gz(ROWS[3:]))
+    for folder, files in (("2024-05-01T01-00Z/", []), ("2024-05-04T01-00Z/", data_keys)):
+        manifest = {"fileFormat": "CSV", "fileSchema": SCHEMA, "files": [{"key": key} for key in files]}
+        s3.put_object(Bucket=DESTINATION, Key=f"{report}{folder}manifest.json", Body=json.dumps(manifest).encode())
+
+def test_reads_the_latest_csv_report():
+    deliver_report()
+    assert latest_manifest(SOURCE)["manifestKey"].endswith("2024-05-04T01-00Z/manifest.json")
+
+    objects = list(iter_inventory_objects(SOURCE))
+    assert [obj["Key"] for obj in objects] == ["data/report 2024.csv", "logs/appü.log"]
+    assert objects[0] == {
+        "Key": "data/report 2024.csv", "Size": 1024, "ETag": '"abc"', "StorageClass": "STANDARD", "VersionId": "v2",
+        "LastModified": datetime(2024, 5, 1, 10, tzinfo=timezone.utc), "IsLatest": True, "IsDeleteMarker": False,
+    }
+    assert [obj["Key"] for obj in iter_inventory_objects(SOURCE, prefix="logs/", file_extension=".log")] == ["logs/appü.log"]
+    assert len(list(iter_inventory_objects(SOURCE, include_versions=True))) == 4
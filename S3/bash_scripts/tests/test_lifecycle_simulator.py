@@ -0,0 +1,42 @@
+import time
+from datetime import datetime, timezone
+
+from lifecycle_simulator import LIFECYCLE_RULES, load_analytics_csv, load_objects, rule_prefixes, simulate
+
+ANALYTICS_HEADER = "Date,ConfigId,Filter,StorageClass,ObjectAge,ObjectCount,DataUploaded_MB,Storage_MB\n"
+
+def test_empty_table_projects_zero_cost():
+    table = load_objects([], rule_prefixes([("default", LIFECYCLE_RULES)]))
+    results = simulate(table, LIFECYCLE_RULES, months=3)
+    assert [r["month"] for r in results] == [0, 1, 2, 3]
+    assert all(r["total_cost"] == 0 and r["bytes"] == {} for r in results)
+
+def test_objects_are_billed():
+    day = 86400
+    objects = [
+        {"Key": f"data/{i}", "Size": 1024 ** 3, "LastModified": datetime.fromtimestamp(time.time() - i * day, timezone.utc)}
+        for i in range(0, 400, 40)
+    ]
+    results = simulate(load_objects(objects), LIFECYCLE_RULES, months=1)
+    assert results[0]["storage_cost"] > 0
+
+def test_analytics_export_without_age_rows(tmp_path):
+    path = tmp_path / "analytics.csv"
+    path.write_text(ANALYTICS_HEADER + "2024-01-01,cfg,,STANDARD,ALL,10,1,1\n")
+    table = load_analytics_csv(str(path))
+    assert len(table["count"]) == 0
+    assert simulate(table, LIFECYCLE_RULES, months=0)[0]["total_cost"] == 0
+
+def test_rules_beyond_one_group_word():
+    day = 86400
+    rules = [{"ID": f"expire-{i}", "Filter": {"Prefix": f"p{i}/"}, "Status": "Enabled", "Expiration": {"Days": 100 + i}}
+             for i in range(40)]
+    objects = [
+        {"Key": f"p{i}/object", "Size": 1024 ** 3, "LastModified": datetime.fromtimestamp(time.time() - 120 * day, timezone.utc)}
+        for i in (1, 35)
+    ]
+    results = simulate(load_objects(objects, rule_prefixes([("many", rules)])), rules, months=1)
+    only_last = simulate(load_objects(objects[1:], rule_prefixes([("one", rules[35:36])])), rules[35:36], months=1)
+    # Both objects have expired a month later: p1/ under rule 1 and p35/ under rule 35, past the first group word
+    assert results[0]["bytes"] and only_last[0]["bytes"]
+    assert results[1]["bytes"] == only_last[1]["bytes"] == {}
@@ -0,0 +1,21 @@
+import boto3
+
+from list_s3_contents import discover_shards, iter_objects, parallel_iter_objects
+
+BUCKET = "listing-bucket-1"
+
+def test_sharded_listing_matches_plain_listing():
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    keys = [f"logs/{day:02d}/{n}.gz" for day in range(1, 6) for n in range(20)]
+    keys += [f"flat-{c}{n}" for c in "09AZaz" for n in range(15)]
+    keys += ["Zebra/x", "data/~tilde", "data/ünïcode", "top.txt"]
+    for key in keys:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"")
+
+    assert len(discover_shards(BUCKET, target_shards=16)) > 1
+    plain = [obj["Key"] for obj in iter_objects(BUCKET)]
+    assert plain == sorted(keys, key=lambda k: k.encode())
+    assert [obj["Key"] for obj in parallel_iter_objects(BUCKET, workers=4, max_buffered_pages=1)] == plain
+    assert sorted(obj["Key"] for obj in parallel_iter_objects(BUCKET, workers=4, ordered=False)) == sorted(plain)
+    assert [obj["Key"] for obj in parallel_iter_objects(BUCKET, "logs/", workers=4)] == [k for k in plain if k.startswith("logs/")]
@@ -0,0 +1,61 @@
+import os
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from multipart_upload import MB, MultipartWriter, ResumableUpload, resumable_upload
+
+BUCKET = "multipart-bucket-1"
+
+class RecordingClient:
+    """Passes calls through to S3, recording UploadPart numbers and rejecting the parts in `fail`."""
+
+    def __init__(self, fail=()):
+        self.s3 = boto3.client("s3")
+        self.fail = set(fail)
+        self.parts = []
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def upload_part(self, **kwargs):
+        self.parts.append(kwargs["PartNumber"])
+        if kwargs["PartNumber"] in self.fail:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+        return self.s3.upload_part(**kwargs)
+
+@pytest.fixture(scope="module")
+def bucket():
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+    return BUCKET
+
+def test_interrupted_upload_resumes_missing_parts(bucket, tmp_path):
+    path = tmp_path / "big.bin"
+    body = os.urandom(12 * MB)
+    path.write_bytes(body)
+    state_dir = str(tmp_path / "state")
+
+    with pytest.raises(ClientError):
+        resumable_upload(RecordingClient(fail=[2]), str(path), bucket, "big.bin", 5 * MB, 1, state_dir)
+    assert os.path.exists(ResumableUpload(None, str(path), bucket, "big.bin", 5 * MB, state_dir).state_path)
+
+    second = RecordingClient()
+    assert resumable_upload(second, str(path), bucket, "big.bin", 5 * MB, 2, state_dir) == len(body)
+    assert second.parts == [2]
+    assert boto3.client("s3").get_object(Bucket=bucket, Key="big.bin")["Body"].read() == body
+    assert os.listdir(state_dir) == []
+
+def test_streaming_writer_round_trip(bucket):
+    s3 = boto3.client("s3")
+    chunks = [os.urandom(MB) for _ in range(11)]
+    with MultipartWriter(s3, bucket, "stream.bin", part_size=5 * MB, ContentType="application/octet-stream") as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    with MultipartWriter(s3, bucket, "small.bin") as writer:
+        writer.write(b"tiny")
+
+    assert s3.get_object(Bucket=bucket, Key="stream.bin")["Body"].read() == b"".join(chunks)
+    assert s3.head_object(Bucket=bucket, Key="stream.bin")["ContentType"] == "application/octet-stream"
+    assert s3.get_object(Bucket=bucket, Key="small.bin")["Body"].read() == b"tiny"
+    assert not s3.list_multipart_uploads(Bucket=bucket).get("Uploads")
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from object_index import ObjectIndex
+
+MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+@pytest.fixture
+def index(tmp_path):
+    index = ObjectIndex(str(tmp_path / "index.db"))
+    keys = ["data/a.csv", "data/b.json", "data/c.tar.gz", "logs/d.csv"] + [f"data/{i:04d}.json" for i in range(500)]
+    index.rebuild("bucket", [{"Key": key, "Size": 1, "LastModified": MODIFIED} for key in keys])
+    return index
+
+def query_plan(index, extension):
+    # query() builds its SQL lazily; capture it by running EXPLAIN QUERY PLAN on the same statement
+    statements = []
+    index.conn.set_trace_callback(statements.append)
+    list(index.query("bucket", extension=extension))
+    index.conn.set_trace_callback(None)
+    sql = next(s for s in statements if s.startswith("SELECT key"))
+    return " ".join(row[-1] for row in index.conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+def test_extension_query_results(index):
+    assert [o["Key"] for o in index.query("bucket", extension=".csv")] == ["data/a.csv", "logs/d.csv"]
+    assert [o["Key"] for o in index.query("bucket", extension=".tar.gz")] == ["data/c.tar.gz"]
+
+def test_single_suffix_uses_extension_index(index):
+    assert "objects_extension" in query_plan(index, ".csv")
+
+def test_compound_suffix_falls_back_to_suffix_match(index):
+    assert "objects_extension" not in query_plan(index, ".tar.gz")
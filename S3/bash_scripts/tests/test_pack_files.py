@@ -0,0 +1,50 @@
+import io
+import os
+import tarfile
+
+import boto3
+
+from pack_files import KB, PackIndex, pack_path, pack_root
+
+BUCKET = "pack-bucket-1"
+
+def test_pack_then_read_and_extract(tmp_path):
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+    local = tmp_path / "local"
+    (local / "nested").mkdir(parents=True)
+    contents = {f"small-{n:02d}.txt": os.urandom(n * 97) for n in range(30)}  # Includes an empty file
+    contents["nested/deep.txt"] = b"deep"
+    for name, body in contents.items():
+        (local / name).write_bytes(body)
+    (local / "large.bin").write_bytes(os.urandom(10 * KB))
+    options = {"threshold": 4 * KB, "workers": 2, "hash_cache_path": str(tmp_path / "hashes.db")}
+
+    summary = pack_path(str(local), BUCKET, "site", **options)
+    assert (summary["packed"], summary["files"], summary["failed"]) == (31, 32, 0)
+
+    index = PackIndex.load(BUCKET, "site")
+    assert index.names() == sorted(f"site/{name}" for name in contents)
+    for name, body in contents.items():
+        assert index.read(f"site/{name}") == body
+
+    dest = tmp_path / "extracted"
+    extracted = index.extract(index.names(), str(dest), prefix="site/", workers=2)
+    assert (extracted["files"], extracted["failed"]) == (31, 0)
+    assert extracted["requests"] < 31  # Neighbouring members share GETs
+    for name, body in contents.items():
+        assert (dest / name).read_bytes() == body
+
+    # Archives are plain tar files
+    s3 = boto3.client("s3")
+    archives = [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix=pack_root("site"))["Contents"]
+                if obj["Key"].endswith(".tar")]
+    names = set()
+    for key in archives:
+        with tarfile.open(fileobj=io.BytesIO(s3.get_object(Bucket=BUCKET, Key=key)["Body"].read())) as tar:
+            names.update(tar.getnames())
+    assert names == set(index.names())
+    assert s3.get_object(Bucket=BUCKET, Key="site/large.bin")["ContentLength"] == 10 * KB
+
+    # Nothing changed, so nothing is packed again
+    again = pack_path(str(local), BUCKET, "site", **options)
+    assert (again["packed"], again["skipped"]) == (0, 32)
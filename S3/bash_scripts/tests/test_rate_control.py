@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from botocore.exceptions import ClientError
+
+import rate_control
+from rate_control import MAX_TOTAL_ATTEMPTS, RateController
+
+def slow_down(retry_attempts):
+    response = {"Error": {"Code": "SlowDown"}, "ResponseMetadata": {"RetryAttempts": retry_attempts}}
+    return ClientError(response, "PutObject")
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_control.time, "sleep", lambda seconds: None)
+
+@pytest.mark.parametrize("client_retries", [0, 2, 9])
+def test_call_caps_total_attempts_across_both_retry_layers(client_retries):
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        raise slow_down(client_retries)
+
+    with pytest.raises(ClientError):
+        RateController().call("bucket", "key", "write", throttled)
+    http_attempts = len(calls) * (client_retries + 1)
+    assert MAX_TOTAL_ATTEMPTS <= http_attempts < MAX_TOTAL_ATTEMPTS + client_retries + 1
+
+def test_call_does_not_retry_other_errors():
+    calls = []
+
+    def denied():
+        calls.append(1)
+        raise ClientError({"Error": {"Code": "AccessDenied"}}, "PutObject")
+
+    with pytest.raises(ClientError):
+        RateController().call("bucket", "key", "write", denied)
+    assert len(calls) == 1
+
+def test_async_slot_waits_without_polling(monkeypatch):
+    real_sleep = asyncio.sleep
+    polls = []
+
+    async def counting_sleep(seconds, *args):
+        polls.append(seconds)
+        await real_sleep(seconds, *args)
+
+    controller = RateController(write_rate=1e9)
+    partition = controller.controller("bucket", "key", "write")
+    partition.limit = partition.max_concurrency = 2
+    peak = []
+
+    async def request():
+        async with controller.async_slot("bucket", "key", "write", timed=False):
+            peak.append(partition.in_flight)
+            await real_sleep(0.01)
+
+    async def run():
+        monkeypatch.setattr(rate_control.asyncio, "sleep", counting_sleep)
+        await asyncio.gather(*(request() for _ in range(50)))
+
+    asyncio.run(run())
+    assert len(peak) == 50 and max(peak) <= 2
+    assert polls == []
+    assert partition.in_flight == 0 and not partition.async_waiters
+
+def test_cancelled_async_waiter_passes_its_wakeup_on():
+    controller = RateController(write_rate=1e9)
+    partition = controller.controller("bucket", "key", "write")
+    partition.limit = partition.max_concurrency = 1
+
+    async def run():
+        partition.enter()  # Hold the only slot
+        first = asyncio.ensure_future(partition.enter_async())
+        second = asyncio.ensure_future(partition.enter_async())
+        await asyncio.sleep(0)
+        partition.leave()  # Wakes `first` ...
+        first.cancel()     # ... which is cancelled before it runs
+        await asyncio.wait_for(second, timeout=1)
+        assert partition.in_flight == 1
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import boto3
+
+from sync_to_s3 import S3Syncer
+
+BUCKET = "sync-bucket-1"
+
+class RefusingDeletes:
+    """Passes calls through to S3, but reports some keys of each DeleteObjects as not deleted."""
+
+    def __init__(self, s3, refused):
+        self.s3 = s3
+        self.refused = set(refused)
+
+    def __getattr__(self, name):
+        return getattr(self.s3, name)
+
+    def delete_objects(self, Bucket, Delete):
+        allowed = [obj for obj in Delete["Objects"] if obj["Key"] not in self.refused]
+        response = self.s3.delete_objects(Bucket=Bucket, Delete={**Delete, "Objects": allowed})
+        response["Errors"] = [{"Key": key, "Code": "AccessDenied"} for key in sorted(self.refused)]
+        return response
+
+def remote_keys():
+    return sorted(obj["Key"] for obj in boto3.client("s3").list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+def test_refused_deletes_are_retried(tmp_path):
+    boto3.client("s3").create_bucket(Bucket=BUCKET)
+    local = tmp_path / "local"
+    local.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (local / name).write_text(name)
+    syncer = S3Syncer(str(local), BUCKET, "mirror", manifest_path=str(tmp_path / "manifest.db"),
+                      hash_cache_path=str(tmp_path / "hashes.db"))
+    syncer.scan()
+    assert remote_keys() == ["mirror/a.txt", "mirror/b.txt", "mirror/c.txt"]
+
+    (local / "a.txt").unlink()
+    (local / "b.txt").unlink()
+    s3 = syncer.s3
+    syncer.s3 = RefusingDeletes(s3, refused=["mirror/b.txt"])
+    syncer.scan()
+    assert remote_keys() == ["mirror/b.txt", "mirror/c.txt"]
+
+    syncer.s3 = s3
+    syncer.scan()
+    assert remote_keys() == ["mirror/c.txt"]
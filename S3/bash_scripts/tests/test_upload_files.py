@@ -0,0 +1,22 @@
+import pytest
+
+from upload_files import main, upload_path
+
+@pytest.fixture
+def files(tmp_path):
+    root = tmp_path / "files"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("alpha")
+    (root / "sub" / "b.txt").write_text("beta")
+    return root
+
+def test_upload_to_missing_bucket_counts_failures(files, tmp_path):
+    summary = upload_path(str(files), "no-such-bucket", hash_cache_path=str(tmp_path / "hashes.db"),
+                          skip_unchanged=False, dedupe=False)
+    assert summary["files"] == 0
+    assert summary["failed"] == 2
+
+def test_upload_to_missing_bucket_exits_non_zero(files, tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(files), "no-such-bucket", "--hash-cache", str(tmp_path / "hashes.db")])
+    assert exit_info.value.code != 0
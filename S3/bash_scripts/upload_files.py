@@ -0,0 +1,321 @@
+#✔ Concurrent Uploads: Uploads files through a bounded thread pool sharing one pooled boto3 client.
+#✔ Recursive Directory Walk: Uploads whole directory trees, keeping relative paths as S3 keys.
+#✔ Multipart Uploads: Large files are split into parts with tunable part size and concurrency.
+#✔ Resumable Mode: With --resumable, interrupted large uploads continue from their last finished part.
+#✔ Skip Unchanged: Compares local ETags with the remote listing and skips files that are already uploaded.
+#✔ Deduplication: Identical local files are uploaded once and server-side copied to their other keys.
+#✔ Throughput Summary: Reports files/s and MB/s for every run.
+#✔ Compression: With --compress gzip|zstd, files are compressed in parallel chunks on the way up (see compression.py).
+#✔ Small-File Packing: With --pack, files under the threshold go into tar archives with a ranged-read index (see pack_files.py).
+#✔ Rate Controlled: Uploads are paced per key prefix by the shared rate controller and throttled uploads are retried.
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from collections import Counter
+from botocore.exceptions import BotoCoreError, NoCredentialsError, PartialCredentialsError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+
+from bucket_region import RegionRoutingClient
+from compression import CODECS, StreamCompressor, should_compress, upload_compressed
+from content_hash import DEFAULT_HASH_CACHE, HashCache
+from list_s3_contents import iter_objects
+from multipart_upload import DEFAULT_STATE_DIR, resumable_upload
+from rate_control import shared_controller
+from instrumentation import profiled
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+MB = 1024 * 1024
+
+def create_client(workers, part_concurrency):
+    """Returns a region-routing S3 client whose connection pools fit every concurrent request."""
+    return RegionRoutingClient(max_pool_connections=workers * part_concurrency)
+
+def transfer_config(part_size, multipart_threshold, part_concurrency):
+    """Builds the managed-transfer config (imported lazily to keep startup fast)."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=part_size,
+        max_concurrency=part_concurrency,
+        use_threads=part_concurrency > 1
+    )
+
+def upload_errors():
+    """Returns the exceptions a failed upload raises; boto3's transfer manager wraps errors in S3UploadFailedError."""
+    from boto3.exceptions import S3UploadFailedError
+
+    return BotoCoreError, ClientError, OSError, S3UploadFailedError
+
+def iter_files(local_path):
+    """Yields every regular file under `local_path`, recursing into subdirectories."""
+    if os.path.isfile(local_path):
+        yield local_path
+        return
+
+    for root, dirs, files in os.walk(local_path):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+def build_key(local_path, file_path, prefix=""):
+    """Builds the S3 key for a file, keeping its path relative to the uploaded directory."""
+    if os.path.isfile(local_path):
+        relative = os.path.basename(file_path)
+    else:
+        relative = os.path.relpath(file_path, local_path).replace(os.sep, "/")
+
+    prefix = prefix.strip("/")
+    return f"{prefix}/{relative}" if prefix else relative
+
+def upload_file(s3, file_path, bucket_name, key, transfer_config, state_dir=None, compressor=None, hash_cache=None):
+    """Uploads a single file, using multipart upload above the configured threshold.
+
+    With a `compressor`, compressible files are streamed through it instead (not resumable);
+    the hash cache then remembers the compressed object's ETag for later skip checks.
+    With a `state_dir`, large files use a resumable multipart upload whose progress is kept there.
+    """
+    if compressor and should_compress(file_path, os.path.getsize(file_path)):
+        stat = os.stat(file_path)
+        size, etag = upload_compressed(s3, compressor, file_path, bucket_name, key,
+                                       transfer_config.multipart_chunksize, transfer_config.max_concurrency)
+        if hash_cache:
+            hash_cache.remember_stored(file_path, etag, stat)
+        return size
+    if state_dir and os.path.getsize(file_path) >= transfer_config.multipart_threshold:
+        return resumable_upload(s3, file_path, bucket_name, key, transfer_config.multipart_chunksize,
+                                transfer_config.max_concurrency, state_dir)
+    shared_controller().call(
+        bucket_name, key, "write", lambda: s3.upload_file(file_path, bucket_name, key, Config=transfer_config), timed=False
+    )
+    return os.path.getsize(file_path)
+
+def list_remote(bucket_name, key_prefix):
+    """Returns {key: (size, etag)} for existing objects under the destination prefix."""
+    return {obj["Key"]: (obj["Size"], obj["ETag"]) for obj in iter_objects(bucket_name, prefix=key_prefix)}
+
+def plan_uploads(local_path, bucket_name, prefix, hash_cache, part_size, multipart_threshold,
+                 skip_unchanged=True, dedupe=True, workers=16, min_size=0, compressed=False):
+    """Splits local files into uploads, server-side copies of identical content, and unchanged files.
+
+    Only files that could match something (a remote object of the same size, or
+    another local file of the same size) are hashed, plus, when `compressed`, files whose
+    remote object differs in size (it may hold their compressed content). Files smaller
+    than `min_size` are left out.
+    """
+    files = [(path, build_key(local_path, path, prefix), stat) for path in iter_files(local_path)
+             for stat in [os.stat(path)] if stat.st_size >= min_size]
+
+    remote = {}
+    if skip_unchanged:
+        if os.path.isfile(local_path):
+            key_prefix = build_key(local_path, local_path, prefix)
+        else:
+            key_prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        remote = list_remote(bucket_name, key_prefix)
+
+    size_counts = Counter(stat.st_size for _, _, stat in files if stat.st_size > 0) if dedupe else Counter()
+
+    def inspect(item):
+        path, key, stat = item
+        existing = remote.get(key)
+        if not existing:
+            unchanged = False
+        elif existing[0] == stat.st_size:
+            unchanged = hash_cache.matches_remote(path, existing[1], part_size, multipart_threshold, stat)
+        else:
+            unchanged = compressed and hash_cache.stored_as(path, existing[1], stat)
+        md5_hex = None
+        if size_counts[stat.st_size] > 1:
+            md5_hex = hash_cache.get(path, part_size, multipart_threshold, stat)[0]
+        return item, md5_hex, unchanged
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        inspected = list(executor.map(inspect, files))
+
+    # Content already in the bucket is the cheapest copy source, so register it first
+    source_by_md5 = {md5_hex: item[1] for item, md5_hex, unchanged in inspected if unchanged and md5_hex}
+
+    uploads, copies, skipped = [], [], []
+    for item, md5_hex, unchanged in inspected:
+        if unchanged:
+            skipped.append(item)
+        elif md5_hex and md5_hex in source_by_md5:
+            copies.append((item, source_by_md5[md5_hex]))
+        else:
+            uploads.append(item)
+            if md5_hex:
+                source_by_md5[md5_hex] = item[1]
+    return uploads, copies, skipped
+
+def upload_path(local_path, bucket_name, prefix="", workers=16, part_size_mb=8,
+                multipart_threshold_mb=16, part_concurrency=4, skip_unchanged=True, dedupe=True,
+                hash_cache_path=DEFAULT_HASH_CACHE, state_dir=None, min_size=0, compressor=None):
+    """Uploads a file or directory tree concurrently and returns a throughput summary.
+
+    Files smaller than `min_size` are left out (pack_files.pack_path() packs them instead).
+    With a compression.StreamCompressor, compressible files are uploaded compressed.
+    """
+    s3 = create_client(workers, part_concurrency)
+    config = transfer_config(part_size_mb * MB, multipart_threshold_mb * MB, part_concurrency)
+
+    summary = {"files": 0, "bytes": 0, "failed": 0, "skipped": 0, "deduplicated": 0}
+    errors = upload_errors()
+    failed_keys = set()
+    lock = threading.Lock()
+    # Bound the number of queued uploads so huge trees don't build a huge backlog of futures
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    def run(file_path, key, copy_source=None):
+        try:
+            if copy_source is None:
+                size = upload_file(s3, file_path, bucket_name, key, config, state_dir, compressor, hash_cache)
+            elif copy_source in failed_keys:
+                raise OSError(f"source upload '{copy_source}' failed")
+            else:
+                shared_controller().call(bucket_name, key, "write", lambda: s3.copy(
+                    {"Bucket": bucket_name, "Key": copy_source}, bucket_name, key, Config=config
+                ))
+                size = 0
+            with lock:
+                summary["files"] += 1
+                summary["bytes"] += size
+                summary["deduplicated"] += copy_source is not None
+        except errors as e:
+            logging.error(f"❌ Failed to upload '{file_path}': {e}")
+            with lock:
+                summary["failed"] += 1
+                failed_keys.add(key)
+        finally:
+            in_flight.release()
+
+    start = time.perf_counter()
+    hash_cache = HashCache(hash_cache_path) if skip_unchanged or dedupe or compressor else None
+    if skip_unchanged or dedupe:
+        uploads, copies, skipped = plan_uploads(
+            local_path, bucket_name, prefix, hash_cache, part_size_mb * MB, multipart_threshold_mb * MB,
+            skip_unchanged, dedupe, workers, min_size, compressor is not None
+        )
+        summary["skipped"] = len(skipped)
+        uploads = ((path, key) for path, key, _ in uploads)
+    else:
+        uploads = ((path, build_key(local_path, path, prefix)) for path in iter_files(local_path)
+                   if not min_size or os.path.getsize(path) >= min_size)
+        copies = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file_path, key in uploads:
+            in_flight.acquire()
+            executor.submit(run, file_path, key)
+
+    # Duplicates are copied server-side once every source upload has finished
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for (file_path, key, _), copy_source in copies:
+            in_flight.acquire()
+            executor.submit(run, file_path, key, copy_source)
+    summary["seconds"] = time.perf_counter() - start
+    if compressor:
+        summary["compression"] = compressor.stats()
+
+    log_summary(summary)
+    return summary
+
+def log_summary(summary):
+    """Logs files/s and MB/s for a finished run."""
+    seconds = max(summary["seconds"], 1e-9)
+    megabytes = summary["bytes"] / MB
+    logging.info(
+        f"📊 Uploaded {summary['files']} files ({megabytes:.2f} MB) in {summary['seconds']:.2f}s | "
+        f"{summary['files'] / seconds:.1f} files/s | {megabytes / seconds:.2f} MB/s | {summary['failed']} failed"
+    )
+    if summary.get("packed"):
+        logging.info(f"📦 {summary['packed']} small files went into {summary['archives']} archives")
+    compression = summary.get("compression")
+    if compression and compression["bytes_in"]:
+        logging.info(
+            f"🗜 {compression['codec']} level {compression['level']}: {compression['bytes_in'] / MB:.2f} MB → "
+            f"{compression['bytes_out'] / MB:.2f} MB ({compression['ratio']}x) for {compression['cpu_seconds']:.2f} CPU s "
+            f"({compression['cpu_seconds_per_gb_saved']} CPU s per GB saved)"
+        )
+    if summary["skipped"] or summary["deduplicated"]:
+        logging.info(f"⏭ Skipped {summary['skipped']} unchanged files | {summary['deduplicated']} duplicates copied server-side")
+
+def parse_args(argv=None):
+    """Parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Upload a file or directory tree to S3 concurrently.")
+    parser.add_argument("local_path", help="File or directory to upload")
+    parser.add_argument("bucket_name", help="Destination S3 bucket")
+    parser.add_argument("--prefix", default="", help="S3 folder (prefix) to upload into")
+    parser.add_argument("--workers", type=int, default=16, help="Number of files uploaded concurrently")
+    parser.add_argument("--part-size-mb", type=int, default=8, help="Multipart part size in MB")
+    parser.add_argument("--multipart-threshold-mb", type=int, default=16, help="Files above this size use multipart upload")
+    parser.add_argument("--part-concurrency", type=int, default=4, help="Parts uploaded concurrently per large file")
+    parser.add_argument("--no-skip-unchanged", action="store_true", help="Upload every file even if the remote ETag matches")
+    parser.add_argument("--no-dedupe", action="store_true", help="Upload identical local files separately")
+    parser.add_argument("--hash-cache", default=DEFAULT_HASH_CACHE, help="Path of the SQLite hash cache")
+    parser.add_argument("--resumable", action="store_true", help="Resume interrupted multipart uploads on the next run")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR, help="Directory for resumable upload state files")
+    parser.add_argument("--compress", choices=CODECS, help="Compress files on the fly (zstd needs the zstandard package)")
+    parser.add_argument("--compression-level", type=int, help="Codec level (default: gzip 6, zstd 3)")
+    parser.add_argument("--compression-threads", type=int, help="Threads compressing chunks (default: CPU count)")
+    parser.add_argument("--pack", action="store_true", help="Pack small files into tar archives with a ranged-read index")
+    parser.add_argument("--pack-threshold-kb", type=int, default=64, help="Files below this size are packed")
+    parser.add_argument("--archive-size-mb", type=int, default=256, help="Target size of each archive")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to upload files."""
+    args = parse_args(argv)
+
+    if not os.path.exists(args.local_path):
+        logging.error(f"❌ The file or directory '{args.local_path}' does not exist.")
+        sys.exit(1)
+
+    compressor = None
+    try:
+        if args.compress:
+            compressor = StreamCompressor(args.compress, args.compression_level, args.compression_threads)
+        if args.pack:
+            from pack_files import pack_path
+
+            summary = pack_path(
+                args.local_path, args.bucket_name, args.prefix, args.pack_threshold_kb * 1024, args.archive_size_mb * MB,
+                args.workers, args.part_size_mb, args.part_concurrency, not args.no_skip_unchanged,
+                multipart_threshold_mb=args.multipart_threshold_mb, dedupe=not args.no_dedupe,
+                hash_cache_path=args.hash_cache, state_dir=args.state_dir if args.resumable else None,
+                compressor=compressor
+            )
+            log_summary(summary)
+        else:
+            summary = upload_path(
+                args.local_path, args.bucket_name, args.prefix, args.workers,
+                args.part_size_mb, args.multipart_threshold_mb, args.part_concurrency,
+                not args.no_skip_unchanged, not args.no_dedupe, args.hash_cache,
+                args.state_dir if args.resumable else None, compressor=compressor
+            )
+    except (NoCredentialsError, PartialCredentialsError):
+        logging.error("❌ AWS credentials not found or misconfigured. Run 'aws configure'.")
+        sys.exit(1)
+    except ClientError as e:
+        logging.error(f"❌ Upload failed: {e}")
+        sys.exit(1)
+    except RuntimeError as e:
+        logging.error(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if compressor:
+            compressor.shutdown()
+
+    if summary["failed"]:
+        sys.exit(1)
+    logging.info("✅ Upload process completed.")
+
+if __name__ == "__main__":
+    with profiled():
+        main()
@@ -27,40 +27,27 @@ while true; do
     fi
 done
 
-# Function to upload a single file
-upload_file() {
-    local FILE_PATH="$1"
-    local FILE_NAME=$(basename "$FILE_PATH")
-
-    if [ -n "$FOLDER" ]; then
-        S3_KEY="$FOLDER/$FILE_NAME"
-    else
-        S3_KEY="$FILE_NAME"
-    fi
+# Many tiny files cost one request each; packing them into archives cuts that by orders of magnitude
+read -p "Pack files under 64 KB into archives (read back with pack_files.py)? (y/N): " PACK
+PACK_FLAG=""
+if [[ "$PACK" =~ ^[Yy]$ ]]; then
+    PACK_FLAG="--pack"
+fi
 
-    echo "🚀 Uploading '$FILE_NAME' to S3://$BUCKET_NAME/$S3_KEY ..."
-    aws s3api put-object --bucket "$BUCKET_NAME" --key "$S3_KEY" --body "$FILE_PATH"
+# Logs and CSVs shrink 5-10x; compressed objects are decompressed again by download_files.py
+read -p "Compress files on upload? (gzip/zstd, or leave empty for none): " CODEC
+COMPRESS_FLAG=""
+if [ "$CODEC" = "gzip" ] || [ "$CODEC" = "zstd" ]; then
+    COMPRESS_FLAG="--compress $CODEC"
+fi
 
-    if [ $? -eq 0 ]; then
-        echo "✅ Uploaded '$FILE_NAME' successfully."
-    else
-        echo "❌ Failed to upload '$FILE_NAME'."
-    fi
-}
+# Upload through the concurrent Python engine (recursive, multipart for large files)
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+python3 "$SCRIPT_DIR/upload_files.py" "$LOCAL_PATH" "$BUCKET_NAME" --prefix "$FOLDER" --resumable $PACK_FLAG $COMPRESS_FLAG
 
-# Check if LOCAL_PATH is a directory or file
-if [ -d "$LOCAL_PATH" ]; then
-    echo "📂 Detected a directory. Uploading all files inside..."
-    
-    # Loop through each file in the directory
-    for FILE in "$LOCAL_PATH"/*; do
-        if [ -f "$FILE" ]; then
-            upload_file "$FILE"
-        fi
-    done
-else
-    # Upload single file
-    upload_file "$LOCAL_PATH"
+if [ $? -ne 0 ]; then
+    echo "❌ Some files failed to upload."
+    exit 1
 fi
 
 echo "✅ Upload process completed."